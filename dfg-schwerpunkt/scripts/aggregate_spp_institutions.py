@@ -4,10 +4,15 @@ Aggregate institutional participation data from scraped projects.
 Analyzes which institutions are involved in each SPP program.
 """
 
+import argparse
 import json
+import sys
 from pathlib import Path
 from collections import defaultdict, Counter
 
+sys.path.insert(0, str(Path(__file__).parent))
+from project_stream import iter_spp_groups
+
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
 PROJECTS_DIR = DATA_DIR / "projects"
@@ -38,79 +43,97 @@ def extract_institution_from_investigators(investigators_str):
 
     return institutions
 
-def analyze_spp_institutions():
-    """Analyze institutional participation for each SPP"""
+def analyze_spp_file(project_file):
+    """Analyze institutional participation for the SPP in one project file"""
+    with open(project_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    return analyze_spp_projects(data.get('spp_number', 'Unknown'), data.get('spp_title', 'Unknown'),
+                                data.get('projects', []))
+
+def analyze_spp_projects(spp_number, spp_title, projects):
+    """Analyze institutional participation for one SPP from an iterable of its projects"""
+    print(f"\n{spp_number}: {spp_title}")
+
+    # Count institutions
+    institution_counter = Counter()
+    all_institutions = []
+    num_projects = 0
+
+    for project in projects:
+        num_projects += 1
+        investigators = project.get('investigators', '')
+
+        # Records scraped with gepris_extract carry the applicant institutions
+        if project.get('institutions'):
+            for inst in project['institutions']:
+                institution_counter[inst] += 1
+                all_institutions.append(inst)
+            continue
+
+        # Try to extract institutions (this is basic - might need refinement)
+        # Since GEPRIS doesn't always separate institution cleanly,
+        # we'll just count unique investigator strings as proxies
+
+        if investigators:
+            # Split by semicolon and comma to get individual names
+            names = investigators.replace(';', ',').split(',')
+            for name in names:
+                name = name.strip()
+                if name and len(name) > 5:  # Filter out very short strings
+                    # Extract institution if in format "Name (Institution)"
+                    insts = extract_institution_from_investigators(name)
+                    for inst in insts:
+                        institution_counter[inst] += 1
+                        all_institutions.append(inst)
+
+    print(f"  Total projects: {num_projects}")
+
+    # Get top institutions
+    top_institutions = institution_counter.most_common(10)
+
+    if top_institutions:
+        print(f"  Top institutions:")
+        for inst, count in top_institutions[:5]:
+            print(f"    {count:2d} projects - {inst[:50]}")
+    else:
+        print(f"  No clear institutional data extracted")
+
+    # Create analysis summary
+    analysis = {
+        'spp_number': spp_number,
+        'spp_title': spp_title,
+        'num_projects': num_projects,
+        'num_institutions': len(set(all_institutions)),
+        'top_institutions': [
+            {'name': inst, 'project_count': count}
+            for inst, count in top_institutions
+        ],
+        'all_institutions': sorted(set(all_institutions))
+    }
+
+    return analysis
+
+def analyze_spp_institutions(source=None):
+    """
+    Analyze institutional participation for each SPP.
+
+    source is the per-SPP project directory (default), a .jsonl export or
+    the .sqlite datastore; projects are streamed one SPP at a time.
+    """
     print("="*70)
     print("SPP Institutional Participation Analysis")
     print("="*70)
 
-    if not PROJECTS_DIR.exists():
-        print(f"✗ Projects directory not found: {PROJECTS_DIR}")
+    source = source or PROJECTS_DIR
+    if not Path(source).exists():
+        print(f"✗ Projects source not found: {source}")
         return
 
-    project_files = list(PROJECTS_DIR.glob("*.json"))
-    print(f"✓ Found {len(project_files)} SPP project files")
-
     all_spp_analysis = []
 
-    for project_file in sorted(project_files):
-        with open(project_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        spp_number = data.get('spp_number', 'Unknown')
-        spp_title = data.get('spp_title', 'Unknown')
-        projects = data.get('projects', [])
-
-        print(f"\n{spp_number}: {spp_title}")
-        print(f"  Total projects: {len(projects)}")
-
-        # Count institutions
-        institution_counter = Counter()
-        all_institutions = []
-
-        for project in projects:
-            investigators = project.get('investigators', '')
-
-            # Try to extract institutions (this is basic - might need refinement)
-            # Since GEPRIS doesn't always separate institution cleanly,
-            # we'll just count unique investigator strings as proxies
-
-            if investigators:
-                # Split by semicolon and comma to get individual names
-                names = investigators.replace(';', ',').split(',')
-                for name in names:
-                    name = name.strip()
-                    if name and len(name) > 5:  # Filter out very short strings
-                        # Extract institution if in format "Name (Institution)"
-                        insts = extract_institution_from_investigators(name)
-                        for inst in insts:
-                            institution_counter[inst] += 1
-                            all_institutions.append(inst)
-
-        # Get top institutions
-        top_institutions = institution_counter.most_common(10)
-
-        if top_institutions:
-            print(f"  Top institutions:")
-            for inst, count in top_institutions[:5]:
-                print(f"    {count:2d} projects - {inst[:50]}")
-        else:
-            print(f"  No clear institutional data extracted")
-
-        # Create analysis summary
-        analysis = {
-            'spp_number': spp_number,
-            'spp_title': spp_title,
-            'num_projects': len(projects),
-            'num_institutions': len(set(all_institutions)),
-            'top_institutions': [
-                {'name': inst, 'project_count': count}
-                for inst, count in top_institutions
-            ],
-            'all_institutions': sorted(set(all_institutions))
-        }
-
-        all_spp_analysis.append(analysis)
+    for spp_number, spp_title, projects in iter_spp_groups(source):
+        all_spp_analysis.append(analyze_spp_projects(spp_number or 'Unknown', spp_title or 'Unknown', projects))
 
     # Save analysis
     print(f"\n{'='*70}")
@@ -126,4 +149,8 @@ def analyze_spp_institutions():
     return all_spp_analysis
 
 if __name__ == "__main__":
-    analyze_spp_institutions()
+    parser = argparse.ArgumentParser(description="Aggregate institutional participation per SPP")
+    parser.add_argument('--input', type=Path, default=None,
+                        help="Per-SPP project directory, a .jsonl export or the .sqlite datastore "
+                             "(default: data/raw/projects)")
+    analyze_spp_institutions(parser.parse_args().input)
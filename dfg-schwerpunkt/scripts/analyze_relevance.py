@@ -4,11 +4,21 @@ DFG Projects Relevance Analyzer
 Analyzes scraped projects for relevance to wearables and AI
 """
 
+import argparse
 import json
-import re
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from collections import defaultdict
+
+sys.path.insert(0, str(Path(__file__).parent))
+from project_stream import is_datastore, iter_spp_groups
+from scored_projects import ParquetExport
+from topic_profiles import TopicScorer, keyword_columns, load_profiles, score_columns
 
 # Paths
 BASE_DIR = Path(__file__).parent.parent
@@ -18,254 +28,244 @@ PROCESSED_DIR = DATA_DIR / "processed"
 PROJECTS_DIR = RAW_DIR / "projects"
 REPORTS_DIR = BASE_DIR / "reports"
 
-# Keywords for matching
-WEARABLES_KEYWORDS = {
-    'german': [
-        'wearable', 'tragbar', 'smart watch', 'smartwatch', 'fitness tracker',
-        'sensor', 'biosensor', 'tragbare elektronik', 'e-textil', 'smart textile',
-        'körpersensor', 'gesundheitsmonitor', 'mobile sensoren', 'hautnahe',
-        'tragbare sensoren', 'smart clothing', 'intelligente kleidung',
-        'körpernah', 'am körper', 'wearable computing', 'tragbares system',
-        # Robotics and soft materials
-        'soft robot', 'weich', 'flexible', 'dehnbar', 'elastomer',
-        'aktor', 'actuator', 'greif', 'manipulator', 'biomimetisch',
-        # Medical/implantable
-        'implant', 'lunge', 'lung', 'medizin', 'medical', 'biomedical',
-        'patient', 'therapie', 'therapy', 'prothes', 'orthes'
-    ],
-    'english': [
-        'wearable', 'smart watch', 'smartwatch', 'fitness tracker', 'body sensor',
-        'health monitoring', 'e-textile', 'smart fabric', 'on-body', 'on body',
-        'mobile health', 'mhealth', 'm-health', 'wearable device',
-        'wearable sensor', 'body-worn', 'worn sensor', 'smart clothing',
-        # Robotics and soft materials
-        'soft robot', 'soft material', 'flexible', 'stretchable', 'elastomer',
-        'actuator', 'gripper', 'manipulator', 'biomimetic',
-        # Medical/implantable
-        'implant', 'lung', 'medical', 'biomedical', 'patient',
-        'therapy', 'prosthe', 'orthoti', 'clinical'
-    ]
-}
-
-AI_KEYWORDS = {
-    'german': [
-        'künstliche intelligenz', 'ki', 'maschinelles lernen', 'machine learning',
-        'deep learning', 'neuronale netze', 'neuronales netz', 'bilderkennung',
-        'spracherkennung', 'nlp', 'computer vision', 'mustererkennung',
-        'bildverarbeitung', 'datenanalyse', 'vorhersage', 'klassifikation',
-        'künstliches neuronales', 'convolutional', 'lstm', 'transformer',
-        'reinforcement learning', 'verstärkendes lernen',
-        # Broader computational/algorithmic terms
-        'computational', 'algorith', 'konnektom', 'connectom',
-        'argumentation', 'argumentationslogik', 'reasoning', 'neural',
-        'gehirn', 'brain', 'kognitiv', 'cognitive', 'intelligente',
-        'intelligent', 'automat', 'learning', 'trained', 'model'
-    ],
-    'english': [
-        'artificial intelligence', 'ai', 'machine learning', 'ml',
-        'deep learning', 'neural network', 'pattern recognition',
-        'computer vision', 'natural language processing', 'nlp',
-        'image recognition', 'classification', 'prediction', 'regression',
-        'convolutional', 'lstm', 'transformer', 'reinforcement learning',
-        'supervised learning', 'unsupervised learning', 'data mining',
-        # Broader computational/algorithmic terms
-        'computational', 'algorithm', 'connectome', 'connectomic',
-        'argumentation', 'reasoning', 'neural', 'brain', 'cognitive',
-        'intelligent', 'automated', 'learning', 'trained', 'model'
-    ]
-}
-
-
-def load_all_projects():
-    """Load all project JSON files"""
-    all_projects = []
-    spp_mapping = {}
+# Topics (keywords, field weights, thresholds) live in config/topics/*.json
+PROFILES = load_profiles()
+WEARABLES = next(p for p in PROFILES if p.name == 'wearables')
+AI = next(p for p in PROFILES if p.name == 'ai')
+WEARABLES_KEYWORDS = WEARABLES.config['keywords']
+AI_KEYWORDS = AI.config['keywords']
 
-    if not PROJECTS_DIR.exists():
-        print(f"ERROR: Projects directory not found: {PROJECTS_DIR}")
-        return [], {}
 
-    json_files = list(PROJECTS_DIR.glob("*.json"))
-    print(f"Found {len(json_files)} SPP project files")
+def load_spp_file(json_file):
+    """
+    Load one per-SPP project file.
 
-    for json_file in json_files:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            spp_number = data.get('spp_number', '')
-            spp_title = data.get('spp_title', '')
-            projects = data.get('projects', [])
+    Returns:
+        tuple: (spp_number, spp_title, projects) with each project tagged
+        with its spp_number and spp_title
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
 
-            spp_mapping[spp_number] = spp_title
+    spp_number = data.get('spp_number', '')
+    spp_title = data.get('spp_title', '')
+    projects = data.get('projects', [])
 
-            for project in projects:
-                project['spp_number'] = spp_number
-                project['spp_title'] = spp_title
-                all_projects.append(project)
+    for project in projects:
+        project['spp_number'] = spp_number
+        project['spp_title'] = spp_title
 
-    print(f"Loaded {len(all_projects)} total projects from {len(json_files)} SPP programs")
-    return all_projects, spp_mapping
+    return spp_number, spp_title, projects
 
 
-def calculate_keyword_score(text, keywords_dict, field_weight=1.0):
+def stream_projects(source, spp_mapping):
     """
-    Calculate relevance score based on keyword matching
-
-    Args:
-        text: Text to search in
-        keywords_dict: Dictionary with 'german' and 'english' keyword lists
-        field_weight: Multiplier for this field (title gets higher weight)
-
-    Returns:
-        tuple: (score, matched_keywords_set)
+    Yield project records one at a time from source (see project_stream),
+    recording each SPP's title in spp_mapping as it is reached.
     """
-    if not text:
-        return 0.0, set()
-
-    text_lower = text.lower()
-    matches = 0
-    matched_keywords = set()
+    for spp_number, spp_title, projects in iter_spp_groups(source):
+        spp_mapping[spp_number] = spp_title
+        yield from projects
+
+
+# Columns of all_projects.csv, in order
+BASE_COLUMNS = [
+    'project_id', 'spp_number', 'spp_title', 'title', 'full_title',
+    'principal_investigator', 'institution', 'funding_period', 'abstract',
+    'keywords', 'dfg_classification', 'url',
+]
+OUTPUT_COLUMNS = (
+    BASE_COLUMNS
+    + score_columns(PROFILES)
+    + keyword_columns(PROFILES)
+)
+
+_scorer = None
+_scorer_pid = None
+
+
+def get_scorer(cache=True):
+    """The process-wide TopicScorer (recreated in worker processes and when cache changes)"""
+    global _scorer, _scorer_pid
+    if _scorer is None or _scorer_pid != os.getpid() or (_scorer.cache is not None) != cache:
+        _scorer = TopicScorer(PROFILES, cache=cache)
+        _scorer_pid = os.getpid()
+    return _scorer
+
+
+def score_projects_frame(projects, cache=True):
+    """Score a list of projects and return their all_projects.csv rows as a DataFrame"""
+    projects = list(projects)
+
+    def column(key):
+        return [project.get(key, '') for project in projects]
+
+    keywords = [project.get('keywords', []) for project in projects]
+    fields = {
+        'title': [p.get('title', '') + ' ' + p.get('full_title', '') for p in projects],
+        'abstract': column('abstract'),
+        'keywords': [' '.join(kw) for kw in keywords],
+        'dfg_classification': column('dfg_classification'),
+    }
+    keys = [f"{p.get('spp_number', '')}/{p.get('project_id', '')}" for p in projects]
+    results = get_scorer(cache).score(fields, keys)
+
+    # Python's round() (not numpy's) keeps the CSV values of the per-row scorer
+    def rounded(values):
+        return [round(float(v), 2) for v in values]
+
+    data = {
+        'project_id': column('project_id'),
+        'spp_number': column('spp_number'),
+        'spp_title': column('spp_title'),
+        'title': column('title'),
+        'full_title': column('full_title'),
+        'principal_investigator': column('principal_investigator'),
+        'institution': column('institution'),
+        'funding_period': column('funding_period'),
+        'abstract': column('abstract'),
+        'keywords': [', '.join(kw) for kw in keywords],
+        'dfg_classification': column('dfg_classification'),
+        'url': column('url'),
+    }
+    combined = None
+    for profile in PROFILES:
+        scores, matched = results[profile.name]
+        data[profile.score_column] = rounded(scores)
+        data[profile.keywords_column] = matched
+        if profile.combined:
+            combined = scores if combined is None else combined + scores
+    data['combined_score'] = rounded(combined if combined is not None else np.zeros(len(projects)))
+
+    return pd.DataFrame(data, columns=OUTPUT_COLUMNS)
+
+
+# Projects per vectorised scoring batch (and per task sent to a worker process)
+CHUNK_SIZE = 500
+
+
+def score_projects(projects, workers=1, cache=True):
+    """
+    Score projects (any iterable, consumed incrementally) in batches of
+    CHUNK_SIZE, optionally sharded across worker processes. cache=False
+    rescores every project instead of reusing cached topic scores.
 
-    # Combine all keywords
-    all_keywords = keywords_dict.get('german', []) + keywords_dict.get('english', [])
+    At most 2 × workers chunks are in flight, and chunks are yielded in
+    submission order, so the rows come back in exactly the order of the
+    serial run.
 
-    for keyword in all_keywords:
-        keyword_lower = keyword.lower()
-        # Count occurrences
-        count = len(re.findall(r'\b' + re.escape(keyword_lower) + r'\b', text_lower))
-        if count > 0:
-            matches += count
-            matched_keywords.add(keyword)
+    Yields:
+        one DataFrame with the all_projects.csv columns per chunk
+    """
+    projects = iter(projects)
+    chunks = iter(lambda: list(islice(projects, CHUNK_SIZE)), [])
+    scored = 0
+
+    if workers <= 1:
+        for chunk in chunks:
+            frame = score_projects_frame(chunk, cache)
+            scored += len(frame)
+            print(f"  Analyzed {scored} projects...")
+            yield frame
+        return
 
-    # Score calculation
-    # Base: number of unique keywords matched (max 5 points)
-    # Bonus: total matches (max 5 points, capped at 10 total)
-    unique_score = min(len(matched_keywords) * 2, 5)  # 2 points per unique keyword
-    frequency_score = min(matches * 0.5, 5)  # 0.5 points per match
+    print(f"  Scoring chunks of {CHUNK_SIZE} projects with {workers} workers")
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            pending.append(executor.submit(score_projects_frame, chunk, cache))
+            if len(pending) >= 2 * workers:
+                frame = pending.popleft().result()
+                scored += len(frame)
+                print(f"  Analyzed {scored} projects...")
+                yield frame
+        while pending:
+            frame = pending.popleft().result()
+            scored += len(frame)
+            print(f"  Analyzed {scored} projects...")
+            yield frame
+
+
+def relevant_rows(df):
+    """
+    The wearables, AI and combined (both) rows of a scored frame, unsorted.
+    A project is relevant when its score reaches the profile threshold (1.0
+    by default); higher thresholds (>=3) give only high-confidence matches.
+    """
+    wearables = df['wearables_score'] >= WEARABLES.threshold
+    ai = df['ai_score'] >= AI.threshold
+    return df[wearables], df[ai], df[wearables & ai]
 
-    total_score = (unique_score + frequency_score) * field_weight
 
-    return total_score, matched_keywords
+def spp_counts(df):
+    """Per-SPP project counts of a scored frame, with those above the report thresholds"""
+    wearables_hit = df['wearables_score'] >= WEARABLES.report_threshold
+    ai_hit = df['ai_score'] >= AI.report_threshold
+    return pd.DataFrame({
+        'spp_number': df['spp_number'],
+        'wearables_count': wearables_hit,
+        'ai_count': ai_hit,
+        'total_projects': 1,
+        'combined_count': wearables_hit & ai_hit,
+    }).groupby('spp_number').sum()
 
 
-def analyze_project_relevance(project):
+def save_outputs(frames, spp_mapping, store=None):
     """
-    Analyze a single project for wearables and AI relevance
+    Write all_projects.csv/.parquet, the relevant subsets and the report
+    from scored frames (in corpus order), one frame at a time. Only the
+    relevant rows and the per-SPP counts are kept in memory; scores are
+    also saved to store if given.
 
     Returns:
-        wearables_score, ai_score, matched_wearables_keywords, matched_ai_keywords
+        int: number of projects written (nothing is written for 0)
     """
-    # Collect text fields
-    title = project.get('title', '') + ' ' + project.get('full_title', '')
-    abstract = project.get('abstract', '')
-    keywords = ' '.join(project.get('keywords', []))
-    dfg_class = project.get('dfg_classification', '')
-
-    # Calculate scores for different fields
-    # Title gets highest weight (3x)
-    wearables_title_score, wearables_title_kw = calculate_keyword_score(title, WEARABLES_KEYWORDS, field_weight=3.0)
-    wearables_abstract_score, wearables_abstract_kw = calculate_keyword_score(abstract, WEARABLES_KEYWORDS, field_weight=1.5)
-    wearables_keywords_score, wearables_keywords_kw = calculate_keyword_score(keywords, WEARABLES_KEYWORDS, field_weight=2.0)
-    wearables_class_score, wearables_class_kw = calculate_keyword_score(dfg_class, WEARABLES_KEYWORDS, field_weight=1.0)
-
-    ai_title_score, ai_title_kw = calculate_keyword_score(title, AI_KEYWORDS, field_weight=3.0)
-    ai_abstract_score, ai_abstract_kw = calculate_keyword_score(abstract, AI_KEYWORDS, field_weight=1.5)
-    ai_keywords_score, ai_keywords_kw = calculate_keyword_score(keywords, AI_KEYWORDS, field_weight=2.0)
-    ai_class_score, ai_class_kw = calculate_keyword_score(dfg_class, AI_KEYWORDS, field_weight=1.0)
-
-    # Total scores (normalized to 0-10 scale)
-    wearables_score = min(
-        (wearables_title_score + wearables_abstract_score +
-         wearables_keywords_score + wearables_class_score) / 3,
-        10.0
-    )
-
-    ai_score = min(
-        (ai_title_score + ai_abstract_score +
-         ai_keywords_score + ai_class_score) / 3,
-        10.0
-    )
-
-    # Combine matched keywords
-    matched_wearables = wearables_title_kw | wearables_abstract_kw | wearables_keywords_kw | wearables_class_kw
-    matched_ai = ai_title_kw | ai_abstract_kw | ai_keywords_kw | ai_class_kw
-
-    return wearables_score, ai_score, matched_wearables, matched_ai
-
-
-def create_dataframes(projects):
-    """Convert projects to pandas DataFrames with relevance scores"""
-
-    print("\nAnalyzing project relevance...")
-
-    analyzed_projects = []
-    for i, project in enumerate(projects, 1):
-        if i % 100 == 0:
-            print(f"  Analyzed {i}/{len(projects)} projects...")
-
-        wearables_score, ai_score, matched_wearables, matched_ai = analyze_project_relevance(project)
-
-        analyzed_projects.append({
-            'project_id': project.get('project_id', ''),
-            'spp_number': project.get('spp_number', ''),
-            'spp_title': project.get('spp_title', ''),
-            'title': project.get('title', ''),
-            'full_title': project.get('full_title', ''),
-            'principal_investigator': project.get('principal_investigator', ''),
-            'institution': project.get('institution', ''),
-            'funding_period': project.get('funding_period', ''),
-            'abstract': project.get('abstract', ''),
-            'keywords': ', '.join(project.get('keywords', [])),
-            'dfg_classification': project.get('dfg_classification', ''),
-            'url': project.get('url', ''),
-            'wearables_score': round(wearables_score, 2),
-            'ai_score': round(ai_score, 2),
-            'combined_score': round(wearables_score + ai_score, 2),
-            'matched_wearables_keywords': ', '.join(sorted(matched_wearables)),
-            'matched_ai_keywords': ', '.join(sorted(matched_ai))
-        })
-
-    print(f"  Analyzed all {len(projects)} projects ✓")
-
-    # Create DataFrames
-    all_df = pd.DataFrame(analyzed_projects)
-
-    # Filter relevant projects (score >= 1.0)
-    # Lower threshold captures broader relevance, higher threshold (>=3) gives only high-confidence matches
-    wearables_df = all_df[all_df['wearables_score'] >= 1.0].copy()
+    all_csv = PROCESSED_DIR / 'all_projects.csv'
+    parquet = None
+    total = 0
+    subsets = ([], [], [])
+    counts = []
+
+    for df in frames:
+        if df.empty:
+            continue
+        if parquet is None:
+            PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+            print("\nSaving CSV files...")
+            # Typed columnar copy of the full corpus for the Python analysis tools
+            parquet = ParquetExport()
+        df.to_csv(all_csv, mode='w' if total == 0 else 'a', header=total == 0, index=False, encoding='utf-8')
+        parquet.write(df)
+        if store is not None:
+            store.save_scores(df.to_dict('records'), PROFILES)
+        for subset, rows in zip(subsets, relevant_rows(df)):
+            subset.append(rows)
+        counts.append(spp_counts(df))
+        total += len(df)
+
+    if parquet is None:
+        return 0
+    print(f"  Saved all_projects.csv ({total} rows)")
+    parquet_file = parquet.close()
+    if parquet_file:
+        print(f"  Saved {parquet_file.name} ({total} rows)")
+
+    wearables_df, ai_df, combined_df = (pd.concat(subset) for subset in subsets)
     wearables_df = wearables_df.sort_values('wearables_score', ascending=False)
-
-    ai_df = all_df[all_df['ai_score'] >= 1.0].copy()
     ai_df = ai_df.sort_values('ai_score', ascending=False)
-
-    # Combined (both wearables AND AI)
-    combined_df = all_df[(all_df['wearables_score'] >= 1.0) & (all_df['ai_score'] >= 1.0)].copy()
     combined_df = combined_df.sort_values('combined_score', ascending=False)
+    for name, df in (('wearables_relevant.csv', wearables_df), ('ai_relevant.csv', ai_df),
+                     ('wearables_ai_combined.csv', combined_df)):
+        df.to_csv(PROCESSED_DIR / name, index=False, encoding='utf-8')
+        print(f"  Saved {name} ({len(df)} rows)")
 
-    return all_df, wearables_df, ai_df, combined_df
+    spp_stats = pd.concat(counts).groupby(level=0).sum()
+    generate_report(total, wearables_df, ai_df, combined_df, spp_stats, spp_mapping)
+    return total
 
 
-def save_csvs(all_df, wearables_df, ai_df, combined_df):
-    """Save DataFrames to CSV files"""
-
-    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-
-    print("\nSaving CSV files...")
-
-    all_df.to_csv(PROCESSED_DIR / 'all_projects.csv', index=False, encoding='utf-8')
-    print(f"  Saved all_projects.csv ({len(all_df)} rows)")
-
-    wearables_df.to_csv(PROCESSED_DIR / 'wearables_relevant.csv', index=False, encoding='utf-8')
-    print(f"  Saved wearables_relevant.csv ({len(wearables_df)} rows)")
-
-    ai_df.to_csv(PROCESSED_DIR / 'ai_relevant.csv', index=False, encoding='utf-8')
-    print(f"  Saved ai_relevant.csv ({len(ai_df)} rows)")
-
-    combined_df.to_csv(PROCESSED_DIR / 'wearables_ai_combined.csv', index=False, encoding='utf-8')
-    print(f"  Saved wearables_ai_combined.csv ({len(combined_df)} rows)")
-
-
-def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
-    """Generate markdown summary report"""
+def generate_report(total, wearables_df, ai_df, combined_df, spp_stats, spp_mapping):
+    """Generate markdown summary report (spp_stats: the summed spp_counts of the corpus)"""
 
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -278,10 +278,10 @@ def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
         # Overview Statistics
         f.write("## Overview Statistics\n\n")
         f.write(f"- **Total SPP Programs**: {len(spp_mapping)}\n")
-        f.write(f"- **Total Projects**: {len(all_df)}\n")
-        f.write(f"- **Wearables-Related Projects**: {len(wearables_df)} ({len(wearables_df)/len(all_df)*100:.1f}%)\n")
-        f.write(f"- **AI-Related Projects**: {len(ai_df)} ({len(ai_df)/len(all_df)*100:.1f}%)\n")
-        f.write(f"- **Combined (Wearables + AI)**: {len(combined_df)} ({len(combined_df)/len(all_df)*100:.1f}%)\n\n")
+        f.write(f"- **Total Projects**: {total}\n")
+        f.write(f"- **Wearables-Related Projects**: {len(wearables_df)} ({len(wearables_df)/total*100:.1f}%)\n")
+        f.write(f"- **AI-Related Projects**: {len(ai_df)} ({len(ai_df)/total*100:.1f}%)\n")
+        f.write(f"- **Combined (Wearables + AI)**: {len(combined_df)} ({len(combined_df)/total*100:.1f}%)\n\n")
 
         # Top Combined Projects (most relevant)
         f.write("## Top 20 Combined Wearables + AI Projects\n\n")
@@ -291,10 +291,9 @@ def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
             f.write("| Rank | SPP | Project Title | PI | Institution | Wearables Score | AI Score |\n")
             f.write("|------|-----|---------------|----|--------------|-----------------|-----------|\n")
 
-            for idx, row in combined_df.head(20).iterrows():
+            for rank, (_, row) in enumerate(combined_df.head(20).iterrows(), 1):
                 title = row['full_title'] if row['full_title'] else row['title']
                 title = title[:80] + '...' if len(title) > 80 else title
-                rank = list(combined_df.index).index(idx) + 1
                 f.write(f"| {rank} | {row['spp_number']} | {title} | {row['principal_investigator'][:30]} | ")
                 f.write(f"{row['institution'][:40]} | {row['wearables_score']:.1f} | {row['ai_score']:.1f} |\n")
         else:
@@ -309,10 +308,9 @@ def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
             f.write("| Rank | SPP | Project Title | PI | Institution | Score |\n")
             f.write("|------|-----|---------------|----|--------------|---------|\n")
 
-            for idx, row in wearables_df.head(20).iterrows():
+            for rank, (_, row) in enumerate(wearables_df.head(20).iterrows(), 1):
                 title = row['full_title'] if row['full_title'] else row['title']
                 title = title[:80] + '...' if len(title) > 80 else title
-                rank = list(wearables_df.index).index(idx) + 1
                 f.write(f"| {rank} | {row['spp_number']} | {title} | {row['principal_investigator'][:30]} | ")
                 f.write(f"{row['institution'][:40]} | {row['wearables_score']:.1f} |\n")
 
@@ -325,10 +323,9 @@ def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
             f.write("| Rank | SPP | Project Title | PI | Institution | Score |\n")
             f.write("|------|-----|---------------|----|--------------|---------|\n")
 
-            for idx, row in ai_df.head(20).iterrows():
+            for rank, (_, row) in enumerate(ai_df.head(20).iterrows(), 1):
                 title = row['full_title'] if row['full_title'] else row['title']
                 title = title[:80] + '...' if len(title) > 80 else title
-                rank = list(ai_df.index).index(idx) + 1
                 f.write(f"| {rank} | {row['spp_number']} | {title} | {row['principal_investigator'][:30]} | ")
                 f.write(f"{row['institution'][:40]} | {row['ai_score']:.1f} |\n")
 
@@ -338,21 +335,6 @@ def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
         f.write("## Relevance by SPP Program\n\n")
         f.write("SPP programs with the most wearables/AI relevant projects:\n\n")
 
-        # Group by SPP
-        spp_stats = all_df.groupby('spp_number').agg({
-            'wearables_score': lambda x: (x >= 3).sum(),
-            'ai_score': lambda x: (x >= 3).sum(),
-            'project_id': 'count'
-        }).rename(columns={
-            'wearables_score': 'wearables_count',
-            'ai_score': 'ai_count',
-            'project_id': 'total_projects'
-        })
-
-        spp_stats['combined_count'] = all_df.groupby('spp_number').apply(
-            lambda x: ((x['wearables_score'] >= 3) & (x['ai_score'] >= 3)).sum()
-        )
-
         # Sort by combined relevance
         spp_stats = spp_stats.sort_values('combined_count', ascending=False)
 
@@ -370,27 +352,53 @@ def generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping):
     print(f"\nGenerated report: {report_file}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score scraped projects for wearables and AI relevance")
+    parser.add_argument('--input', type=Path, default=None,
+                        help="Per-SPP project directory, a .jsonl export or the .sqlite datastore "
+                             "(default: data/raw/projects)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for scoring (default: 1, no pool)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Rescore every project instead of reusing cached topic scores")
+    return parser.parse_args()
+
+
 def main():
     """Main analysis function"""
+    args = parse_args()
+
     print("=" * 80)
     print("DFG Projects Relevance Analyzer")
     print("=" * 80)
 
-    # Load all projects
-    projects, spp_mapping = load_all_projects()
-
-    if not projects:
-        print("ERROR: No projects found. Please run scraping scripts first.")
+    source = args.input or PROJECTS_DIR
+    if not source.exists():
+        print(f"ERROR: Projects directory not found: {source}")
         return
 
-    # Analyze and create DataFrames
-    all_df, wearables_df, ai_df, combined_df = create_dataframes(projects)
+    # Stream projects through the scorer into the outputs, chunk by chunk
+    print("\nAnalyzing project relevance...")
+    spp_mapping = {}
+    projects = stream_projects(source, spp_mapping)
+    frames = score_projects(projects, workers=args.workers, cache=not args.no_cache)
+
+    if is_datastore(source):
+        from datastore import Datastore
 
-    # Save CSVs
-    save_csvs(all_df, wearables_df, ai_df, combined_df)
+        with Datastore(source) as store:
+            total = save_outputs(frames, spp_mapping, store)
+        if total:
+            print(f"  Saved scores to {source.name}")
+    else:
+        total = save_outputs(frames, spp_mapping)
 
-    # Generate report
-    generate_report(all_df, wearables_df, ai_df, combined_df, spp_mapping)
+    if not total:
+        print("ERROR: No projects found. Please run scraping scripts first.")
+        return
+    print(f"Analyzed {total} total projects from {len(spp_mapping)} SPP programs")
+    if _scorer is not None and _scorer.cache is not None:
+        print(f"  Score cache: {_scorer.cache_hits} cached, {_scorer.cache_misses} scored")
 
     print("\n" + "=" * 80)
     print("✓ Analysis complete!")
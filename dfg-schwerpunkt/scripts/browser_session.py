@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Long-lived Playwright browser session shared by all scrapers.
+
+Launching Chromium costs several seconds, so a run starts one browser and
+context up front and the per-SPP functions borrow pages from it. The page is
+recycled after a fixed number of navigations to keep renderer memory bounded.
+Images, fonts, media and analytics requests are blocked by default
+(block_resources=False loads everything).
+"""
+
+from contextlib import contextmanager
+
+from gepris_fetch import Fetcher, block_resources, navigate
+
+DEFAULT_MAX_NAVIGATIONS = 50
+
+
+class BrowserSession:
+    """One Chromium browser + context; pages are borrowed and recycled"""
+
+    def __init__(self, headless=True, max_navigations=DEFAULT_MAX_NAVIGATIONS, block_resources=True,
+                 **context_options):
+        self.headless = headless
+        self.block_resources = block_resources
+        self.max_navigations = max_navigations
+        self.context_options = context_options
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._navigations = 0
+        self.pages_recycled = 0
+
+    def start(self):
+        """Launch the browser (idempotent)"""
+        if self._browser is not None:
+            return self
+        from playwright.sync_api import sync_playwright
+
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self._context = self._browser.new_context(**self.context_options)
+        if self.block_resources:
+            block_resources(self._context)
+        return self
+
+    def close(self):
+        """Close the page, context, browser and Playwright driver"""
+        for resource in (self._page, self._context, self._browser):
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception:
+                    pass
+        if self._playwright is not None:
+            self._playwright.stop()
+        self._playwright = self._browser = self._context = self._page = None
+        self._navigations = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _count_navigation(self, frame):
+        if self._page is not None and frame == self._page.main_frame:
+            self._navigations += 1
+
+    def _new_page(self):
+        if self._page is not None:
+            self._page.close()
+            self.pages_recycled += 1
+        self._page = self._context.new_page()
+        self._page.on('framenavigated', self._count_navigation)
+        self._navigations = 0
+
+    @contextmanager
+    def page(self):
+        """
+        Borrow the session page.
+
+        A fresh page replaces the current one once it has served
+        max_navigations navigations, or if it was closed or crashed.
+        """
+        self.start()
+        if (self._page is None or self._page.is_closed()
+                or self._navigations >= self.max_navigations):
+            self._new_page()
+        yield self._page
+
+    def fetcher(self, wait_until="domcontentloaded", timeout=30000):
+        """Return a fetcher that borrows a page from this session per request"""
+        return SessionFetcher(self, wait_until=wait_until, timeout=timeout)
+
+
+class SessionFetcher(Fetcher):
+    """Fetcher backed by a shared BrowserSession (the session is owned by the caller)"""
+
+    def __init__(self, session, wait_until="domcontentloaded", timeout=30000):
+        self.session = session
+        self.wait_until = wait_until
+        self.timeout = timeout
+
+    def fetch_result(self, url, headers=None):
+        """Navigate a borrowed page to url and return the rendered HTML (extra headers are not sent)"""
+        with self.session.page() as page:
+            return navigate(page, url, self.wait_until, self.timeout)
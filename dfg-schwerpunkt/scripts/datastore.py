@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+SQLite datastore for SPP programs and projects.
+
+One indexed database (data/spp.sqlite) holds what is otherwise spread over
+spp_programs*.json, the per-SPP project files and all_projects.csv:
+
+  programs         merged program record per SPP (listing + details + analysis)
+  program_records  records of each program file as imported, in file order
+  project_lists    per-SPP scrape metadata (title, URL, project count)
+  projects         project records, in scrape order per SPP
+  investigators    investigator names (and "(Institution)" if given) per project
+  institutions     institutions of each project
+  keywords         project keywords
+  topic_scores     relevance score and matched keywords per project and topic
+                   (one row per topic profile, plus 'combined') from analyze_relevance
+  fetches          URL, status and time of scraped pages
+
+Scrapers write through upsert_program() / replace_program_records() /
+replace_spp_projects(); the analyzers read with spp_groups() (also reachable
+as a project_stream source, e.g. --input data/spp.sqlite) and the lookup
+helpers, which are index seeks.
+
+Build or refresh the store from the existing JSON files:
+    python3 scripts/datastore.py --import
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from topic_profiles import load_profiles
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+RAW_DIR = DATA_DIR / "raw"
+PROJECTS_DIR = RAW_DIR / "projects"
+DB_FILE = DATA_DIR / "spp.sqlite"
+
+# Program files in increasing level of detail; later files win on conflicts
+PROGRAM_FILES = [
+    'spp_programs_all.json',
+    'spp_programs.json',
+    'spp_programs_full.json',
+    'spp_programs_analyzed.json',
+    'spp_programs_detailed.json',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS programs (
+    spp_number TEXT PRIMARY KEY,
+    title TEXT,
+    url TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS program_records (
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    spp_number TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (source, position)
+);
+CREATE TABLE IF NOT EXISTS project_lists (
+    spp_number TEXT PRIMARY KEY,
+    spp_title TEXT,
+    spp_url TEXT,
+    projects_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    spp_number TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    spp_title TEXT,
+    title TEXT,
+    subject_area TEXT,
+    funding_period TEXT,
+    dfg_procedure TEXT,
+    url TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (spp_number, project_id)
+);
+CREATE INDEX IF NOT EXISTS idx_projects_project_id ON projects (project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_order ON projects (spp_number, position);
+CREATE TABLE IF NOT EXISTS investigators (
+    spp_number TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    institution TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_investigators_project ON investigators (spp_number, project_id);
+CREATE INDEX IF NOT EXISTS idx_investigators_institution ON investigators (institution);
+CREATE INDEX IF NOT EXISTS idx_investigators_name ON investigators (name);
+CREATE TABLE IF NOT EXISTS institutions (
+    spp_number TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    institution TEXT NOT NULL,
+    PRIMARY KEY (spp_number, project_id, institution)
+);
+CREATE INDEX IF NOT EXISTS idx_institutions_institution ON institutions (institution);
+CREATE TABLE IF NOT EXISTS keywords (
+    spp_number TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    keyword TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_keywords_project ON keywords (spp_number, project_id);
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords (keyword);
+-- Scores used to have one column per topic; they are derived data and are
+-- rewritten by analyze_relevance --input data/spp.sqlite
+DROP TABLE IF EXISTS scores;
+CREATE TABLE IF NOT EXISTS topic_scores (
+    spp_number TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    score REAL NOT NULL,
+    matched_keywords TEXT,
+    scored_at REAL NOT NULL,
+    PRIMARY KEY (spp_number, project_id, topic)
+);
+CREATE INDEX IF NOT EXISTS idx_topic_scores_score ON topic_scores (topic, score);
+CREATE TABLE IF NOT EXISTS fetches (
+    url TEXT PRIMARY KEY,
+    kind TEXT,
+    status INTEGER,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def parse_investigators(investigators):
+    """
+    Split a GEPRIS investigators string ("Prof. A  Meyer;Dr. B  Jones, Ph.D.")
+    into (name, institution) pairs. Entries are separated by ';' only, since
+    names can contain commas; institution is None unless an entry carries a
+    "(Institution)" part (markers such as "(†)" stay in the name).
+    """
+    entries = []
+    for part in (investigators or '').split(';'):
+        institution = None
+        if '(' in part and ')' in part:
+            start, end = part.index('('), part.index(')')
+            inner = ' '.join(part[start + 1:end].split())
+            if sum(char.isalpha() for char in inner) > 2:
+                institution = inner
+                part = part[:start] + part[end + 1:]
+        name = ' '.join(part.split())
+        if name:
+            entries.append((name, institution))
+    return entries
+
+
+def project_institutions(project, investigators=()):
+    """
+    Institutions of a project: the extractor's `institutions` list, the
+    stealth scraper's `institution` string ("A; B") and any institutions
+    given with the investigators, without duplicates.
+    """
+    institutions = list(project.get('institutions') or [])
+    institutions += (project.get('institution') or '').split(';')
+    institutions += [institution for _, institution in investigators if institution]
+    unique = []
+    for institution in institutions:
+        institution = ' '.join(institution.split())
+        if institution and institution not in unique:
+            unique.append(institution)
+    return unique
+
+
+def project_keywords(project):
+    """Keyword list of a project (a list, or a "a, b; c" string)"""
+    keywords = project.get('keywords') or []
+    if isinstance(keywords, str):
+        keywords = keywords.replace(';', ',').split(',')
+    return list(dict.fromkeys(keyword.strip() for keyword in keywords if keyword.strip()))
+
+
+class Datastore:
+    """Canonical SQLite store for programs, projects and derived data"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Write API
+
+    def upsert_program(self, record):
+        """Merge a program record into the stored one (new fields win)"""
+        spp_number = record['spp_number']
+        row = self._db.execute("SELECT data FROM programs WHERE spp_number = ?", (spp_number,)).fetchone()
+        data = {**json.loads(row[0]), **record} if row else dict(record)
+        self._db.execute(
+            "INSERT OR REPLACE INTO programs VALUES (?, ?, ?, ?, ?)",
+            (spp_number, data.get('title', ''), data.get('url', ''),
+             json.dumps(data, ensure_ascii=False), time.time()),
+        )
+        self._db.commit()
+
+    def replace_program_records(self, source, records):
+        """Replace the stored records of one program file (e.g. 'spp_programs_detailed.json')"""
+        with self._db:
+            self._db.execute("DELETE FROM program_records WHERE source = ?", (source,))
+            self._db.executemany(
+                "INSERT INTO program_records VALUES (?, ?, ?, ?)",
+                [(source, position, record.get('spp_number'), json.dumps(record, ensure_ascii=False))
+                 for position, record in enumerate(records)],
+            )
+
+    def replace_spp_projects(self, spp_number, spp_title, projects, spp_url=''):
+        """Replace all projects (and their investigators/institutions/keywords) of one SPP"""
+        db = self._db
+        with db:
+            for table in ('projects', 'investigators', 'institutions', 'keywords'):
+                db.execute(f"DELETE FROM {table} WHERE spp_number = ?", (spp_number,))
+            db.execute(
+                "INSERT OR REPLACE INTO project_lists VALUES (?, ?, ?, ?, ?)",
+                (spp_number, spp_title, spp_url, len(projects), time.time()),
+            )
+            for position, project in enumerate(projects):
+                project_id = str(project.get('project_id', ''))
+                record = {k: v for k, v in project.items() if k not in ('spp_number', 'spp_title')}
+                db.execute(
+                    "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (spp_number, project_id, position, spp_title, project.get('title', ''),
+                     project.get('subject_area', ''), project.get('funding_period', ''),
+                     project.get('dfg_procedure', ''), project.get('url', ''),
+                     json.dumps(record, ensure_ascii=False)),
+                )
+                investigators = parse_investigators(project.get('investigators', ''))
+                institutions = project_institutions(project, investigators)
+                if len(institutions) == 1:
+                    # All applicants of a single-institution project are there
+                    investigators = [(name, institution or institutions[0]) for name, institution in investigators]
+                db.executemany(
+                    "INSERT INTO investigators VALUES (?, ?, ?, ?)",
+                    [(spp_number, project_id, name, institution) for name, institution in investigators],
+                )
+                db.executemany(
+                    "INSERT OR IGNORE INTO institutions VALUES (?, ?, ?)",
+                    [(spp_number, project_id, institution)
+                     for institution in institutions],
+                )
+                db.executemany(
+                    "INSERT INTO keywords VALUES (?, ?, ?)",
+                    [(spp_number, project_id, keyword) for keyword in project_keywords(project)],
+                )
+
+    def save_scores(self, rows, profiles=None):
+        """
+        Store relevance rows (all_projects.csv records from analyze_relevance):
+        the score and matched keywords of every topic profile, and the
+        combined score under topic 'combined'.
+        """
+        profiles = load_profiles() if profiles is None else profiles
+        now = time.time()
+        entries = []
+        for row in rows:
+            key = (row['spp_number'], str(row['project_id']))
+            for profile in profiles:
+                entries.append(key + (profile.name, row[profile.score_column],
+                                      row.get(profile.keywords_column), now))
+            entries.append(key + ('combined', row['combined_score'], None, now))
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO topic_scores VALUES (?, ?, ?, ?, ?, ?)", entries)
+
+    def record_fetch(self, url, status=200, kind=None):
+        """Record that url was fetched"""
+        self.record_fetches([(url, kind, status)])
+
+    def record_fetches(self, entries):
+        """Record (url, kind, status) fetches in one transaction"""
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO fetches VALUES (?, ?, ?, ?)",
+                [(url, kind, status, now) for url, kind, status in entries],
+            )
+
+    def import_files(self, raw_dir=RAW_DIR):
+        """Load the program files and per-SPP project files into the store"""
+        raw_dir = Path(raw_dir)
+        programs = 0
+        for name in PROGRAM_FILES:
+            path = raw_dir / name
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            for record in records:
+                if record.get('spp_number'):
+                    self.upsert_program(record)
+            self.replace_program_records(name, records)
+            programs += len(records)
+            print(f"  ✓ {name}: {len(records)} program records")
+
+        project_files = sorted((raw_dir / "projects").glob("*.json"))
+        projects = 0
+        for path in project_files:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.replace_spp_projects(data.get('spp_number', ''), data.get('spp_title', ''),
+                                      data.get('projects', []), data.get('spp_url', ''))
+            projects += len(data.get('projects', []))
+        print(f"  ✓ {len(project_files)} project files: {projects} projects")
+        return programs, projects
+
+    # Query API
+
+    def programs(self, source=None):
+        """
+        All merged program records, ordered by SPP number, or with source
+        the records of that program file as imported, in file order
+        """
+        if source is None:
+            rows = self._db.execute("SELECT data FROM programs ORDER BY spp_number")
+        else:
+            rows = self._db.execute(
+                "SELECT data FROM program_records WHERE source = ? ORDER BY position", (source,))
+        return [json.loads(data) for data, in rows]
+
+    def program(self, spp_number):
+        row = self._db.execute("SELECT data FROM programs WHERE spp_number = ?", (spp_number,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _project_rows(self, sql, params=()):
+        for spp_number, spp_title, data in self._db.execute(sql, params):
+            project = json.loads(data)
+            project['spp_number'] = spp_number
+            project['spp_title'] = spp_title
+            yield project
+
+    def projects(self, spp_number=None):
+        """Project records (tagged with spp_number/spp_title), optionally of one SPP"""
+        if spp_number is None:
+            return self._project_rows(
+                "SELECT spp_number, spp_title, data FROM projects ORDER BY spp_number, position")
+        return self._project_rows(
+            "SELECT spp_number, spp_title, data FROM projects WHERE spp_number = ? ORDER BY position",
+            (spp_number,))
+
+    def project(self, project_id):
+        """First stored record for a GEPRIS project id, or None"""
+        return next(self._project_rows(
+            "SELECT spp_number, spp_title, data FROM projects WHERE project_id = ? LIMIT 1",
+            (str(project_id),)), None)
+
+    def projects_by_institution(self, institution):
+        """Projects of the given institution"""
+        return list(self._project_rows(
+            "SELECT p.spp_number, p.spp_title, p.data FROM institutions i "
+            "JOIN projects p ON p.spp_number = i.spp_number AND p.project_id = i.project_id "
+            "WHERE i.institution = ? ORDER BY p.spp_number, p.position",
+            (institution,)))
+
+    def projects_with_keyword(self, keyword):
+        return list(self._project_rows(
+            "SELECT DISTINCT p.spp_number, p.spp_title, p.data FROM keywords k "
+            "JOIN projects p ON p.spp_number = k.spp_number AND p.project_id = k.project_id "
+            "WHERE k.keyword = ?",
+            (keyword,)))
+
+    def spp_groups(self):
+        """
+        Yield (spp_number, spp_title, projects_iterator) per scraped SPP, in the
+        same shape and order as project_stream.iter_spp_groups().
+        """
+        lists = self._db.execute(
+            "SELECT spp_number, spp_title FROM project_lists ORDER BY spp_number").fetchall()
+        for spp_number, spp_title in lists:
+            yield spp_number, spp_title, self.projects(spp_number)
+
+    def project_counts(self):
+        """{spp_number: number of scraped projects}"""
+        return dict(self._db.execute("SELECT spp_number, projects_count FROM project_lists"))
+
+    def institution_counts(self, spp_number):
+        """[(institution, project count)] for one SPP, most frequent first"""
+        return self._db.execute(
+            "SELECT institution, COUNT(*) AS n FROM institutions "
+            "WHERE spp_number = ? GROUP BY institution ORDER BY n DESC, institution",
+            (spp_number,)).fetchall()
+
+    def scores(self, spp_number=None):
+        """
+        Stored relevance scores as one dict per project, with the columns of
+        all_projects.csv: {topic}_score and matched_{topic}_keywords per
+        topic, and combined_score
+        """
+        sql = "SELECT spp_number, project_id, topic, score, matched_keywords FROM topic_scores"
+        params = ()
+        if spp_number is not None:
+            sql += " WHERE spp_number = ?"
+            params = (spp_number,)
+        projects = {}
+        rows = self._db.execute(sql + " ORDER BY spp_number, project_id", params)
+        for spp, project_id, topic, score, matched in rows:
+            row = projects.setdefault((spp, project_id), {'spp_number': spp, 'project_id': project_id})
+            row[f"{topic}_score"] = score
+            if topic != 'combined':
+                row[f"matched_{topic}_keywords"] = matched
+        return list(projects.values())
+
+    def stats(self):
+        tables = ['programs', 'project_lists', 'projects', 'investigators', 'institutions', 'keywords',
+                  'topic_scores', 'fetches']
+        return {table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the SQLite datastore")
+    parser.add_argument('--import', dest='import_files', action='store_true',
+                        help="Import data/raw program and project JSON files")
+    parser.add_argument('--db', type=Path, default=DB_FILE, help=f"Database file (default: {DB_FILE})")
+    args = parser.parse_args()
+
+    with Datastore(args.db) as store:
+        if args.import_files:
+            print(f"Importing JSON files into {args.db}")
+            store.import_files()
+        for table, count in store.stats().items():
+            print(f"  {table:15s} {count}")
+
+
+if __name__ == "__main__":
+    main()
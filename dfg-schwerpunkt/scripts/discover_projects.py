@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Project discovery via GEPRIS search.
+
+Instead of loading every SPP page and collecting the project links on it,
+GEPRIS is searched for the SPP numbers, several SPPs per query and with the
+largest result pages GEPRIS serves. Every project found is assigned to the
+SPP it is a subproject of (its "Teilprojekt zu" link to the SPP page, else
+an "SPP nnnn" mention in the entry) and queued as a project job in the job
+queue, deduplicated per SPP. SPPs that are already done or have project
+jobs are not searched.
+
+The project scrapers run discovery only with --discover. They skip the SPP
+page of every SPP that already has project jobs, so a project the search
+misses is not scraped; SPPs the search finds nothing for are still read
+from their SPP page.
+
+Result pages are 'search' jobs in the queue, so an interrupted discovery
+resumes without fetching them again. Pages older than a day are dropped at
+the start of a run and searched again; they are always fetched from GEPRIS,
+never from the response cache, which would keep them for a week or longer.
+
+    python3 scripts/discover_projects.py                 # all SPPs without queued projects
+    python3 scripts/discover_projects.py --batch-size 1  # one query per SPP
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from urllib.parse import quote_plus
+
+sys.path.insert(0, str(Path(__file__).parent))
+from gepris_extract import BASE_URL, PROJECT_ID_RE, extract_search_results
+from gepris_fetch import add_fetch_arguments, open_fetcher_from_args
+from job_queue import JobQueue
+from response_cache import bypass_cache
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data" / "raw"
+SPP_FILE = DATA_DIR / "spp_programs.json"
+
+SEARCH_URL = (
+    f"{BASE_URL}/gepris/OCTOPUS?"
+    "task=doSearchSimple&context=projekt"
+    "&keywords_criterion={terms}"
+    "&teilprojekte=true"
+    "&nurProjekteMitAB=false"
+    "&hitsPerPage={hits}"
+    "&index={index}"
+)
+
+# SPP numbers per search query ("SPP 1999 OR SPP 2041 OR ...")
+BATCH_SIZE = 10
+# Results per page; GEPRIS may serve fewer, pages are advanced by what it returns
+HITS_PER_PAGE = 1000
+# Safety stop for a single query
+MAX_PAGES = 50
+# Search result pages are reused for this long (seconds)
+SEARCH_MAX_AGE = 24 * 3600
+
+
+def search(fetcher, queue, terms, hits_per_page=HITS_PER_PAGE, max_pages=MAX_PAGES):
+    """
+    All result entries of one search, page by page until a page adds no new
+    projects or max_pages is reached. Pages already done in the queue are
+    not fetched again; a failed page raises.
+    """
+    results = {}
+    index = 0
+    for _ in range(max_pages):
+        url = SEARCH_URL.format(terms=quote_plus(terms), hits=hits_per_page, index=index)
+        page = queue.result('search', terms, url)
+        if page is None:
+            job = queue.begin('search', terms, url)
+            try:
+                page = {'results': extract_search_results(fetcher.fetch(url))}
+            except Exception as e:
+                queue.fail(job, e)
+                raise
+            queue.complete(job, page)
+
+        new = {result['id']: result for result in page['results'] if result['id'] not in results}
+        print(f"  index={index}: {len(page['results'])} results ({len(new)} new)")
+        if not new:
+            break
+        results.update(new)
+        index += len(page['results'])
+    else:
+        print(f"  ⚠ Stopped after {max_pages} pages, results may be incomplete")
+    return list(results.values())
+
+
+def spp_ids(spp_programs):
+    """{GEPRIS project ID of the SPP page: SPP number}"""
+    ids = {}
+    for spp in spp_programs:
+        match = PROJECT_ID_RE.search(spp.get('url', ''))
+        if match and spp.get('spp_number'):
+            ids[match.group(1)] = spp['spp_number']
+    return ids
+
+
+def assign(result, ids, spp_numbers):
+    """SPP numbers a search result belongs to: its parent SPP pages, else its SPP mentions"""
+    parents = [ids[parent] for parent in result['parent_ids'] if parent in ids]
+    return parents or [number for number in result['spp_numbers'] if number in spp_numbers]
+
+
+def discover_projects(fetcher, queue, spp_programs, batch_size=BATCH_SIZE, hits_per_page=HITS_PER_PAGE):
+    """
+    Search the projects of every SPP that is not done and has no project
+    jobs yet and queue them. Projects found for an SPP outside the current
+    query count for that SPP too. Returns {spp_number: number of projects
+    queued}.
+    """
+    # Reuse is governed by SEARCH_MAX_AGE alone, not the response cache's TTL
+    fetcher = bypass_cache(fetcher)
+    expired = queue.reset('search', older_than=SEARCH_MAX_AGE)
+    if expired:
+        print(f"Dropped {expired} search result page(s) older than a day")
+
+    ids = spp_ids(spp_programs)
+    spp_numbers = {spp.get('spp_number') for spp in spp_programs}
+    todo = [spp['spp_number'] for spp in spp_programs
+            if spp.get('spp_number')
+            and queue.state('spp', spp['spp_number'], spp.get('url', '')) != 'done'
+            and not queue.counts('project', spp['spp_number'])]
+    if not todo:
+        print("✓ All SPPs are done or already have queued projects")
+        return {}
+
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    print(f"Discovering projects of {len(todo)} SPPs in {len(batches)} searches...")
+
+    found = {}  # spp_number → {project ID: project link}
+    for i, batch in enumerate(batches, 1):
+        terms = ' OR '.join(batch)
+        print(f"\n[{i}/{len(batches)}] Searching {terms}")
+        try:
+            results = search(fetcher, queue, terms, hits_per_page)
+        except Exception as e:
+            print(f"  ✗ Search failed, these SPPs fall back to their SPP pages: {e}")
+            continue
+
+        for result in results:
+            if result['id'] in ids:
+                continue  # an SPP page itself
+            for spp_number in assign(result, ids, spp_numbers):
+                found.setdefault(spp_number, {}).setdefault(
+                    result['id'], {'id': result['id'], 'title': result['title'], 'url': result['url']})
+
+    queued = {}
+    for spp_number in todo:
+        links = list(found.get(spp_number, {}).values())
+        if links:
+            queued[spp_number] = queue.add_many('project', spp_number, [(link['url'], link) for link in links])
+
+    print(f"\n✓ Queued {sum(queued.values())} projects for {len(queued)}/{len(todo)} SPPs")
+    missing = [spp_number for spp_number in todo if spp_number not in queued]
+    if missing:
+        print(f"⚠ Nothing found for {len(missing)} SPPs (their SPP pages will be read): "
+              f"{', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}")
+    return queued
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue SPP projects found via GEPRIS search")
+    add_fetch_arguments(parser)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"SPP numbers per search query (default: {BATCH_SIZE})")
+    parser.add_argument('--hits-per-page', type=int, default=HITS_PER_PAGE,
+                        help=f"Results per search page (default: {HITS_PER_PAGE})")
+    args = parser.parse_args()
+
+    if not SPP_FILE.exists():
+        print(f"✗ SPP programs file not found: {SPP_FILE}")
+        print("  Please run scrape_spp_programs.py first")
+        return
+
+    with open(SPP_FILE, 'r', encoding='utf-8') as f:
+        spp_programs = json.load(f)
+    print(f"✓ Loaded {len(spp_programs)} SPP programs")
+
+    with open_fetcher_from_args(args) as fetcher, JobQueue() as queue:
+        discover_projects(fetcher, queue, spp_programs, args.batch_size, args.hits_per_page)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,44 @@ Generate comprehensive SPP summaries in Markdown and CSV formats for proposal wr
 Creates individual SPP summary files and a master CSV/guide.
 """
 
+import argparse
 import json
+import sys
+from collections import Counter
 import pandas as pd
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from similar_links import load_similar_projects
+
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
 SUMMARIES_DIR = DATA_DIR / "spp_summaries"
 REPORTS_DIR = BASE_DIR / "reports"
+DETAILED_FILE = RAW_DIR / "spp_programs_detailed.json"
+
+# Rows in the "Related Projects in Other SPPs" table of each summary
+RELATED_PROJECTS_LIMIT = 10
 
 # Create directories
 SUMMARIES_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
+def load_spp_data_from_store(store):
+    """Load the same program records as load_spp_data, with project counts, from the SQLite datastore"""
+    spps = store.programs(source=DETAILED_FILE.name)
+    project_counts = store.project_counts()
+    for spp in spps:
+        spp['num_projects'] = project_counts.get(spp.get('spp_number', ''), 0)
+    return spps
+
 def load_spp_data():
     """Load all SPP data"""
     # Load detailed SPP program data
-    with open(RAW_DIR / "spp_programs_detailed.json", 'r', encoding='utf-8') as f:
+    with open(DETAILED_FILE, 'r', encoding='utf-8') as f:
         detailed_spps = json.load(f)
 
     # Load project counts from institutional analysis
@@ -42,8 +60,41 @@ def load_spp_data():
 
     return detailed_spps
 
-def generate_individual_summary(spp):
-    """Generate markdown summary for individual SPP"""
+def related_links(similar):
+    """(score, project, related project) links of one SPP's exported neighbours, best first"""
+    links = [(other['score'], project, other) for project in similar for other in project['similar']]
+    return sorted(links, key=lambda link: -link[0])
+
+def related_projects_section(similar):
+    """Markdown table of the closest projects in other SPPs"""
+    if not similar:
+        return ''
+
+    content = """## Related Projects in Other SPPs
+
+Closest projects in other programs by text similarity - starting points for collaboration:
+
+| Similarity | Project in this SPP | Related project | SPP |
+|------------|---------------------|-----------------|-----|
+"""
+    seen = set()
+    for score, project, other in related_links(similar):
+        if other['project_id'] in seen:
+            continue
+        seen.add(other['project_id'])
+        title = project['title'][:60].replace('|', '\\|')
+        other_title = other['title'][:60].replace('|', '\\|')
+        content += f"| {score:.2f} | {title} | [{other_title}]({other['url']}) | {other['spp_number']} |\n"
+        if len(seen) >= RELATED_PROJECTS_LIMIT:
+            break
+
+    programs = Counter(other['spp_number'] for _, _, other in related_links(similar))
+    content += "\n**Most related programs**: " + ', '.join(
+        f"{spp_num} ({count} links)" for spp_num, count in programs.most_common(5)) + "\n\n"
+    return content
+
+def generate_individual_summary(spp, similar=None):
+    """Generate markdown summary for individual SPP (similar: its similar_projects.json entry)"""
     spp_num = spp.get('spp_number', 'Unknown')
     safe_filename = spp_num.replace(' ', '_').replace('/', '-')
 
@@ -88,7 +139,7 @@ def generate_individual_summary(spp):
 {f"- **Funding End**: {spp.get('funding_end', 'Ongoing')}" if spp.get('funding_end') else ''}
 - **Subject Area**: {spp.get('subject_area', 'N/A')}
 
-## For Proposal Writers
+{related_projects_section(similar)}## For Proposal Writers
 
 ### Key Questions to Address
 1. How does your research align with the program's objectives?
@@ -149,8 +200,30 @@ def generate_master_csv(spps):
 
     return output_file, df
 
-def generate_proposal_guide(spps):
-    """Generate master proposal reference guide"""
+def collaboration_links_section(similar, limit=20):
+    """Markdown table of the SPP pairs with the most similar-project links"""
+    pairs = Counter()
+    for spp_num, projects in similar.items():
+        for project in projects:
+            for other in project['similar']:
+                pairs[tuple(sorted((spp_num, other['spp_number'])))] += 1
+    if not pairs:
+        return ''
+
+    content = """## Cross-SPP Collaboration Links
+
+Program pairs whose projects are most often among each other's nearest neighbours
+(see "Related Projects in Other SPPs" in the individual summaries):
+
+| SPP | SPP | Links |
+|-----|-----|-------|
+"""
+    for (first, second), count in pairs.most_common(limit):
+        content += f"| {first} | {second} | {count} |\n"
+    return content + "\n---\n\n"
+
+def generate_proposal_guide(spps, similar=None):
+    """Generate master proposal reference guide (similar: similar_projects.json contents)"""
 
     # Group by scientific area
     by_area = {}
@@ -194,9 +267,17 @@ def generate_proposal_guide(spps):
             content += f"- **{spp_num}**: {title}\n"
         content += "\n"
 
-    content += """---
+    content += "---\n\n"
+    content += collaboration_links_section(similar or {})
 
-## How to Use This Guide
+    # Point at the related projects only when similar_projects.json exists
+    related_note = " (related projects in other SPPs are\n     listed in each summary)" if similar else ""
+    similar_file = """
+
+- **Similar Projects**: `data/processed/similar_projects.json`
+  Closest projects in other SPPs for every project (`scripts/similar_projects.py`)""" if similar else ""
+
+    content += f"""## How to Use This Guide
 
 ### For Proposal Preparation
 
@@ -212,7 +293,7 @@ def generate_proposal_guide(spps):
 
 3. **Review Existing Projects**:
    - Check what's already funded in your target SPP
-   - Identify collaboration opportunities
+   - Identify collaboration opportunities{related_note}
    - Find gaps in current research
 
 4. **Prepare Your Proposal**:
@@ -242,7 +323,7 @@ Each summary includes:
   Raw structured data with all fields
 
 - **Individual Summaries**: `data/spp_summaries/*.md`
-  One markdown file per SPP program
+  One markdown file per SPP program{similar_file}
 
 ---
 
@@ -299,20 +380,36 @@ For general DFG questions:
 
 def main():
     """Main function to generate all summaries"""
+    parser = argparse.ArgumentParser(description="Generate SPP summaries for proposal writing")
+    parser.add_argument('--store', type=Path, nargs='?', const=True, default=None,
+                        help="Read programs from the SQLite datastore (default path: data/spp.sqlite)")
+    args = parser.parse_args()
+
     print("="*70)
     print("SPP Summary Generator")
     print("="*70)
 
     # Load data
     print("\n1. Loading SPP data...")
-    spps = load_spp_data()
+    if args.store:
+        from datastore import DB_FILE, Datastore
+
+        with Datastore(DB_FILE if args.store is True else args.store) as store:
+            spps = load_spp_data_from_store(store)
+    else:
+        spps = load_spp_data()
     print(f"   ✓ Loaded {len(spps)} SPP programs")
+    similar = load_similar_projects()
+    if similar:
+        print(f"   ✓ Loaded similar projects for {len(similar)} SPPs")
+    else:
+        print("   ⚠ No similar_projects.json - run similar_projects.py --build for collaboration links")
 
     # Generate individual summaries
     print("\n2. Generating individual SPP summaries...")
     for i, spp in enumerate(spps, 1):
         spp_num = spp.get('spp_number', f'SPP_{i}')
-        output_file = generate_individual_summary(spp)
+        output_file = generate_individual_summary(spp, similar.get(spp_num))
         print(f"   [{i}/{len(spps)}] ✓ {spp_num} → {output_file.name}")
 
     print(f"   ✓ All summaries saved to {SUMMARIES_DIR}/")
@@ -325,7 +422,7 @@ def main():
 
     # Generate proposal guide
     print("\n4. Generating proposal reference guide...")
-    guide_file = generate_proposal_guide(spps)
+    guide_file = generate_proposal_guide(spps, similar)
     print(f"   ✓ Saved to {guide_file}")
 
     # Summary
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+GEPRIS page extraction shared by all scrapers.
+
+Pages are parsed once with lxml (libxml2, C) instead of BeautifulSoup's
+pure-Python html.parser. extract_page() then collects everything the
+scrapers use in a single walk over the tree (filtered on tag names in C):
+title, heading, name/value spans, content frames, description blocks and
+links. Text is read only from the matched elements. The result is a
+GeprisPage with:
+
+  - title / heading        <title> (without the GEPRIS prefix) and first <h1>
+  - metadata / fields      <span class="name"> labels and their values
+  - frames / description   <div class="content_frame"> texts
+  - projekttext, paragraphs description blocks of program pages
+  - investigators, institutions   person and institution link texts
+  - project_links(), website(), projects_url()
+
+extract_search_results() reads the entries of a search result page.
+
+Values and frame texts are joined like BeautifulSoup's get_text(strip=True),
+without script/style contents, so records match the earlier extraction.
+
+    from gepris_extract import extract_page, extract_project
+    project = extract_project(html, project_id, url)
+    page = extract_page(html, url)
+
+Benchmark against BeautifulSoup on the pages in the response cache:
+    python3 scripts/gepris_extract.py --benchmark
+"""
+
+import argparse
+import re
+import time
+from urllib.parse import urljoin
+
+from lxml import etree
+
+BASE_URL = "https://gepris.dfg.de"
+GEPRIS_URL = "https://gepris.dfg.de/gepris/projekt/{}"
+TITLE_PREFIX = 'DFG - GEPRIS - '
+
+# Project page labels → project record keys
+PROJECT_FIELDS = {
+    'Antragstellerinnen / Antragsteller': 'investigators',
+    'Fachliche Zuordnung': 'subject_area',
+    'Förderung': 'funding_period',
+    'Projektkennung': 'project_identifier',
+    'DFG-Verfahren': 'dfg_procedure',
+    'Teilprojekt zu': 'parent_program',
+}
+
+# Program page labels → program metadata keys (unknown labels are snake_cased)
+PROGRAM_FIELDS = {
+    'Antragstellende': 'applicants',
+    'Sprecher / Sprecherin': 'spokesperson',
+    'Sprecherin / Sprecher': 'spokesperson',
+    'Koordinatorin / Koordinator': 'coordinator',
+    'Koordinator / Koordinatorin': 'coordinator',
+    'Fachliche Zuordnung': 'subject_area',
+    'Förderung': 'funding_period',
+    'Laufzeit': 'duration',
+    'Projektkennung': 'project_identifier',
+    'Kontakt': 'contact',
+    'E-Mail': 'email',
+    'Telefon': 'phone',
+    'Bewilligungsausschuss': 'approval_committee',
+    'DFG-Verfahren': 'dfg_procedure',
+    'Antragstellende Institution': 'applicant_institution',
+    'Teilprojekt zu': 'subproject_of',
+}
+
+# Plain etree elements: lxml.html's element class lookup costs more than the parse
+PARSER = etree.HTMLParser(encoding='utf-8', remove_comments=True)
+
+
+# Tags extract_page() looks at; the tree walk filters on them in C
+PAGE_TAGS = ('title', 'h1', 'a', 'span', 'div', 'p')
+PROJECT_ID_RE = re.compile(r'/gepris/projekt/(\d+)')
+DETAIL_CLASSES = {'detail_content', 'detail__content', 'detailseite'}
+RESULT_CLASSES = {'result_entry', 'ergebnis_eintrag', 'eintrag'}
+SPP_NUMBER_RE = re.compile(r'\bSPP\s*(\d{3,4})\b')
+GEPRIS_HOSTS = ('gepris.dfg.de', 'dfg.de/gepris')
+
+
+def parse_page(content):
+    """Parse page HTML (str or bytes) into an lxml document, without scripts and styles"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    root = etree.fromstring(content, parser=PARSER)
+    if root is None:
+        root = etree.fromstring(b'<html></html>', parser=PARSER)
+    etree.strip_elements(root, 'script', 'style', with_tail=False)
+    return root
+
+
+def element_text(element):
+    """Text of an element and its descendants, each piece stripped, joined without separator"""
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+def raw_text(element):
+    """Text of an element with its whitespace kept (like DOM textContent), trimmed"""
+    return ''.join(element.itertext()).strip()
+
+
+def classes(element):
+    return (element.get('class') or '').split()
+
+
+def in_detail_area(element):
+    return any(DETAIL_CLASSES.intersection(classes(a)) for a in element.iterancestors())
+
+
+class GeprisPage:
+    """Everything the scrapers read from one GEPRIS page (see extract_page)"""
+
+    def __init__(self, url=None):
+        self.url = url
+        self.title = None
+        self.heading = None
+        self.metadata = []      # (label, value): parent text minus the label, get_text(strip=True) style
+        self.field_texts = {}   # label without ':' → text after the label span, whitespace kept
+        self.frames = []
+        self.projekttext = None
+        self.paragraphs = []    # <p> texts inside the detail content area
+        self.links = []         # (href, text, external candidate for website())
+        self.investigators = []
+        self.institutions = []
+        self._field_links = []  # (label, href) of links next to a label
+
+    @property
+    def fields(self):
+        """metadata as a dict (a repeated label keeps its last value)"""
+        return dict(self.metadata)
+
+    def description(self, index=1, fallback=False):
+        """Text of the index-th content_frame; with fallback the first frame if there is no such frame"""
+        if len(self.frames) > index:
+            return self.frames[index]
+        if fallback and self.frames:
+            return self.frames[0]
+        return None
+
+    def project_links(self, current_spp_id=''):
+        """Project links ({'id', 'title', 'url'}), without the SPP itself and language/display links"""
+        projects = []
+        seen = set()
+        for href, text, _ in self.links:
+            if '/gepris/projekt/' not in href:
+                continue
+            if current_spp_id in href or 'language=' in href or 'displayMode=' in href:
+                continue
+            match = PROJECT_ID_RE.search(href)
+            if match and match.group(1) not in seen:
+                seen.add(match.group(1))
+                projects.append({'id': match.group(1), 'title': text, 'url': GEPRIS_URL.format(match.group(1))})
+        return projects
+
+    def projects_url(self):
+        """First link to a project result list ("ergebnisse"), or ''"""
+        return next((self.absolute(href) for href, _, _ in self.links if 'ergebnisse' in href.lower()), '')
+
+    def website(self):
+        """
+        The program's own website: the link next to a "Webseite"/"Homepage"
+        label, else the first external link in the detail content area.
+        """
+        for label, href in self._field_links:
+            url = self.absolute(href)
+            if ('Webseite' in label or 'Homepage' in label) and not _is_gepris(url):
+                return url
+        for href, _, candidate in self.links:
+            if candidate and not _is_gepris(href) and 'dfg.de/foerderung' not in href:
+                return href
+        return ''
+
+    def absolute(self, href):
+        return urljoin(self.url or BASE_URL, href)
+
+
+def _is_gepris(url):
+    return any(host in url for host in GEPRIS_HOSTS)
+
+
+def _add_unique(items, value):
+    if value and value not in items:
+        items.append(value)
+
+
+def extract_page(content, url=None):
+    """Parse a GEPRIS page once and collect all fields in a single pass (returns a GeprisPage)"""
+    root = parse_page(content)
+    page = GeprisPage(url)
+
+    for element in root.iter(*PAGE_TAGS):
+        tag = element.tag
+        if tag == 'a':
+            href = element.get('href')
+            if href is None:
+                continue
+            text = element_text(element)
+            candidate = href.startswith('http') and ('extern' in classes(element) or in_detail_area(element))
+            page.links.append((href, text, candidate))
+            if '/gepris/person/' in href:
+                _add_unique(page.investigators, text)
+            elif '/gepris/institution/' in href:
+                _add_unique(page.institutions, text)
+        elif tag == 'span' and 'name' in classes(element):
+            label = element_text(element)
+            parent = element.getparent()
+            if parent is None:
+                continue
+            page.metadata.append((label, element_text(parent).replace(label, '', 1).strip()))
+            after = (element.tail or '') + ''.join(''.join(sibling.itertext()) + (sibling.tail or '')
+                                                   for sibling in element.itersiblings())
+            field = label[:-1] if label.endswith(':') else label
+            if after.strip():
+                page.field_texts[field] = after.strip()
+            if 'Webseite' in field or 'Homepage' in field:
+                page._field_links.extend((field, link.get('href')) for link in parent.iter('a')
+                                         if link.get('href'))
+        elif tag == 'div' and 'content_frame' in classes(element):
+            page.frames.append(element_text(element))
+        elif tag == 'title':
+            if page.title is None:
+                page.title = ''.join(element.itertext()).replace(TITLE_PREFIX, '').strip()
+        elif tag == 'h1':
+            if page.heading is None:
+                page.heading = element_text(element)
+
+        if element.get('id') == 'projekttext' and page.projekttext is None:
+            page.projekttext = raw_text(element)
+        elif tag == 'p' and in_detail_area(element):
+            page.paragraphs.append(raw_text(element))
+
+    return page
+
+
+def extract_project(content, project_id, project_url):
+    """Project record from a project detail page (HTML or a GeprisPage)"""
+    page = content if isinstance(content, GeprisPage) else extract_page(content, project_url)
+    project_data = {
+        'project_id': project_id,
+        'url': project_url
+    }
+
+    if page.title is not None:
+        project_data['title'] = page.title
+
+    metadata = page.fields
+    for german_label, english_key in PROJECT_FIELDS.items():
+        if german_label in metadata:
+            project_data[english_key] = metadata[german_label]
+
+    # Description is the second content_frame
+    project_data['description'] = page.description() or ''
+    project_data['institutions'] = page.institutions
+    return project_data
+
+
+def extract_program(content, spp_url):
+    """Program record from an SPP program detail page (HTML or a GeprisPage)"""
+    page = content if isinstance(content, GeprisPage) else extract_page(content, spp_url)
+    spp_data = {'url': spp_url}
+
+    if page.title is not None:
+        spp_data['title'] = page.title
+
+    metadata = {}
+    for label, value in page.metadata:
+        english_key = PROGRAM_FIELDS.get(label, label.lower().replace(' / ', '_').replace(' ', '_'))
+        metadata[english_key] = value
+
+    # Usually first content_frame has metadata, second has description
+    spp_data['full_description'] = page.description(fallback=True) or ''
+
+    if 'spokesperson' in metadata:
+        spp_data['coordinator_name'] = metadata['spokesperson']
+    elif 'coordinator' in metadata:
+        spp_data['coordinator_name'] = metadata['coordinator']
+    else:
+        spp_data['coordinator_name'] = ''
+
+    spp_data['contact_email'] = metadata.get('email', '')
+    spp_data['contact_phone'] = metadata.get('phone', '')
+    spp_data['contact_general'] = metadata.get('contact', '')
+
+    funding_period = metadata.get('funding_period', '')
+    spp_data['funding_period'] = funding_period
+
+    # Funding years from "seit YYYY" or "von YYYY bis YYYY"
+    if 'seit' in funding_period.lower():
+        match = re.search(r'seit\s+(\d{4})', funding_period)
+        if match:
+            spp_data['funding_start'] = match.group(1)
+            spp_data['funding_end'] = ''  # Ongoing
+    elif 'von' in funding_period.lower() and 'bis' in funding_period.lower():
+        match = re.search(r'von\s+(\d{4})\s+bis\s+(\d{4})', funding_period)
+        if match:
+            spp_data['funding_start'] = match.group(1)
+            spp_data['funding_end'] = match.group(2)
+    else:
+        spp_data['funding_start'] = ''
+        spp_data['funding_end'] = ''
+
+    spp_data['subject_area'] = metadata.get('subject_area', '')
+    spp_data['approval_committee'] = metadata.get('approval_committee', '')
+    spp_data['applicant_institution'] = metadata.get('applicant_institution', '')
+    spp_data['metadata'] = metadata
+    return spp_data
+
+
+def extract_search_results(content):
+    """
+    Project entries of a GEPRIS search result page, in page order: one
+    {'id', 'title', 'url', 'parent_ids', 'spp_numbers'} per entry, where
+    parent_ids are the other projects the entry links to ("Teilprojekt zu")
+    and spp_numbers the "SPP nnnn" mentions in its text.
+    """
+    root = parse_page(content)
+    results = []
+    for entry in root.iter('div'):
+        if not RESULT_CLASSES.intersection(classes(entry)):
+            continue
+        if any(RESULT_CLASSES.intersection(classes(a)) for a in entry.iterancestors('div')):
+            continue
+        ids = []
+        title = ''
+        for link in entry.iter('a'):
+            match = PROJECT_ID_RE.search(link.get('href') or '')
+            if match and match.group(1) not in ids:
+                if not ids:
+                    title = element_text(link)
+                ids.append(match.group(1))
+        if not ids:
+            continue
+        spp_numbers = sorted({f"SPP {n}" for n in SPP_NUMBER_RE.findall(' '.join(entry.itertext()))})
+        results.append({'id': ids[0], 'title': title, 'url': GEPRIS_URL.format(ids[0]),
+                        'parent_ids': ids[1:], 'spp_numbers': spp_numbers})
+    return results
+
+
+def benchmark(limit=None):
+    """Time BeautifulSoup(html.parser) against extract_project on cached project pages"""
+    from bs4 import BeautifulSoup
+    from response_cache import ResponseCache
+
+    cache = ResponseCache()
+    urls = cache.urls('/gepris/projekt/')[:limit]
+    pages = [cache.get(url).body.decode('utf-8', 'replace') for url in urls]
+    cache.close()
+    if not pages:
+        print("✗ No cached GEPRIS pages - run a scraper first")
+        return
+
+    start = time.perf_counter()
+    for content in pages:
+        soup = BeautifulSoup(content, 'html.parser')
+        soup.find_all('span', class_='name')
+        soup.find_all('div', class_='content_frame')
+    soup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for url, content in zip(urls, pages):
+        extract_project(content, '', url)
+    lxml_time = time.perf_counter() - start
+
+    print(f"  {len(pages)} cached pages")
+    print(f"  BeautifulSoup parse + find_all: {soup_time:6.2f}s")
+    print(f"  lxml extract_project:           {lxml_time:6.2f}s  ({soup_time / lxml_time:.1f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GEPRIS page extraction benchmark")
+    parser.add_argument('--benchmark', action='store_true', help="Re-parse the cached project pages")
+    parser.add_argument('--limit', type=int, default=None, help="Only the first N cached pages")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.limit)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
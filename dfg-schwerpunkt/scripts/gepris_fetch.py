@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Fetch backends for GEPRIS pages.
+
+Project and program detail pages are static HTML, so they are fetched over a
+pooled keep-alive HTTP session. Playwright is only needed for the
+JavaScript-rendered programmlisten (Tabulator) page; PlaywrightFetcher wraps
+an existing page for that case and for debugging.
+
+Every fetcher implements fetch_result(url) -> FetchResult and fetch(url) ->
+HTML text, so wrappers (rate limiting, retries, response cache) can be
+stacked freely.
+"""
+
+import random
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://gepris.dfg.de"
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+DEFAULT_TIMEOUT = 30  # seconds
+
+# Global politeness budget towards gepris.dfg.de. The sequential scrapers
+# slept 0.5 s + 1.5 s around every project page, i.e. at most ~0.5 requests
+# per second; concurrent workers share one bucket so the total stays there.
+DEFAULT_REQUESTS_PER_SECOND = 0.5
+
+# Retries of a failed request (connection errors, timeouts, 429 and 5xx) with
+# jittered exponential backoff: up to base × 2^attempt seconds, at most
+# MAX_RETRY_DELAY, or longer if the server sends Retry-After
+DEFAULT_RETRIES = 3
+RETRY_BASE_DELAY = 2.0
+MAX_RETRY_DELAY = 120.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+FetchResult = namedtuple('FetchResult', ['url', 'status', 'headers', 'text'])
+
+
+class Fetcher:
+    """Base class: subclasses implement fetch_result()"""
+
+    def fetch_result(self, url, headers=None):
+        """Fetch url with optional extra request headers and return a FetchResult"""
+        raise NotImplementedError
+
+    def fetch(self, url):
+        """Return the HTML of url"""
+        return self.fetch_result(url).text
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HttpFetcher(Fetcher):
+    """Fetch static GEPRIS pages with a pooled, keep-alive requests session"""
+
+    def __init__(self, pool_size=4, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'de-DE,de;q=0.9,en;q=0.8',
+        })
+
+    def fetch_result(self, url, headers=None):
+        """GET url, raising on HTTP errors (a 304 is returned, not raised)"""
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        headers = {k.lower(): v for k, v in response.headers.items()}
+        return FetchResult(url, response.status_code, headers, response.text)
+
+    def close(self):
+        self.session.close()
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate across all workers"""
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def release(self, latency, failed=False, complete=True):
+        """
+        Report a finished request: failed for server errors, complete=False
+        for anything but a full 2xx response (a fixed-rate bucket ignores it)
+        """
+
+    def stats(self):
+        return f"{self.rate:.2f} requests/s (fixed)"
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate and concurrency follow the server's health (AIMD).
+
+    Starts cautiously at half of max_rate with one request in flight, so
+    the baseline latency is learned while the server is not loaded. Each
+    finished request reports its latency: while the smoothed latency stays
+    within slow_factor × the fastest of the last 100 full 2xx responses
+    (fast errors, 404s and 304 revalidations do not set the baseline), the
+    rate climbs by a twentieth of its range per response, and once it is at
+    max_rate the allowed concurrency grows by one up to max_in_flight. A
+    server error or a latency spike halves both (at most once per round
+    trip), down to min_rate and one request.
+    """
+
+    def __init__(self, max_rate=DEFAULT_REQUESTS_PER_SECOND, max_in_flight=1, min_rate=None,
+                 slow_factor=3.0):
+        super().__init__(max_rate / 2)
+        self.max_rate = max_rate
+        self.min_rate = min_rate or max_rate / 8
+        self.max_in_flight = max(1, max_in_flight)
+        self.limit = 1
+        self.slow_factor = slow_factor
+        self.in_flight = 0
+        self.slowdowns = 0
+        self._ready = threading.Condition(self._lock)
+        self._latency = None    # smoothed latency of all responses
+        self._recent = deque(maxlen=100)  # latencies of full 2xx responses
+        self._last_slowdown = 0.0
+
+    def acquire(self):
+        """Wait for a free request slot, then for a token"""
+        with self._ready:
+            while self.in_flight >= self.limit:
+                self._ready.wait()
+            self.in_flight += 1
+        super().acquire()
+
+    def release(self, latency, failed=False, complete=True):
+        with self._ready:
+            self.in_flight -= 1
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            if complete and not failed:
+                self._recent.append(latency)
+
+            now = time.monotonic()
+            slow = bool(self._recent) and self._latency > self.slow_factor * min(self._recent)
+            if failed or slow:
+                if now - self._last_slowdown >= self._latency:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.limit = max(1, self.limit // 2)
+                    self._last_slowdown = now
+                    self.slowdowns += 1
+            elif self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + (self.max_rate - self.min_rate) / 20)
+            elif self.limit < self.max_in_flight:
+                self.limit += 1
+            self._ready.notify_all()
+
+    def stats(self):
+        latency = f", latency {self._latency:.2f}s" if self._latency is not None else ""
+        return (f"{self.rate:.2f} requests/s of {self.max_rate:.2f}, {self.limit} in flight{latency}, "
+                f"slowed down {self.slowdowns}x")
+
+
+class RateLimitedFetcher(Fetcher):
+    """
+    Wrap a fetcher so every request first takes a token from a shared bucket,
+    reporting the request's latency and outcome back to it afterwards.
+    """
+
+    def __init__(self, fetcher, bucket):
+        self.fetcher = fetcher
+        self.bucket = bucket
+
+    def fetch_result(self, url, headers=None):
+        self.bucket.acquire()
+        start = time.monotonic()
+        failed, complete = True, False
+        try:
+            result = self.fetcher.fetch_result(url, headers=headers)
+            failed = result.status in RETRY_STATUSES
+            complete = 200 <= result.status < 300
+            return result
+        except requests.HTTPError as e:
+            failed = e.response is None or e.response.status_code in RETRY_STATUSES
+            raise
+        finally:
+            self.bucket.release(time.monotonic() - start, failed, complete)
+
+    def close(self):
+        self.fetcher.close()
+
+
+class CircuitBreaker:
+    """
+    Pause all workers when the server error rate spikes.
+
+    Outcomes of the last `window` requests are kept; once at least
+    `min_requests` are recorded and the share of server errors (5xx, 429,
+    connection errors, timeouts) reaches `threshold`, the breaker opens and
+    every wait() blocks for `cooldown` seconds. The window is then cleared,
+    so the next requests decide whether it opens again. A Retry-After from
+    the server pauses all workers the same way.
+    """
+
+    def __init__(self, window=20, threshold=0.5, cooldown=60.0, min_requests=5):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.min_requests = min_requests
+        self._outcomes = deque(maxlen=window)
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+        self.trips = 0
+
+    def wait(self):
+        """Block while the breaker is open"""
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def pause(self, seconds):
+        """Hold all workers for at least `seconds`"""
+        with self._lock:
+            self._open_until = max(self._open_until, time.monotonic() + seconds)
+
+    def record(self, failed):
+        """Record one request outcome (failed=True for a server error)"""
+        with self._lock:
+            self._outcomes.append(failed)
+            if (len(self._outcomes) < self.min_requests
+                    or sum(self._outcomes) < self.threshold * len(self._outcomes)):
+                return
+            self._outcomes.clear()
+            self._open_until = max(self._open_until, time.monotonic() + self.cooldown)
+            self.trips += 1
+        print(f"⚠ Server error rate above {self.threshold:.0%} — pausing all workers for {self.cooldown:.0f}s")
+
+
+def retry_after_seconds(headers):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    value = (headers or {}).get('retry-after') or (headers or {}).get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_status(error):
+    """HTTP status of a failed fetch, or None if no response was received"""
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+class RetryingFetcher(Fetcher):
+    """
+    Retry server errors with jittered exponential backoff behind a shared
+    CircuitBreaker. Client errors such as 404 are raised at once.
+    """
+
+    def __init__(self, fetcher, breaker=None, retries=DEFAULT_RETRIES,
+                 base_delay=RETRY_BASE_DELAY, max_delay=MAX_RETRY_DELAY):
+        self.fetcher = fetcher
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retried = 0
+
+    def fetch_result(self, url, headers=None):
+        attempt = 0
+        while True:
+            self.breaker.wait()
+            try:
+                result = self.fetcher.fetch_result(url, headers=headers)
+                error, status, response_headers = None, result.status, result.headers
+            except requests.HTTPError as e:
+                response = e.response
+                error = e
+                status = response.status_code if response is not None else None
+                response_headers = dict(response.headers) if response is not None else {}
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, status, response_headers = e, None, {}
+
+            server_error = status is None or status in RETRY_STATUSES
+            self.breaker.record(server_error)
+            if not server_error:
+                if error is not None:
+                    raise error
+                return result
+
+            retry_after = retry_after_seconds(response_headers)
+            if retry_after is not None:
+                self.breaker.pause(min(retry_after, self.max_delay))
+            if attempt >= self.retries:
+                if error is not None:
+                    raise error
+                return result
+
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_delay))
+            attempt += 1
+            self.retried += 1
+            print(f"  ⚠ {status or type(error).__name__} for {url} — retry {attempt}/{self.retries} "
+                  f"in {delay:.1f}s")
+            time.sleep(delay)
+
+    def stats(self):
+        return f"{self.retried} retried, circuit breaker opened {self.breaker.trips}x"
+
+    def close(self):
+        self.fetcher.close()
+
+
+class PlaywrightFetcher(Fetcher):
+    """Fetch pages through an existing Playwright page (for JS-rendered content)"""
+
+    def __init__(self, page, wait_until="domcontentloaded", timeout=30000):
+        self.page = page
+        self.wait_until = wait_until
+        self.timeout = timeout
+
+    def fetch_result(self, url, headers=None):
+        """Navigate to url and return the rendered HTML (extra headers are not sent)"""
+        return navigate(self.page, url, self.wait_until, self.timeout)
+
+
+def navigate(page, url, wait_until="domcontentloaded", timeout=30000):
+    """Navigate a Playwright page to url and return a FetchResult of the rendered DOM"""
+    response = page.goto(url, wait_until=wait_until, timeout=timeout)
+    status = response.status if response else 200
+    headers = dict(response.headers) if response else {}
+    return FetchResult(url, status, headers, page.content())
+
+
+# Lightweight page mode: resources no scraper reads. Stylesheets and
+# scripts still load, since the Tabulator table needs them to render.
+BLOCKED_RESOURCE_TYPES = ('image', 'font', 'media')
+BLOCKED_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'etracker.com', 'etracker.de', 'matomo', 'piwik',
+)
+
+
+def is_blocked(request):
+    """True for image/font/media requests and requests to analytics hosts"""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(request.url).hostname or ''
+    return any(blocked in host for blocked in BLOCKED_HOSTS)
+
+
+def block_resources(target):
+    """
+    Abort blocked requests of a Playwright page or browser context.
+
+    Other requests fall through to previously registered routes (e.g.
+    route_through_cache), so register this one last.
+    """
+    def handle(route):
+        if is_blocked(route.request):
+            route.abort()
+        else:
+            route.fallback()
+
+    target.route("**/*", handle)
+
+
+FETCH_BACKENDS = ('http', 'playwright')
+
+
+def create_fetcher(backend='http', page=None, **kwargs):
+    """
+    Create a fetcher for the given backend.
+
+    Args:
+        backend: 'http' (default) or 'playwright'
+        page: Playwright page, required for the 'playwright' backend
+    """
+    if backend == 'http':
+        return HttpFetcher(**kwargs)
+    if backend == 'playwright':
+        if page is None:
+            raise ValueError("The playwright backend needs a page")
+        return PlaywrightFetcher(page, **kwargs)
+    raise ValueError(f"Unknown fetch backend: {backend} (expected one of {', '.join(FETCH_BACKENDS)})")
+
+
+@contextmanager
+def open_fetcher(backend='http', headless=True, rate=DEFAULT_REQUESTS_PER_SECOND, workers=1,
+                 cache=True, offline=False, retries=DEFAULT_RETRIES, adaptive=True):
+    """
+    Yield a fetcher for backend that lives for the whole run.
+
+    The 'playwright' backend launches a single shared BrowserSession and
+    borrows (and periodically recycles) pages from it, instead of starting a
+    fresh Chromium per SPP. All requests go through one rate limiter capped
+    at `rate` requests per second (pass rate=None to disable), however many
+    workers share the fetcher. With adaptive=True the limiter lowers the rate
+    and the requests in flight when latency or errors rise and recovers when
+    responses are fast again; adaptive=False keeps a fixed TokenBucket.
+    Server errors are retried up to `retries` times with backoff, and a
+    shared circuit breaker pauses all workers while the server is failing.
+
+    With cache=True (or a ResponseCache instance) responses are read through
+    the on-disk response cache and stale entries are revalidated with
+    conditional requests; cache hits do not use the rate budget. A cache
+    passed in stays open for the caller to close.
+    offline=True serves only from the cache and never touches the network.
+    """
+    from response_cache import CachedFetcher, ResponseCache
+
+    own_cache = (cache is True or offline) and not isinstance(cache, ResponseCache)
+    if own_cache:
+        cache = ResponseCache()
+
+    cached = retrying = limiter = None
+    try:
+        if offline:
+            cached = CachedFetcher(None, cache, offline=True)
+            yield cached
+            return
+
+        with _open_backend(backend, headless, workers) as fetcher:
+            if rate:
+                limiter = AdaptiveRateLimiter(rate, max_in_flight=workers) if adaptive else TokenBucket(rate)
+                fetcher = RateLimitedFetcher(fetcher, limiter)
+            if retries:
+                # Every attempt takes its own rate token
+                fetcher = retrying = RetryingFetcher(fetcher, retries=retries)
+            if cache:
+                fetcher = cached = CachedFetcher(fetcher, cache)
+            yield fetcher
+    finally:
+        if cached:
+            print(f"Response cache: {cached.stats()}")
+        if limiter:
+            print(f"Rate limiter: {limiter.stats()}")
+        if retrying and (retrying.retried or retrying.breaker.trips):
+            print(f"Retries: {retrying.stats()}")
+        if own_cache:
+            cache.close()
+
+
+@contextmanager
+def _open_backend(backend, headless, workers):
+    if backend != 'playwright':
+        with create_fetcher(backend, pool_size=max(workers, 1)) as fetcher:
+            yield fetcher
+        return
+
+    from browser_session import BrowserSession
+
+    with BrowserSession(headless=headless) as session:
+        yield session.fetcher()
+
+
+def add_fetch_arguments(parser, workers=None):
+    """Add the shared fetch-layer options (backend, rate, retries, cache) to an argparse parser"""
+    parser.add_argument('--backend', choices=FETCH_BACKENDS, default='http',
+                        help="Fetch backend for static GEPRIS pages (default: http)")
+    if workers is not None:
+        parser.add_argument('--workers', type=int, default=workers,
+                            help=f"Concurrent page fetches (default: {workers}; "
+                                 "the playwright backend always uses 1)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="Global request budget in requests/second shared by all workers; "
+                             "the adaptive limiter never exceeds it "
+                             f"(default: {DEFAULT_REQUESTS_PER_SECOND})")
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="Keep the request rate fixed instead of adapting it to server latency")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help="Retries per request on server errors, with exponential backoff "
+                             f"(default: {DEFAULT_RETRIES}; 0 disables)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Serve pages only from the response cache, never the network")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Bypass the on-disk response cache")
+
+
+def open_fetcher_from_args(args):
+    """open_fetcher() configured from options added by add_fetch_arguments()"""
+    workers = getattr(args, 'workers', 1)
+    if args.backend == 'playwright' and workers > 1:
+        # The shared browser page can only serve one navigation at a time
+        workers = args.workers = 1
+    return open_fetcher(args.backend, rate=args.rate, workers=workers,
+                        cache=not args.no_cache, offline=args.offline,
+                        retries=getattr(args, 'retries', DEFAULT_RETRIES),
+                        adaptive=not getattr(args, 'fixed_rate', False))
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Persistent work queue for the scrapers.
+
+Every page a scraper needs is a job in data/jobs.sqlite: one row per
+(kind, SPP, URL) with a state (pending → in_flight → done | failed), an
+attempt count and, once done, the extracted record. Workers claim jobs one
+at a time and every state change is its own transaction, so an interrupted
+run loses at most the requests that were in flight: on the next start those
+jobs go back to pending and everything already done is reused.
+
+Kinds used by the scrapers:
+
+  spp      an SPP page; done once its project jobs are finished and saved
+  project  a project page (payload: the project link, result: the record)
+  program  an SPP program detail page (result: the combined program record)
+  search   a search result page of project discovery (result: its entries)
+
+    python3 scripts/job_queue.py                  # job counts per kind and state
+    python3 scripts/job_queue.py --failed         # list failed jobs
+    python3 scripts/job_queue.py --reset project  # forget all jobs of a kind
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+QUEUE_FILE = BASE_DIR / "data" / "jobs.sqlite"
+
+# Failed jobs are requeued by retry_failed() until they used this many attempts
+MAX_ATTEMPTS = 3
+
+STATES = ('pending', 'in_flight', 'done', 'failed')
+
+Job = namedtuple('Job', ['id', 'kind', 'spp_number', 'url', 'position', 'attempts', 'payload'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    spp_number TEXT NOT NULL,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (kind, spp_number, url)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (kind, spp_number, state, position);
+"""
+
+
+class JobQueue:
+    """SQLite-backed job queue, safe to share between worker threads"""
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = Path(path) if path != ':memory:' else path
+        if path != ':memory:':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _job(row):
+        job_id, kind, spp_number, url, position, attempts, payload = row
+        return Job(job_id, kind, spp_number, url, position, attempts,
+                   json.loads(payload) if payload else None)
+
+    # Queueing
+
+    def add_many(self, kind, spp_number, items):
+        """
+        Queue (url, payload) items of one SPP in order, in one transaction,
+        after the jobs already queued for it. Jobs that already exist keep
+        their state and position. Returns the number added.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            start = self._db.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM jobs WHERE kind = ? AND spp_number = ?",
+                (kind, spp_number),
+            ).fetchone()[0]
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (kind, spp_number, url, position, payload, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(kind, spp_number, url, position,
+                  json.dumps(payload, ensure_ascii=False) if payload is not None else None, now)
+                 for position, (url, payload) in enumerate(items, start)],
+            )
+            return self._db.total_changes - before
+
+    def add(self, kind, spp_number, url, payload=None):
+        return self.add_many(kind, spp_number, [(url, payload)]) == 1
+
+    def import_checkpoint(self, path, kind, urls, results=None):
+        """
+        Mark the completed SPPs of a legacy JSON checkpoint as done.
+
+        Only runs while the queue has no jobs of `kind`, so the checkpoint
+        is imported once. urls maps SPP numbers to their page URLs; SPPs
+        without a URL are skipped. results optionally maps SPP numbers to
+        the result records of their jobs.
+        """
+        path = Path(path)
+        if not path.exists() or self.counts(kind):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            completed = [spp for spp in json.load(f).get('completed_spps', []) if spp in urls]
+        results = results or {}
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (kind, spp_number, url, state, result, updated_at) "
+                "VALUES (?, ?, ?, 'done', ?, ?)",
+                [(kind, spp, urls[spp],
+                  json.dumps(results[spp], ensure_ascii=False) if spp in results else None, now)
+                 for spp in completed],
+            )
+        return len(completed)
+
+    # State changes (one transaction each)
+
+    def claim(self, kind, spp_number=None):
+        """Take the next pending job (lowest position) and mark it in flight, or None"""
+        sql = "SELECT id FROM jobs WHERE kind = ? AND state = 'pending'"
+        params = [kind]
+        if spp_number is not None:
+            sql += " AND spp_number = ?"
+            params.append(spp_number)
+        with self._lock, self._db:
+            row = self._db.execute(sql + " ORDER BY spp_number, position LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            return self._start(row[0])
+
+    def begin(self, kind, spp_number, url, payload=None):
+        """Queue a job if needed and mark it in flight whatever its state"""
+        self.add(kind, spp_number, url, payload)
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND spp_number = ? AND url = ?",
+                (kind, spp_number, url),
+            ).fetchone()
+            return self._start(row[0])
+
+    def _start(self, job_id):
+        self._db.execute(
+            "UPDATE jobs SET state = 'in_flight', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (time.time(), job_id),
+        )
+        return self._job(self._db.execute(
+            "SELECT id, kind, spp_number, url, position, attempts, payload FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone())
+
+    def complete(self, job, result=None):
+        """Mark a job done, storing its result record"""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False) if result is not None else None, time.time(), job.id),
+            )
+
+    def fail(self, job, error):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (str(error), time.time(), job.id),
+            )
+
+    def recover(self):
+        """Requeue jobs left in flight by an interrupted run; returns how many"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET state = 'pending', updated_at = ? WHERE state = 'in_flight'",
+                (time.time(),),
+            ).rowcount
+
+    def retry_failed(self, kind=None, max_attempts=MAX_ATTEMPTS):
+        """Requeue failed jobs with attempts left; returns how many"""
+        sql = "UPDATE jobs SET state = 'pending', updated_at = ? WHERE state = 'failed' AND attempts < ?"
+        params = [time.time(), max_attempts]
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self._lock, self._db:
+            return self._db.execute(sql, params).rowcount
+
+    def reset(self, kind=None, older_than=None):
+        """Delete all jobs (of one kind), or only those last changed more than older_than seconds ago"""
+        sql = "DELETE FROM jobs WHERE 1 = 1"
+        params = []
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        if older_than is not None:
+            sql += " AND updated_at < ?"
+            params.append(time.time() - older_than)
+        with self._lock, self._db:
+            return self._db.execute(sql, params).rowcount
+
+    # Lookups
+
+    def state(self, kind, spp_number, url):
+        """State of a job, or None if it was never queued"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM jobs WHERE kind = ? AND spp_number = ? AND url = ?",
+                (kind, spp_number, url),
+            ).fetchone()
+        return row[0] if row else None
+
+    def counts(self, kind, spp_number=None):
+        """{state: number of jobs} of one kind (and SPP)"""
+        sql = "SELECT state, COUNT(*) FROM jobs WHERE kind = ?"
+        params = [kind]
+        if spp_number is not None:
+            sql += " AND spp_number = ?"
+            params.append(spp_number)
+        with self._lock:
+            return dict(self._db.execute(sql + " GROUP BY state", params).fetchall())
+
+    def results(self, kind, spp_number=None):
+        """Result records of the done jobs, in queue order"""
+        sql = "SELECT result FROM jobs WHERE kind = ? AND state = 'done' AND result IS NOT NULL"
+        params = [kind]
+        if spp_number is not None:
+            sql += " AND spp_number = ?"
+            params.append(spp_number)
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY spp_number, position", params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def result(self, kind, spp_number, url):
+        """Result record of one done job, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM jobs WHERE kind = ? AND spp_number = ? AND url = ? AND state = 'done'",
+                (kind, spp_number, url),
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def failed(self, kind=None):
+        """(kind, spp_number, url, attempts, error) of all failed jobs"""
+        sql = "SELECT kind, spp_number, url, attempts, error FROM jobs WHERE state = 'failed'"
+        params = []
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            return self._db.execute(sql + " ORDER BY kind, spp_number, position", params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or reset the scraper job queue")
+    parser.add_argument('--failed', action='store_true', help="List failed jobs")
+    parser.add_argument('--reset', metavar='KIND', nargs='?', const='all',
+                        help="Delete all jobs of KIND (spp, project, program, search; default: all)")
+    args = parser.parse_args()
+
+    with JobQueue() as queue:
+        if args.reset:
+            removed = queue.reset(None if args.reset == 'all' else args.reset)
+            print(f"✓ Removed {removed} job(s)")
+            return
+
+        print(f"Job queue: {queue.path}")
+        for kind in ('spp', 'project', 'program', 'search'):
+            counts = queue.counts(kind)
+            if counts:
+                print(f"  {kind:8s} " + ", ".join(f"{counts.get(s, 0)} {s}" for s in STATES))
+
+        if args.failed:
+            for kind, spp_number, url, attempts, error in queue.failed():
+                print(f"  ✗ {kind} {spp_number} {url} ({attempts} attempts): {error}")
+
+
+if __name__ == "__main__":
+    main()
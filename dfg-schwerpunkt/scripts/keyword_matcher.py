@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick multi-keyword matcher.
+
+Builds one automaton per keyword list and scans a text in a single pass,
+returning per-keyword occurrence counts. Results are identical to running
+
+    len(re.findall(r'\\b' + re.escape(keyword.lower()) + r'\\b', text.lower()))
+
+for every keyword: matches must sit on word boundaries (Unicode \\w, as in
+Python's re) and occurrences of the same keyword do not overlap, while
+different keywords may overlap ("machine learning" and "learning").
+"""
+
+from collections import deque
+
+
+def is_word_char(ch):
+    """Same definition of \\w as Python's re module for str patterns"""
+    return ch.isalnum() or ch == '_'
+
+
+def at_word_boundary(text, pos):
+    """True where re's \\b would match at index pos of text"""
+    before = pos > 0 and is_word_char(text[pos - 1])
+    after = pos < len(text) and is_word_char(text[pos])
+    return before != after
+
+
+class KeywordMatcher:
+    """Single-pass matcher for a fixed keyword list (case-insensitive, word-bounded)"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+
+        # Keywords listed more than once (e.g. in both the German and English
+        # lists) are matched once; weights records how often each was listed.
+        self.weights = {}
+        for keyword in self.keywords:
+            self.weights[keyword] = self.weights.get(keyword, 0) + 1
+
+        # Distinct lowercase patterns, each mapped back to its original keywords
+        self.patterns = []
+        self.pattern_keywords = []
+        index = {}
+        for keyword in self.weights:
+            pattern = keyword.lower()
+            if not pattern:
+                continue
+            if pattern not in index:
+                index[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+                self.pattern_keywords.append([])
+            self.pattern_keywords[index[pattern]].append(keyword)
+
+        self._build()
+
+    def _build(self):
+        """Build the trie, failure links and a full transition table (DFA)"""
+        goto = [{}]
+        outputs = [[]]
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(pid)
+
+        # BFS: compute failure links and complete each state's transitions so
+        # scanning needs exactly one dict lookup per character. Characters
+        # missing from a state's table lead back to the root.
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            transitions = dict(delta[fail[state]])
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0)
+                transitions[ch] = child
+                queue.append(child)
+            delta[state] = transitions
+
+        self._delta = delta
+        self._outputs = [tuple(out) for out in outputs]
+        self._lengths = [len(pattern) for pattern in self.patterns]
+
+    def counts(self, text):
+        """
+        Count keyword occurrences in text.
+
+        Returns:
+            dict: keyword -> number of word-bounded, non-overlapping matches
+            (only keywords that matched at least once)
+        """
+        if not text or not self.patterns:
+            return {}
+
+        text = text.lower()
+        delta = self._delta
+        outputs = self._outputs
+        lengths = self._lengths
+
+        # End positions are visited in increasing order, so for a fixed-length
+        # pattern candidate starts are too: accepting a candidate only if it
+        # starts at or after the previous accepted match's end reproduces
+        # re.findall's left-to-right, non-overlapping scan.
+        last_end = {}
+        pattern_counts = {}
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            end = i + 1
+            for pid in outputs[state]:
+                start = end - lengths[pid]
+                if start < last_end.get(pid, 0):
+                    continue
+                if not (at_word_boundary(text, start) and at_word_boundary(text, end)):
+                    continue
+                last_end[pid] = end
+                pattern_counts[pid] = pattern_counts.get(pid, 0) + 1
+
+        result = {}
+        for pid, count in pattern_counts.items():
+            for keyword in self.pattern_keywords[pid]:
+                result[keyword] = count
+        return result
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Readiness waits for Playwright pages.
+
+Instead of sleeping a fixed time after a navigation, click or scroll, the
+browser scrapers wait for the DOM condition they actually need:
+
+  wait_for_details(page)      GEPRIS detail content (name/value fields,
+                              #projekttext or the heading) is present
+  wait_for_table_rows(page)   Tabulator rows are rendered and their count
+                              has stopped changing
+  wait_for_results(page)      search result entries are present
+  wait_for_project_links(page) links to project pages are present
+  wait_for_render(page)       the browser has painted after a scroll
+
+All waits return as soon as the condition holds and give up quietly after
+their timeout, so a page that is already ready costs (almost) nothing and a
+page that never gets ready is parsed as it is, as after the old sleeps.
+"""
+
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+DETAIL_SELECTOR = 'span.name, #projekttext, h1'
+TABLE_SELECTOR = '.tabulator-tableholder'
+TABLE_ROW_SELECTOR = '.tabulator-row'
+RESULT_SELECTOR = 'div.result_entry, div.ergebnis_eintrag'
+PROJECT_LINK_SELECTOR = 'a[href*="/gepris/projekt/"]'
+
+DEFAULT_TIMEOUT = 10000  # ms
+POLL_INTERVAL = 100      # ms
+
+
+def wait_for_selector(page, selector, timeout=DEFAULT_TIMEOUT):
+    """True once an element matching selector is in the DOM, False after timeout ms"""
+    try:
+        page.wait_for_selector(selector, state='attached', timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def wait_for_details(page, timeout=DEFAULT_TIMEOUT):
+    return wait_for_selector(page, DETAIL_SELECTOR, timeout)
+
+
+def wait_for_results(page, timeout=DEFAULT_TIMEOUT):
+    return wait_for_selector(page, RESULT_SELECTOR, timeout)
+
+
+def wait_for_project_links(page, timeout=DEFAULT_TIMEOUT):
+    return wait_for_selector(page, PROJECT_LINK_SELECTOR, timeout)
+
+
+def wait_for_stable_count(page, selector, timeout=DEFAULT_TIMEOUT, quiet=500):
+    """
+    Wait until at least one element matches selector and the number of
+    matches has not changed for `quiet` ms. Returns the last count (0 if
+    nothing appeared before the timeout).
+    """
+    deadline = time.monotonic() + timeout / 1000
+    count, since = -1, time.monotonic()
+    while time.monotonic() < deadline:
+        current = page.locator(selector).count()
+        now = time.monotonic()
+        if current != count:
+            count, since = current, now
+        elif count > 0 and now - since >= quiet / 1000:
+            return count
+        page.wait_for_timeout(POLL_INTERVAL)
+    return max(count, 0)
+
+
+def wait_for_table_rows(page, timeout=DEFAULT_TIMEOUT):
+    return wait_for_stable_count(page, TABLE_ROW_SELECTOR, timeout)
+
+
+def wait_for_render(page, frames=2):
+    """Wait until the browser has painted `frames` more frames (e.g. after scrolling a virtual table)"""
+    page.evaluate("""
+        (frames) => new Promise(resolve => {
+            const next = n => n ? requestAnimationFrame(() => next(n - 1)) : resolve();
+            next(frames);
+        })
+    """, frames)
+
+
+def scroll_to_end(page, container=TABLE_SELECTOR, rows=TABLE_ROW_SELECTOR, max_scrolls=50):
+    """
+    Scroll a container to its bottom until its scroll position and height
+    stop changing (no more rows are being loaded). Before giving up, the
+    rows get a moment to settle in case a page of data is still arriving.
+    Returns the number of scrolls, 0 if the container does not exist.
+    """
+    last, settled = None, False
+    for scrolls in range(1, max_scrolls + 1):
+        position = page.evaluate("""
+            (selector) => {
+                const holder = document.querySelector(selector);
+                if (!holder) return null;
+                holder.scrollTop = holder.scrollHeight;
+                return [holder.scrollTop, holder.scrollHeight];
+            }
+        """, container)
+        if position is None:
+            return 0
+        wait_for_render(page)
+        if position != last:
+            last, settled = position, False
+        elif settled:
+            return scrolls
+        else:
+            wait_for_stable_count(page, rows, timeout=2000, quiet=300)
+            settled = True
+    return max_scrolls
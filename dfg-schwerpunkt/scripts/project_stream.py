@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for scraped project records.
+
+Projects come from the per-SPP files in data/raw/projects/*.json (read one
+file at a time), from a JSONL export with one project per line (read one
+line at a time), or from the SQLite datastore (data/spp.sqlite, read one SPP
+at a time). Every record is tagged with spp_number and spp_title, and SPPs
+are yielded in the same order as sorted file names, so analyzers can consume
+the corpus incrementally instead of holding it all in memory.
+
+Export the per-SPP files to JSONL:
+    python3 scripts/project_stream.py --export data/processed/projects.jsonl
+"""
+
+import argparse
+import json
+import os
+from itertools import groupby
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+PROJECTS_DIR = BASE_DIR / "data" / "raw" / "projects"
+
+
+def is_jsonl(source):
+    return source is not None and Path(source).suffix == '.jsonl'
+
+
+def is_datastore(source):
+    return source is not None and Path(source).suffix in ('.sqlite', '.db')
+
+
+def iter_spp_files(projects_dir=PROJECTS_DIR):
+    """
+    Yield (spp_number, spp_title, projects) per SPP file, in file name order.
+
+    Only one file is held in memory at a time.
+    """
+    for json_file in sorted(Path(projects_dir).glob("*.json")):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        spp_number = data.get('spp_number', '')
+        spp_title = data.get('spp_title', '')
+        projects = data.get('projects', [])
+        for project in projects:
+            project['spp_number'] = spp_number
+            project['spp_title'] = spp_title
+        yield spp_number, spp_title, projects
+
+
+def iter_jsonl(path):
+    """Yield project records from a JSONL file, one line at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_projects(source=None):
+    """
+    Yield tagged project records.
+
+    Args:
+        source: None or a directory for per-SPP JSON files (default
+            data/raw/projects), a .jsonl export or a .sqlite datastore
+    """
+    if is_datastore(source):
+        for _, _, projects in iter_spp_groups(source):
+            yield from projects
+        return
+    if is_jsonl(source):
+        yield from iter_jsonl(source)
+        return
+    for _, _, projects in iter_spp_files(source or PROJECTS_DIR):
+        yield from projects
+
+
+def iter_spp_groups(source=None):
+    """
+    Yield (spp_number, spp_title, projects_iterator) per SPP.
+
+    For a JSONL source the records of one SPP must be contiguous (as written
+    by export_jsonl); SPPs without projects do not appear in a JSONL export.
+    Each projects_iterator must be consumed before advancing to the next SPP.
+    """
+    if is_datastore(source):
+        from datastore import Datastore
+
+        with Datastore(source) as store:
+            yield from store.spp_groups()
+        return
+
+    if not is_jsonl(source):
+        for spp_number, spp_title, projects in iter_spp_files(source or PROJECTS_DIR):
+            yield spp_number, spp_title, iter(projects)
+        return
+
+    records = iter_jsonl(source)
+    for (spp_number, spp_title), projects in groupby(
+            records, key=lambda p: (p.get('spp_number', ''), p.get('spp_title', ''))):
+        yield spp_number, spp_title, projects
+
+
+def export_jsonl(path, projects_dir=PROJECTS_DIR):
+    """Write all projects as JSONL (in SPP file order). Returns the record count."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    count = 0
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for project in iter_projects(projects_dir):
+            f.write(json.dumps(project, ensure_ascii=False) + '\n')
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export scraped projects as JSONL")
+    parser.add_argument('--export', type=Path, required=True, help="Output .jsonl file")
+    args = parser.parse_args()
+
+    count = export_jsonl(args.export)
+    print(f"✓ Wrote {count} projects to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
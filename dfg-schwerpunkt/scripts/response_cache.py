@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache of GEPRIS HTTP responses.
+
+Bodies are stored once per SHA-256 digest under data/cache/http/blobs/, and a
+small SQLite index maps each URL to its digest, status, headers and fetch
+time. Scrapers read through the cache (CachedFetcher for the HTTP fetch layer,
+route_through_cache() for Playwright navigations), so re-running a parser
+after a fix replays local HTML instead of re-downloading it.
+
+Entries younger than their TTL are served without touching the network.
+Older entries are revalidated with If-None-Match / If-Modified-Since, and a
+304 answer counts as a cache hit. Every revalidation records whether the page
+changed; URLs that keep coming back unchanged (e.g. completed programs such
+as SPP 527 or SPP 1006) get a proportionally longer TTL, up to
+MAX_TTL_FACTOR × ttl.
+
+close() evicts entries older than `max_age` and then least-recently-used
+entries until the cache fits in `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from gepris_fetch import Fetcher, FetchResult
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / "data" / "cache" / "http"
+
+DEFAULT_TTL = 7 * 24 * 3600             # serve without revalidation for a week
+DEFAULT_MAX_AGE = 180 * 24 * 3600       # evict entries fetched more than ~6 months ago
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3       # 2 GB of bodies
+
+# A URL that was unchanged on n of its last checks waits up to this many
+# TTLs before the next revalidation
+MAX_TTL_FACTOR = 8
+
+# Headers that describe the transfer, not the stored (decoded) body
+TRANSFER_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+CacheEntry = namedtuple('CacheEntry', ['url', 'status', 'headers', 'body', 'fetched_at',
+                                       'checks', 'changes'])
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a URL is not in the cache"""
+
+
+def conditional_headers(entry):
+    """If-None-Match / If-Modified-Since headers for revalidating entry"""
+    headers = {}
+    if entry.headers.get('etag'):
+        headers['If-None-Match'] = entry.headers['etag']
+    if entry.headers.get('last-modified'):
+        headers['If-Modified-Since'] = entry.headers['last-modified']
+    return headers
+
+
+class ResponseCache:
+    """URL → response index over content-addressed body blobs"""
+
+    def __init__(self, root=CACHE_DIR, ttl=DEFAULT_TTL, max_age=DEFAULT_MAX_AGE,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                checks INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+        for column in ('checks', 'changes'):
+            if column not in columns:
+                # Index created before change tracking existed
+                self._db.execute(f"ALTER TABLE responses ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_digest ON responses (digest)")
+        self._db.commit()
+
+    def _blob_path(self, digest):
+        return self.blobs_dir / digest[:2] / digest
+
+    def get(self, url):
+        """Return the CacheEntry for url (fresh or stale), or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, status, headers, fetched_at, checks, changes FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, status, headers, fetched_at, checks, changes = row
+            try:
+                body = self._blob_path(digest).read_bytes()
+            except FileNotFoundError:
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CacheEntry(url, status, json.loads(headers), body, fetched_at, checks, changes)
+
+    def ttl_for(self, entry):
+        """
+        TTL for entry, scaled by how rarely it has changed.
+
+        (checks + 1) / (changes + 1) is 1 for new or always-changing URLs and
+        grows with every unchanged revalidation, capped at MAX_TTL_FACTOR.
+        """
+        factor = min((entry.checks + 1) / (entry.changes + 1), MAX_TTL_FACTOR)
+        return self.ttl * factor
+
+    def is_fresh(self, entry, now=None):
+        """True if entry is younger than its (change-frequency adjusted) TTL"""
+        now = time.time() if now is None else now
+        return now - entry.fetched_at < self.ttl_for(entry)
+
+    def mark_not_modified(self, url):
+        """Record a 304 revalidation: the stored body is current again"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ?, checks = checks + 1 WHERE url = ?",
+                (now, now, url),
+            )
+            self._db.commit()
+
+    def put(self, url, status, headers, body):
+        """Store a response body (bytes or str) for url"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(digest)
+        if not blob.exists():
+            blob.parent.mkdir(exist_ok=True)
+            tmp = blob.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, blob)
+
+        headers = {k.lower(): v for k, v in headers.items() if k.lower() not in TRANSFER_HEADERS}
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT digest, checks, changes FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            checks, changes = 0, 0
+            if old:
+                checks, changes = old[1] + 1, old[2] + (old[0] != digest)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(body), status, json.dumps(headers), now, now, checks, changes),
+            )
+            self._db.commit()
+            if old and old[0] != digest:
+                self._drop_unreferenced([old[0]])
+
+    def _drop_unreferenced(self, digests):
+        """Delete blobs no longer referenced by any URL (caller holds the lock)"""
+        for digest in digests:
+            in_use = self._db.execute(
+                "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+            if not in_use:
+                try:
+                    self._blob_path(digest).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def urls(self, contains=None):
+        """Cached URLs, optionally only those containing a substring"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM responses WHERE instr(url, ?) > 0 ORDER BY url", (contains or '',)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def total_bytes(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM responses)"
+            ).fetchone()
+        return row[0]
+
+    def evict(self):
+        """Drop entries older than max_age, then LRU entries beyond max_bytes. Returns count removed."""
+        removed = []
+        with self._lock:
+            cutoff = time.time() - self.max_age
+            removed += self._db.execute(
+                "SELECT url, digest FROM responses WHERE fetched_at < ?", (cutoff,)
+            ).fetchall()
+            self._db.execute("DELETE FROM responses WHERE fetched_at < ?", (cutoff,))
+
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM responses)"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                for url, digest, size in self._db.execute(
+                    "SELECT url, digest, size FROM responses ORDER BY accessed_at"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                    removed.append((url, digest))
+                    total -= size
+
+            self._db.commit()
+            self._drop_unreferenced({digest for _, digest in removed})
+        return len(removed)
+
+    def close(self):
+        """Evict and close the index"""
+        if self._db is None:
+            return
+        self.evict()
+        self._db.close()
+        self._db = None
+
+
+class CachedFetcher(Fetcher):
+    """
+    Read-through cache in front of another fetcher.
+
+    Fresh entries are returned directly; stale ones are revalidated with a
+    conditional request and reused on 304; missing ones are fetched from the
+    wrapped fetcher and stored. In offline mode any cached entry is served
+    regardless of age and misses raise CacheMiss.
+    """
+
+    def __init__(self, fetcher, cache, offline=False):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def fetch_result(self, url, headers=None):
+        entry = self.cache.get(url)
+        if entry and (self.offline or self.cache.is_fresh(entry)):
+            self.hits += 1
+            return self._from_entry(entry)
+
+        if self.offline:
+            raise CacheMiss(f"Not in response cache (offline mode): {url}")
+
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(conditional_headers(entry))
+        result = self.fetcher.fetch_result(url, headers=request_headers or None)
+
+        if result.status == 304 and entry:
+            self.revalidated += 1
+            self.cache.mark_not_modified(url)
+            return self._from_entry(entry)
+
+        self.misses += 1
+        if 200 <= result.status < 300:
+            self.cache.put(url, result.status, result.headers, result.text)
+        return result
+
+    @staticmethod
+    def _from_entry(entry):
+        return FetchResult(entry.url, entry.status, entry.headers, entry.body.decode('utf-8', 'replace'))
+
+    def stats(self):
+        return f"{self.hits} cache hits, {self.revalidated} revalidated (304), {self.misses} fetched"
+
+    def close(self):
+        if self.fetcher is not None:
+            self.fetcher.close()
+
+
+# Resource types worth replaying; images, fonts and media are never cached
+CACHED_RESOURCE_TYPES = ('document', 'script', 'stylesheet', 'xhr', 'fetch')
+
+
+def bypass_cache(fetcher):
+    """
+    The fetcher behind a CachedFetcher, for pages that must be current (and
+    are not worth caching); offline and other fetchers are returned as is
+    """
+    if isinstance(fetcher, CachedFetcher) and not fetcher.offline:
+        return fetcher.fetcher
+    return fetcher
+
+
+def route_through_cache(target, cache, offline=False, resource_types=CACHED_RESOURCE_TYPES):
+    """
+    Serve Playwright GET requests of the given resource types from the cache.
+
+    target is a Playwright page or browser context. Misses are fetched with
+    route.fetch() and stored; in offline mode misses (and all other requests)
+    are aborted instead.
+    """
+    def handle(route):
+        request = route.request
+        if request.method != 'GET' or request.resource_type not in resource_types:
+            if offline:
+                route.abort()
+            else:
+                route.continue_()
+            return
+
+        entry = cache.get(request.url)
+        if entry and (offline or cache.is_fresh(entry)):
+            route.fulfill(status=entry.status, headers=entry.headers, body=entry.body)
+            return
+        if offline:
+            route.abort()
+            return
+
+        headers = dict(request.headers)
+        if entry:
+            headers.update(conditional_headers(entry))
+        response = route.fetch(headers=headers)
+        if response.status == 304 and entry:
+            cache.mark_not_modified(request.url)
+            route.fulfill(status=entry.status, headers=entry.headers, body=entry.body)
+            return
+
+        body = response.body()
+        if 200 <= response.status < 300:
+            cache.put(request.url, response.status, response.headers, body)
+        route.fulfill(response=response, body=body)
+
+    target.route("**/*", handle)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Incremental analysis pipeline.
+
+Fingerprints every input and only recomputes the per-SPP outputs whose
+inputs changed, merging them into the existing outputs:
+
+  1. analyze_relevance          data/raw/projects/*.json → processed/*.csv, summary_report.md
+  2. aggregate_spp_institutions data/raw/projects/*.json → raw/spp_institutional_analysis.json
+  3. prepare_programs           raw/spp_programs_full.json → raw/spp_programs_{analyzed,detailed}.json
+  4. tfidf_index                data/raw/projects/*.json → processed/tfidf/
+     similar_projects           TF-IDF index → processed/similar/, similar_projects.json
+     (full rebuild, only with --indexes or --force)
+  5. generate_spp_summaries     steps 2-4 → data/spp_summaries/*.md, comprehensive CSV, guide
+
+Project files are fingerprinted per file, programs and summaries per record;
+a change to the topic profiles (config/topics/) rescores all projects, with
+the unchanged topics served from the score cache.
+Fingerprints are kept in data/processed/pipeline_state.json; --force
+recomputes everything.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import aggregate_spp_institutions
+import analyze_relevance
+import generate_spp_summaries
+import prepare_programs
+import scored_projects
+import similar_projects
+import tfidf_index
+from topic_profiles import profiles_hash
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+RAW_DIR = DATA_DIR / "raw"
+PROCESSED_DIR = DATA_DIR / "processed"
+PROJECTS_DIR = RAW_DIR / "projects"
+STATE_FILE = PROCESSED_DIR / "pipeline_state.json"
+
+
+def fingerprint_file(path):
+    """SHA-256 of a file's bytes"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def fingerprint_record(record):
+    """SHA-256 of a JSON-serialisable record (key order independent)"""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_state():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'projects': {}, 'programs': {}, 'summaries': {}}
+
+
+def save_state(state):
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, STATE_FILE)
+
+
+def scan_project_files(state, force):
+    """
+    Fingerprint data/raw/projects/*.json against the stored state.
+
+    Returns:
+        tuple: (files, changed, removed) — all files in sorted order, the
+        changed/new ones, and names of files that disappeared
+    """
+    files = sorted(PROJECTS_DIR.glob("*.json"))
+    known = state['projects']
+    changed = []
+    for path in files:
+        fp = fingerprint_file(path)
+        if force or known.get(path.name, {}).get('fingerprint') != fp:
+            changed.append((path, fp))
+    names = {path.name for path in files}
+    removed = [name for name in known if name not in names]
+    return files, changed, removed
+
+
+def update_project_outputs(state, files, changed, removed, force):
+    """Steps 1 and 2: relevance CSVs/report and institutional analysis"""
+    known = state['projects']
+    # Unchanged scores are read back from the Parquet export (none without pyarrow)
+    full = (force or not scored_projects.PARQUET_FILE.exists()
+            or not aggregate_spp_institutions.OUTPUT_FILE.exists())
+
+    topics = profiles_hash(analyze_relevance.PROFILES)
+    if state.get('profiles') != topics:
+        if not full and 'profiles' in state:
+            print("Topic profiles changed — rescoring all projects")
+        full = True
+
+    if not full and not changed and not removed:
+        print("✓ Project files unchanged — relevance and institution outputs are current")
+        return False
+
+    # SPP numbers whose rows/entries must be dropped before merging
+    stale_spps = {known[name]['spp_number'] for name in removed}
+    stale_spps |= {known[path.name]['spp_number'] for path, _ in changed if path.name in known}
+    for name in removed:
+        del known[name]
+
+    if full:
+        print(f"Full recompute over {len(files)} SPP project files")
+        changed = [(path, fingerprint_file(path)) for path in files]
+        relevance_frames, institutions = {}, {}
+    else:
+        print(f"Recomputing {len(changed)} changed SPP file(s), dropping {len(removed)} removed")
+        existing = scored_projects.to_csv_rows(
+            scored_projects.load_scored_projects(columns=analyze_relevance.OUTPUT_COLUMNS))
+        relevance_frames = {spp: group for spp, group in existing.groupby('spp_number', sort=False)}
+        with open(aggregate_spp_institutions.OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            institutions = {entry['spp_number']: entry for entry in json.load(f)}
+        for spp in stale_spps:
+            relevance_frames.pop(spp, None)
+            institutions.pop(spp, None)
+
+    for path, fp in changed:
+        spp_number, spp_title, projects = analyze_relevance.load_spp_file(path)
+        relevance_frames[spp_number] = analyze_relevance.score_projects_frame(projects)
+        institutions[spp_number] = aggregate_spp_institutions.analyze_spp_file(path)
+        known[path.name] = {'fingerprint': fp, 'spp_number': spp_number, 'spp_title': spp_title}
+
+    # Reassemble in project file order, as a full run would produce
+    spp_order = [known[path.name]['spp_number'] for path in files]
+    spp_mapping = {known[path.name]['spp_number']: known[path.name]['spp_title'] for path in files}
+    frames = [relevance_frames[spp] for spp in spp_order if spp in relevance_frames]
+    analyze_relevance.save_outputs(frames, spp_mapping)
+
+    institution_list = [institutions[spp] for spp in spp_order if spp in institutions]
+    with open(aggregate_spp_institutions.OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(institution_list, f, indent=2, ensure_ascii=False)
+    print(f"✓ Saved institutional analysis ({len(institution_list)} SPPs)")
+    state['profiles'] = topics
+    return True
+
+
+def update_programs(state, force):
+    """Step 3: cleaned program records for the website"""
+    if not prepare_programs.INPUT_FILE.exists():
+        print(f"⚠ {prepare_programs.INPUT_FILE.name} not found — skipping program preparation")
+        return False
+
+    with open(prepare_programs.INPUT_FILE, 'r', encoding='utf-8') as f:
+        programs = json.load(f)
+
+    analyzed_file = prepare_programs.DATA_DIR / 'spp_programs_analyzed.json'
+    detailed_file = prepare_programs.DATA_DIR / 'spp_programs_detailed.json'
+    full = force or not analyzed_file.exists() or not detailed_file.exists()
+
+    known = state['programs']
+    fingerprints = {prog['spp_number']: fingerprint_record(prog) for prog in programs}
+    changed = [prog for prog in programs
+               if full or known.get(prog['spp_number']) != fingerprints[prog['spp_number']]]
+    removed = [spp for spp in known if spp not in fingerprints]
+
+    if not changed and not removed:
+        print("✓ Program records unchanged — website program files are current")
+        return False
+
+    analyzed, detailed = {}, {}
+    if not full:
+        with open(analyzed_file, 'r', encoding='utf-8') as f:
+            analyzed = {entry['spp_number']: entry for entry in json.load(f)}
+        with open(detailed_file, 'r', encoding='utf-8') as f:
+            detailed = {entry['spp_number']: entry for entry in json.load(f)}
+        for spp in removed:
+            analyzed.pop(spp, None)
+            detailed.pop(spp, None)
+
+    print(f"Preparing {len(changed)} changed program record(s), dropping {len(removed)} removed")
+    for prog in changed:
+        analyzed_entry, detailed_entry = prepare_programs.prepare_program(prog)
+        analyzed[prog['spp_number']] = analyzed_entry
+        detailed[prog['spp_number']] = detailed_entry
+
+    prepare_programs.write_outputs(
+        sorted(analyzed.values(), key=lambda x: x['spp_number']),
+        sorted(detailed.values(), key=lambda x: x['spp_number']),
+    )
+    state['programs'] = fingerprints
+    return True
+
+
+def update_indexes(state, projects_changed, rebuild):
+    """
+    Step 4: TF-IDF and similar-projects indexes. Rebuilding them takes
+    seconds over the whole corpus, so it only happens when asked for
+    (--indexes/--force); otherwise stale indexes are reported. Returns True
+    if rebuilt.
+    """
+    if projects_changed:
+        state['indexes_stale'] = True
+    if not rebuild:
+        if not (tfidf_index.INDEX_DIR / "matrix.npz").exists() or not similar_projects.EXPORT_FILE.exists():
+            print("⚠ No TF-IDF/similarity index yet — build it with --indexes")
+        elif state.get('indexes_stale'):
+            print("⚠ Project files changed since the indexes were built — rebuild them with --indexes")
+        else:
+            print("✓ TF-IDF and similarity indexes are current")
+        return False
+
+    index = tfidf_index.build_index()
+    similar_projects.build_similar_index(index)
+    state['indexes_stale'] = False
+    return True
+
+
+def update_summaries(state, force):
+    """Step 5: per-SPP markdown summaries, comprehensive CSV and proposal guide"""
+    spps = generate_spp_summaries.load_spp_data()
+    similar = similar_projects.load_similar_projects()
+    known = state['summaries']
+    # A summary also changes when its related projects do
+    fingerprints = {spp.get('spp_number', ''): fingerprint_record(
+                        {**spp, 'similar': similar.get(spp.get('spp_number', ''))})
+                    for spp in spps}
+
+    changed = [spp for spp in spps
+               if force or known.get(spp.get('spp_number', '')) != fingerprints[spp.get('spp_number', '')]]
+    removed = [spp for spp in known if spp not in fingerprints]
+
+    if not changed and not removed:
+        print("✓ SPP summaries are current")
+        return False
+
+    print(f"Regenerating {len(changed)} SPP summar{'y' if len(changed) == 1 else 'ies'}")
+    for spp in changed:
+        generate_spp_summaries.generate_individual_summary(spp, similar.get(spp.get('spp_number', '')))
+
+    generate_spp_summaries.generate_master_csv(spps)
+    generate_spp_summaries.generate_proposal_guide(spps, similar)
+    state['summaries'] = fingerprints
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally rebuild analysis outputs")
+    parser.add_argument('--force', action='store_true', help="Recompute all outputs")
+    parser.add_argument('--indexes', action='store_true',
+                        help="Rebuild the TF-IDF and similarity indexes (full rebuild)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("DFG SPP Incremental Pipeline")
+    print("=" * 70)
+    start = time.perf_counter()
+
+    state = load_state()
+
+    print("\n[1-2] Project relevance and institutions")
+    files, changed, removed = scan_project_files(state, args.force)
+    projects_changed = update_project_outputs(state, files, changed, removed, args.force)
+    save_state(state)
+
+    print("\n[3] Program records")
+    update_programs(state, args.force)
+    save_state(state)
+
+    print("\n[4] TF-IDF and similarity indexes")
+    update_indexes(state, projects_changed, args.indexes or args.force)
+    save_state(state)
+
+    print("\n[5] SPP summaries")
+    update_summaries(state, args.force)
+    save_state(state)
+
+    print(f"\n✓ Pipeline finished in {time.perf_counter() - start:.2f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
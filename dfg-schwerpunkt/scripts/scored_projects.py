@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Columnar (Parquet) export of the scored project corpus.
+
+analyze_relevance writes data/processed/all_projects.parquet next to the
+CSVs (which the website loader keeps using). Score columns are typed
+floats, spp_number/spp_title are dictionary-encoded, and the matched keyword
+columns are lists of dictionary-encoded strings instead of ", "-joined text.
+The relevant subsets are not stored separately; filter on the score columns.
+
+The score and keyword columns follow the topic profiles in config/topics/.
+
+Readers load only the columns they ask for:
+
+    from scored_projects import load_scored_projects
+    df = load_scored_projects(columns=['spp_number', 'ai_score'])
+
+Requires pyarrow; without it the export is skipped with a warning.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+from topic_profiles import keyword_columns, load_profiles, score_columns
+
+BASE_DIR = Path(__file__).parent.parent
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+PARQUET_FILE = PROCESSED_DIR / "all_projects.parquet"
+
+PROFILES = load_profiles()
+SCORE_COLUMNS = score_columns(PROFILES)
+CATEGORY_COLUMNS = ['spp_number', 'spp_title']
+KEYWORD_COLUMNS = keyword_columns(PROFILES)
+
+
+def split_keywords(value):
+    """'a, b' (as written to the CSV) → ['a', 'b']"""
+    return [keyword for keyword in str(value).split(', ') if keyword] if value else []
+
+
+def to_arrow(all_df):
+    """Convert the all_projects DataFrame to a typed Arrow table"""
+    import pyarrow as pa
+
+    keyword_type = pa.list_(pa.dictionary(pa.int32(), pa.string()))
+    arrays, fields = [], []
+    for column in all_df.columns:
+        values = all_df[column]
+        if column in SCORE_COLUMNS:
+            array = pa.array(values.astype('float64'), type=pa.float64())
+        elif column in CATEGORY_COLUMNS:
+            array = pa.array(values.astype(str)).dictionary_encode()
+        elif column in KEYWORD_COLUMNS:
+            array = pa.array([split_keywords(v) for v in values],
+                             type=pa.list_(pa.string())).cast(keyword_type)
+        else:
+            array = pa.array(values.astype(str), type=pa.string())
+        arrays.append(array)
+        fields.append(pa.field(column, array.type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+class ParquetExport:
+    """
+    Writes the scored corpus as Parquet one DataFrame chunk at a time:
+    write(df) per chunk, then close(). Without pyarrow nothing is written.
+    """
+
+    def __init__(self, path=PARQUET_FILE):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("  ⚠ pyarrow not installed - skipping all_projects.parquet")
+            pq = None
+        self._pq = pq
+        self._writer = None
+        self.path = Path(path)
+
+    def write(self, df):
+        if self._pq is None:
+            return
+        table = to_arrow(df)
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = self._pq.ParquetWriter(self.path, table.schema, compression='zstd')
+        self._writer.write_table(table)
+
+    def close(self):
+        """Finish the file. Returns its path, or None if nothing was written."""
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        return self.path
+
+
+def load_scored_projects(columns=None, path=PARQUET_FILE, filters=None):
+    """
+    Load the scored corpus (or just `columns` of it) as a DataFrame.
+
+    Dictionary-encoded columns come back as pandas categoricals. filters is
+    passed to pyarrow, e.g. [('ai_score', '>=', 1.0)].
+    """
+    return pd.read_parquet(path, columns=columns, filters=filters)
+
+
+def to_csv_rows(df):
+    """
+    A loaded frame in the form analyze_relevance writes to all_projects.csv:
+    plain string columns and ", "-joined matched keywords
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column in KEYWORD_COLUMNS:
+            df[column] = [', '.join(keywords) for keywords in df[column]]
+        elif column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype(str)
+    return df
+
+
+def main():
+    """Print a size/speed comparison of the Parquet export against all_projects.csv"""
+    import time
+
+    csv_file = PROCESSED_DIR / 'all_projects.csv'
+    for label, load, file in (
+        ('CSV (all columns)', lambda: pd.read_csv(csv_file), csv_file),
+        ('Parquet (all columns)', lambda: load_scored_projects(), PARQUET_FILE),
+        ('Parquet (scores only)', lambda: load_scored_projects(['spp_number'] + SCORE_COLUMNS), PARQUET_FILE),
+    ):
+        start = time.perf_counter()
+        df = load()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:24s} {file.stat().st_size / 1024:8.0f} KB  {elapsed * 1000:7.1f} ms  {df.shape}")
+
+
+if __name__ == "__main__":
+    main()
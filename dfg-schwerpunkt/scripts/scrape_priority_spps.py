@@ -4,12 +4,17 @@ Priority scraper for high-value SPPs related to wearables and AI.
 Scrapes these first, then continues with remaining SPPs.
 """
 
+import argparse
 import json
 from pathlib import Path
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent))
-from scrape_projects_working import scrape_spp_projects, load_checkpoint, save_checkpoint
+from datastore import Datastore
+from gepris_fetch import add_fetch_arguments, open_fetcher_from_args
+from discover_projects import discover_projects
+from scrape_projects_working import (DEFAULT_WORKERS, add_discovery_argument, open_queue,
+                                     scrape_queued_spps, spp_needs_work)
 
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
@@ -26,6 +31,11 @@ MEDIUM_PRIORITY = [
 ]
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape high-value SPPs first")
+    add_fetch_arguments(parser, workers=DEFAULT_WORKERS)
+    add_discovery_argument(parser)
+    args = parser.parse_args()
+
     print("="*70)
     print("DFG SPP Priority Scraper - High-Value Programs First")
     print("="*70)
@@ -37,10 +47,6 @@ def main():
 
     print(f"✓ Loaded {len(spp_programs)} SPP programs")
 
-    # Load checkpoint
-    checkpoint = load_checkpoint()
-    completed = set(checkpoint.get('completed_spps', []))
-
     # Separate into priority groups
     high_priority_spps = []
     medium_priority_spps = []
@@ -63,45 +69,25 @@ def main():
     # Process in priority order
     all_spps_ordered = high_priority_spps + medium_priority_spps + other_spps
 
-    total_projects = 0
-    failed = []
-
-    for i, spp in enumerate(all_spps_ordered, 1):
-        spp_number = spp.get('spp_number', f"SPP_{i}")
-
-        # Skip if already completed
-        if spp_number in completed:
-            print(f"\n[{i}/{len(all_spps_ordered)}] ✓ {spp_number} (already completed)")
-            continue
-
-        # Indicate priority level
-        priority = "HIGH" if spp_number in HIGH_PRIORITY else ("MEDIUM" if spp_number in MEDIUM_PRIORITY else "LOW")
-        print(f"\n[{i}/{len(all_spps_ordered)}] [{priority}] Processing {spp_number}")
-
-        result = scrape_spp_projects(
-            spp_number=spp_number,
-            spp_title=spp.get('title', 'Unknown'),
-            spp_url=spp.get('url', '')
-        )
-
-        if result:
-            completed.add(spp_number)
-            total_projects += result.get('projects_count', 0)
-            print(f"✓ {spp_number}: {result.get('projects_count', 0)} projects")
-        else:
-            failed.append(spp_number)
-            print(f"✗ {spp_number}: Failed")
+    def priority(spp):
+        spp_number = spp.get('spp_number', '')
+        level = "HIGH" if spp_number in HIGH_PRIORITY else ("MEDIUM" if spp_number in MEDIUM_PRIORITY else "LOW")
+        return f"[{level}] "
 
-        # Save checkpoint
-        checkpoint['completed_spps'] = list(completed)
-        checkpoint['failed_spps'] = failed
-        save_checkpoint(checkpoint)
+    # One fetcher (HTTP pool or shared browser) reused across all SPPs
+    with open_fetcher_from_args(args) as fetcher, Datastore() as store, open_queue(spp_programs) as queue:
+        if args.discover:
+            discover_projects(fetcher, queue, all_spps_ordered)
+        total_projects = scrape_queued_spps(all_spps_ordered, fetcher, store, queue, args.workers,
+                                            label=priority)
+        completed = queue.counts('spp').get('done', 0)
+        failed = [spp.get('spp_number', '') for spp in all_spps_ordered if spp_needs_work(queue, spp)]
 
     # Summary
     print(f"\n{'='*70}")
     print("SCRAPING COMPLETE")
     print(f"{'='*70}")
-    print(f"✓ Completed: {len(completed)}/{len(all_spps_ordered)} SPPs")
+    print(f"✓ Completed: {completed}/{len(all_spps_ordered)} SPPs")
     print(f"✓ Total projects: {total_projects}")
     if failed:
         print(f"✗ Failed: {len(failed)} SPPs - {', '.join(failed)}")
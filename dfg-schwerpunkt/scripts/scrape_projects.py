@@ -11,6 +11,8 @@ from pathlib import Path
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 
+from page_ready import wait_for_details, wait_for_project_links
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
@@ -46,8 +48,8 @@ def scrape_project_list(page, projects_url, spp_number):
 
     try:
         print(f"  Loading projects page: {projects_url}")
-        page.goto(projects_url, wait_until="networkidle", timeout=60000)
-        time.sleep(2)
+        page.goto(projects_url, wait_until="domcontentloaded", timeout=60000)
+        wait_for_project_links(page)
 
         content = page.content()
         soup = BeautifulSoup(content, 'html.parser')
@@ -95,8 +97,8 @@ def scrape_project_details(page, project):
     Visit individual project page and extract detailed information
     """
     try:
-        page.goto(project['url'], wait_until="networkidle", timeout=60000)
-        time.sleep(1.5)
+        page.goto(project['url'], wait_until="domcontentloaded", timeout=60000)
+        wait_for_details(page)
 
         content = page.content()
         soup = BeautifulSoup(content, 'html.parser')
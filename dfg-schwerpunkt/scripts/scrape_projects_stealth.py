@@ -10,7 +10,10 @@ import re
 import random
 from pathlib import Path
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+
+from gepris_extract import extract_page
+from gepris_fetch import block_resources
+from page_ready import wait_for_details
 
 # Try to import stealth, but continue if not available
 try:
@@ -28,6 +31,7 @@ CHECKPOINT_FILE = DATA_DIR / "scraping_checkpoint.json"
 
 # URLs
 BASE_URL = "https://gepris.dfg.de"
+PROJECT_LINK_RE = re.compile(r'/gepris/projekt/(\d+)')
 
 
 def load_checkpoint():
@@ -50,6 +54,34 @@ def human_delay(min_sec=1.5, max_sec=4.0):
     time.sleep(delay)
 
 
+def collect_project_links(details, spp_url, spp_number, seen_ids):
+    """Project links on an extracted page that are not in seen_ids (which is updated)"""
+    projects = []
+    for href, title, _ in details.links:
+        match = PROJECT_LINK_RE.search(href)
+        if not match:
+            continue
+        href = details.absolute(href)
+
+        # Skip if we've seen this ID (avoid duplicates)
+        project_id = match.group(1)
+        if project_id in seen_ids:
+            continue
+        seen_ids.add(project_id)
+
+        # Skip if it's the SPP coordinator project itself
+        if href == spp_url:
+            continue
+
+        projects.append({
+            'project_id': project_id,
+            'title': title,
+            'url': href,
+            'spp_number': spp_number
+        })
+    return projects
+
+
 def scrape_spp_projects_direct(page, spp):
     """
     Try to scrape projects by visiting the SPP detail page directly
@@ -64,96 +96,35 @@ def scrape_spp_projects_direct(page, spp):
     try:
         print(f"  Visiting {spp_number} detail page...")
         page.goto(spp_url, wait_until="domcontentloaded", timeout=60000)
-        human_delay(2, 4)
+        wait_for_details(page)
 
         # Scroll to simulate reading
         page.evaluate("window.scrollTo(0, document.body.scrollHeight / 2)")
         human_delay(1, 2)
 
-        content = page.content()
-        soup = BeautifulSoup(content, 'html.parser')
-
-        projects = []
-
         # Strategy: Look for project links on the SPP page
         # GEPRIS might list related projects, teilprojekte, etc.
-
-        # Find all links that look like projects
-        all_links = soup.find_all('a', href=re.compile(r'/gepris/projekt/\d+'))
-
+        details = extract_page(page.content(), spp_url)
         seen_ids = set()
-        for link in all_links:
-            href = link['href']
-            if not href.startswith('http'):
-                href = BASE_URL + href if href.startswith('/') else f"{BASE_URL}/{href}"
-
-            # Extract project ID
-            project_id_match = re.search(r'projekt/(\d+)', href)
-            if not project_id_match:
-                continue
-
-            project_id = project_id_match.group(1)
-
-            # Skip if we've seen this ID (avoid duplicates)
-            if project_id in seen_ids:
-                continue
-            seen_ids.add(project_id)
-
-            # Skip if it's the SPP coordinator project itself
-            if href == spp_url:
-                continue
-
-            title = link.get_text(strip=True)
-
-            projects.append({
-                'project_id': project_id,
-                'title': title,
-                'url': href,
-                'spp_number': spp_number
-            })
+        projects = collect_project_links(details, spp_url, spp_number, seen_ids)
 
         # If we found projects, great! Otherwise try to find a "show all projects" link
         if not projects:
             # Look for links that might lead to project lists
             list_indicators = ['projekt', 'teilprojekt', 'projekte', 'projects', 'liste', 'list']
-            for link in soup.find_all('a', href=True):
-                link_text = link.get_text(strip=True).lower()
+            for href, text, _ in details.links:
+                link_text = text.lower()
                 if any(indicator in link_text for indicator in list_indicators):
                     # Try following this link
-                    list_url = link['href']
-                    if not list_url.startswith('http'):
-                        list_url = BASE_URL + list_url if list_url.startswith('/') else f"{BASE_URL}/{list_url}"
+                    list_url = details.absolute(href)
 
                     print(f"  Following potential project list: {link_text[:50]}")
                     page.goto(list_url, wait_until="domcontentloaded", timeout=60000)
-                    human_delay(2, 3)
+                    wait_for_details(page)
 
                     # Now look for projects again
-                    content2 = page.content()
-                    soup2 = BeautifulSoup(content2, 'html.parser')
-
-                    project_links = soup2.find_all('a', href=re.compile(r'/gepris/projekt/\d+'))
-                    for plink in project_links:
-                        href = plink['href']
-                        if not href.startswith('http'):
-                            href = BASE_URL + href if href.startswith('/') else f"{BASE_URL}/{href}"
-
-                        project_id_match = re.search(r'projekt/(\d+)', href)
-                        if not project_id_match:
-                            continue
-                        project_id = project_id_match.group(1)
-
-                        if project_id in seen_ids or href == spp_url:
-                            continue
-                        seen_ids.add(project_id)
-
-                        title = plink.get_text(strip=True)
-                        projects.append({
-                            'project_id': project_id,
-                            'title': title,
-                            'url': href,
-                            'spp_number': spp_number
-                        })
+                    list_page = extract_page(page.content(), list_url)
+                    projects.extend(collect_project_links(list_page, spp_url, spp_number, seen_ids))
 
                     # Found projects, stop looking
                     if projects:
@@ -172,64 +143,39 @@ def scrape_project_details(page, project):
     try:
         print(f"    Visiting project {project['project_id']}...")
         page.goto(project['url'], wait_until="domcontentloaded", timeout=60000)
-        human_delay(1.5, 3.0)
+        wait_for_details(page)
 
         # Scroll to simulate reading
         page.evaluate("window.scrollTo(0, document.body.scrollHeight / 3)")
         human_delay(0.5, 1.0)
 
-        content = page.content()
-        soup = BeautifulSoup(content, 'html.parser')
+        details = extract_page(page.content(), project['url'])
 
         # Extract title
-        title_elem = soup.find('h1')
-        if title_elem:
-            project['full_title'] = title_elem.get_text(strip=True)
-
-        # Extract abstract/description
-        abstract = ""
-        # Try multiple selectors
-        for selector in [
-            ('div', {'class': re.compile(r'abstract|beschreibung', re.I)}),
-            ('div', {'id': re.compile(r'abstract|zusammenfassung', re.I)}),
-            ('p', {'class': re.compile(r'abstract|beschreibung', re.I)})
-        ]:
-            elem = soup.find(*selector)
-            if elem:
-                abstract = elem.get_text(strip=True)
-                break
-
-        # If still no abstract, try to find any substantial paragraph
-        if not abstract:
-            paragraphs = soup.find_all('p')
-            for p in paragraphs:
-                text = p.get_text(strip=True)
-                if len(text) > 100:  # Substantial text
-                    abstract = text
-                    break
-
-        project['abstract'] = abstract
-
-        # Extract from definition lists (common GEPRIS pattern)
-        for dl in soup.find_all('dl'):
-            dts = dl.find_all('dt')
-            dds = dl.find_all('dd')
-
-            for dt, dd in zip(dts, dds):
-                label = dt.get_text(strip=True).lower()
-                value = dd.get_text(strip=True)
-
-                if any(x in label for x in ['antragsteller', 'applicant', 'principal']):
-                    project['principal_investigator'] = value
-                elif any(x in label for x in ['institution', 'universität', 'university', 'hochschule']):
-                    project['institution'] = value
-                elif any(x in label for x in ['laufzeit', 'duration', 'period', 'förderung']):
-                    project['funding_period'] = value
-                elif any(x in label for x in ['fachgebiet', 'subject', 'keywords', 'schlagwort']):
-                    keywords = [kw.strip() for kw in re.split(r'[,;]', value) if kw.strip()]
-                    project['keywords'] = keywords
-                elif 'dfg' in label and ('systematik' in label or 'classification' in label):
-                    project['dfg_classification'] = value
+        if details.heading is not None:
+            project['full_title'] = details.heading
+
+        # Abstract: GEPRIS project text, else the description frame
+        project['abstract'] = details.projekttext or details.description() or ''
+
+        # Extract from the name/value fields
+        for label, value in details.metadata:
+            label = label.lower()
+
+            if any(x in label for x in ['antragsteller', 'applicant', 'principal']):
+                project['principal_investigator'] = value
+            elif any(x in label for x in ['institution', 'universität', 'university', 'hochschule']):
+                project['institution'] = value
+            elif any(x in label for x in ['laufzeit', 'duration', 'period', 'förderung']):
+                project['funding_period'] = value
+            elif any(x in label for x in ['fachgebiet', 'subject', 'keywords', 'schlagwort']):
+                keywords = [kw.strip() for kw in re.split(r'[,;]', value) if kw.strip()]
+                project['keywords'] = keywords
+            elif 'dfg' in label and ('systematik' in label or 'classification' in label):
+                project['dfg_classification'] = value
+
+        if details.institutions and not project.get('institution'):
+            project['institution'] = '; '.join(details.institutions)
 
         # Set defaults
         project.setdefault('principal_investigator', '')
@@ -294,6 +240,7 @@ def main():
             timezone_id='Europe/Berlin',
         )
 
+        block_resources(context)
         page = context.new_page()
 
         # Apply stealth mode if available
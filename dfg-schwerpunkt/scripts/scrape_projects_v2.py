@@ -11,6 +11,8 @@ from pathlib import Path
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 
+from page_ready import wait_for_details, wait_for_results, wait_for_selector
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
@@ -48,17 +50,16 @@ def search_spp_projects(page, spp_number):
 
     try:
         print(f"  Searching for projects in {spp_number}...")
-        page.goto(search_url, wait_until="networkidle", timeout=60000)
-        time.sleep(2)
+        page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
+        wait_for_selector(page, 'input[name="keywords"]')
 
         # Fill in search form - search for the SPP number in "Programm" field
         # Try to find and fill the search field
         page.fill('input[name="keywords"]', spp_num)
-        time.sleep(1)
 
-        # Submit search
+        # Submit search and wait for the result list
         page.click('button[type="submit"]')
-        time.sleep(3)
+        wait_for_results(page)
 
         # Get results page
         content = page.content()
@@ -104,8 +105,8 @@ def scrape_project_details(page, project):
     Visit individual project page and extract detailed information
     """
     try:
-        page.goto(project['url'], wait_until="networkidle", timeout=60000)
-        time.sleep(1.5)
+        page.goto(project['url'], wait_until="domcontentloaded", timeout=60000)
+        wait_for_details(page)
 
         content = page.content()
         soup = BeautifulSoup(content, 'html.parser')
@@ -4,121 +4,61 @@ Working scraper for DFG SPP projects based on iterative testing.
 Uses proven approach: visit each SPP page, extract project links, then scrape each project.
 """
 
+import argparse
 import json
-import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+
+from datastore import Datastore
+from discover_projects import discover_projects
+from gepris_extract import extract_page, extract_project
+from gepris_fetch import add_fetch_arguments, error_status, open_fetcher, open_fetcher_from_args
+from job_queue import JobQueue
+
+# Concurrent project page fetches per SPP. The request rate is capped by the
+# fetcher's shared token bucket, so workers only overlap network latency.
+DEFAULT_WORKERS = 4
 
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
 PROJECTS_DIR = DATA_DIR / "projects"
 PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Legacy per-SPP checkpoint, imported into the job queue on first run
 CHECKPOINT_FILE = DATA_DIR / "scraping_checkpoint.json"
 
-def load_checkpoint():
-    """Load scraping progress checkpoint"""
-    if CHECKPOINT_FILE.exists():
-        with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'completed_spps': [], 'failed_spps': []}
-
-def save_checkpoint(checkpoint):
-    """Save scraping progress checkpoint"""
-    with open(CHECKPOINT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(checkpoint, f, indent=2, ensure_ascii=False)
-
-def extract_project_links(soup, current_spp_id):
-    """Extract all project links from an SPP page"""
-    projects = []
-
-    for link in soup.find_all('a', href=lambda x: x and '/gepris/projekt/' in x):
-        href = link.get('href')
-
-        # Skip if it's the current SPP page or special links
-        if current_spp_id in href or 'language=' in href or 'displayMode=' in href:
-            continue
-
-        # Extract project ID
-        match = re.search(r'/gepris/projekt/(\d+)', href)
-        if match:
-            project_id = match.group(1)
-            title = link.get_text(strip=True)
-
-            # Avoid duplicates
-            if project_id not in [p['id'] for p in projects]:
-                projects.append({
-                    'id': project_id,
-                    'title': title,
-                    'url': f"https://gepris.dfg.de/gepris/projekt/{project_id}"
-                })
-
-    return projects
-
-def scrape_project_details(page, project_id, project_url):
-    """Scrape detailed information from a project page"""
+def scrape_project_details(fetcher, project_id, project_url, statuses=None):
+    """Scrape detailed information from a project page, noting the HTTP status in `statuses`"""
     try:
-        page.goto(project_url, wait_until="domcontentloaded", timeout=30000)
-        time.sleep(0.5)  # Small delay to be polite
-
-        content = page.content()
-        soup = BeautifulSoup(content, 'html.parser')
-
-        project_data = {
-            'project_id': project_id,
-            'url': project_url
-        }
-
-        # Get title from <title> tag
-        title_tag = soup.find('title')
-        if title_tag:
-            full_title = title_tag.get_text()
-            clean_title = full_title.replace('DFG - GEPRIS - ', '').strip()
-            project_data['title'] = clean_title
-
-        # Extract metadata from name/value spans
-        metadata = {}
-        name_spans = soup.find_all('span', class_='name')
-        for name_span in name_spans:
-            label = name_span.get_text(strip=True)
-            parent = name_span.parent
-            if parent:
-                all_text = parent.get_text(strip=True)
-                value = all_text.replace(label, '', 1).strip()
-                metadata[label] = value
-
-        # Map German field names to English keys
-        field_mapping = {
-            'Antragstellerinnen / Antragsteller': 'investigators',
-            'Fachliche Zuordnung': 'subject_area',
-            'Förderung': 'funding_period',
-            'Projektkennung': 'project_identifier',
-            'DFG-Verfahren': 'dfg_procedure',
-            'Teilprojekt zu': 'parent_program'
-        }
-
-        for german_label, english_key in field_mapping.items():
-            if german_label in metadata:
-                project_data[english_key] = metadata[german_label]
-
-        # Get description from second content_frame div
-        content_frames = soup.find_all('div', class_='content_frame')
-        if len(content_frames) >= 2:
-            description = content_frames[1].get_text(strip=True)
-            project_data['description'] = description
-        else:
-            project_data['description'] = ''
-
-        return project_data
+        result = fetcher.fetch_result(project_url)
+        if statuses is not None:
+            statuses[project_url] = result.status
+        return extract_project(result.text, project_id, project_url)
 
     except Exception as e:
+        if statuses is not None and project_url not in statuses:
+            statuses[project_url] = error_status(e)
         print(f"  ✗ Error scraping project {project_id}: {e}")
         return None
 
-def scrape_spp_projects(spp_number, spp_title, spp_url):
-    """Scrape all projects for a single SPP"""
+def scrape_spp_projects(spp_number, spp_title, spp_url, backend='http', fetcher=None,
+                        workers=1, store=None, queue=None):
+    """
+    Scrape all projects for a single SPP.
+
+    SPP and project pages are static HTML and are fetched over plain HTTP by
+    default; backend='playwright' renders them in Chromium instead. Runners
+    that process many SPPs should pass a long-lived fetcher (see
+    gepris_fetch.open_fetcher) so the connection pool or browser is reused.
+    With workers > 1, project pages are fetched concurrently; the fetcher's
+    rate limit still bounds the total request rate. Results are also written
+    to `store` (a datastore.Datastore) when given.
+
+    Project pages are jobs in `queue` (a job_queue.JobQueue); pages already
+    done there are not fetched again. Without a queue a throwaway in-memory
+    one is used.
+    """
     print(f"\n{'='*70}")
     print(f"Processing: {spp_number} - {spp_title}")
     print(f"URL: {spp_url}")
@@ -132,178 +72,251 @@ def scrape_spp_projects(spp_number, spp_title, spp_url):
 
     spp_id = spp_id_match.group(1)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    if queue is None:
+        with JobQueue(':memory:') as queue:
+            return scrape_spp_projects(spp_number, spp_title, spp_url, backend, fetcher,
+                                       workers, store, queue)
+
+    if fetcher is not None:
+        return scrape_spp_with_fetcher(fetcher, queue, spp_number, spp_title, spp_url, spp_id, workers, store)
+
+    with open_fetcher(backend, workers=workers) as fetcher:
+        return scrape_spp_with_fetcher(fetcher, queue, spp_number, spp_title, spp_url, spp_id, workers, store)
+
+def scrape_project_jobs(fetcher, queue, spp_number, total, workers=1, statuses=None):
+    """
+    Fetch the pending project pages of an SPP with up to `workers` requests
+    in flight. Each worker claims one job at a time and records the result
+    (or failure) before taking the next. HTTP statuses are collected in
+    `statuses` ({url: status}).
+    """
+    def work():
+        while True:
+            job = queue.claim('project', spp_number)
+            if job is None:
+                return
+            proj_link = job.payload
+            project_data = scrape_project_details(fetcher, proj_link['id'], job.url, statuses)
+            if project_data:
+                queue.complete(job, project_data)
+            else:
+                queue.fail(job, "no project data extracted")
+            status = "✓" if project_data else "✗"
+            print(f"  [{job.position + 1}/{total}] {status} {proj_link['id']}: {proj_link['title'][:60]}")
+
+    if workers <= 1:
+        work()
+        return
 
-        try:
-            # Step 1: Load SPP page and extract project links
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(work) for _ in range(workers)]:
+            future.result()
+
+def save_to_store(store, result, statuses):
+    """Write a scraped SPP result and the pages fetched for it ({url: HTTP status}) to the datastore"""
+    store.replace_spp_projects(result['spp_number'], result['spp_title'], result['projects'],
+                               result['spp_url'])
+    store.record_fetches([(url, 'spp' if url == result['spp_url'] else 'project', status)
+                          for url, status in statuses.items()])
+
+def scrape_spp_with_fetcher(fetcher, queue, spp_number, spp_title, spp_url, spp_id, workers=1, store=None):
+    """Scrape an SPP page and all of its projects using the given fetcher"""
+    spp_job = queue.begin('spp', spp_number, spp_url, {'title': spp_title})
+    statuses = {}  # pages fetched in this run
+    try:
+        # Step 1: Load SPP page and queue its project links (once)
+        counts = queue.counts('project', spp_number)
+        if counts:
+            total = sum(counts.values())
+            print(f"Step 1: {total} project links already queued ({counts.get('done', 0)} done)")
+        else:
             print(f"Step 1: Loading SPP page...")
-            page.goto(spp_url, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(1)
-
-            content = page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-
-            project_links = extract_project_links(soup, spp_id)
-            print(f"✓ Found {len(project_links)} project links")
-
-            if len(project_links) == 0:
-                print(f"⚠ No projects found for {spp_number}")
-                browser.close()
-                return {
-                    'spp_number': spp_number,
-                    'spp_title': spp_title,
-                    'spp_url': spp_url,
-                    'projects_count': 0,
-                    'projects': []
-                }
-
-            # Step 2: Scrape details for each project
-            print(f"Step 2: Scraping project details...")
-            projects = []
-
-            for i, proj_link in enumerate(project_links, 1):
-                print(f"  [{i}/{len(project_links)}] Scraping {proj_link['id']}: {proj_link['title'][:60]}...")
-
-                project_data = scrape_project_details(page, proj_link['id'], proj_link['url'])
-
-                if project_data:
-                    projects.append(project_data)
-                    print(f"    ✓ Success")
-                else:
-                    print(f"    ✗ Failed")
-
-                # Polite delay between requests (1-2 seconds)
-                time.sleep(1.5)
-
-            browser.close()
-
-            # Step 3: Save results
+            page = fetcher.fetch_result(spp_url)
+            statuses[spp_url] = page.status
+            project_links = extract_page(page.text, spp_url).project_links(spp_id)
+            queue.add_many('project', spp_number, [(link['url'], link) for link in project_links])
+            total = len(project_links)
+            print(f"✓ Found {total} project links")
+
+        if total == 0:
+            print(f"⚠ No projects found for {spp_number}")
             result = {
                 'spp_number': spp_number,
                 'spp_title': spp_title,
                 'spp_url': spp_url,
-                'projects_count': len(projects),
-                'projects': projects
+                'projects_count': 0,
+                'projects': []
             }
-
-            output_file = PROJECTS_DIR / f"{spp_number.replace(' ', '_')}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-
-            print(f"\n✓ Successfully scraped {len(projects)}/{len(project_links)} projects")
-            print(f"✓ Saved to {output_file}")
-
+            if store is not None:
+                save_to_store(store, result, statuses)
+            queue.complete(spp_job, {'projects_count': 0})
             return result
 
-        except Exception as e:
-            print(f"✗ Error processing {spp_number}: {e}")
-            browser.close()
-            return None
-
-def main():
-    """Main scraping loop"""
-    print("="*70)
-    print("DFG SPP Projects Scraper - Working Version")
-    print("="*70)
-
-    # Load SPP programs list
-    spp_file = DATA_DIR / "spp_programs.json"
-    if not spp_file.exists():
-        print(f"✗ SPP programs file not found: {spp_file}")
-        print("  Please run scrape_spp_programs.py first")
-        return
+        # Step 2: Scrape details for each pending project
+        pending = queue.counts('project', spp_number).get('pending', 0)
+        print(f"Step 2: Scraping project details ({pending} pending, {workers} workers)...")
+        scrape_project_jobs(fetcher, queue, spp_number, total, workers, statuses)
+        projects = queue.results('project', spp_number)
+
+        # Step 3: Save results
+        result = {
+            'spp_number': spp_number,
+            'spp_title': spp_title,
+            'spp_url': spp_url,
+            'projects_count': len(projects),
+            'projects': projects
+        }
 
-    with open(spp_file, 'r', encoding='utf-8') as f:
-        spp_programs = json.load(f)
+        output_file = PROJECTS_DIR / f"{spp_number.replace(' ', '_')}.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
 
-    print(f"✓ Loaded {len(spp_programs)} SPP programs")
+        print(f"\n✓ Successfully scraped {len(projects)}/{total} projects")
+        print(f"✓ Saved to {output_file}")
 
-    # Load checkpoint
-    checkpoint = load_checkpoint()
-    completed = set(checkpoint.get('completed_spps', []))
-    failed = set(checkpoint.get('failed_spps', []))
+        if store is not None:
+            save_to_store(store, result, statuses)
 
-    if completed:
-        print(f"✓ Resuming from checkpoint: {len(completed)} completed, {len(failed)} failed")
+        queue.complete(spp_job, {'projects_count': len(projects)})
+        return result
 
-    # Process each SPP
-    total_projects = 0
+    except Exception as e:
+        queue.fail(spp_job, e)
+        print(f"✗ Error processing {spp_number}: {e}")
+        return None
 
+def spp_needs_work(queue, spp):
+    """True if the SPP was never finished or has requeued project jobs"""
+    spp_number = spp.get('spp_number', '')
+    return (queue.state('spp', spp_number, spp.get('url', '')) != 'done'
+            or queue.counts('project', spp_number).get('pending', 0) > 0)
+
+def scrape_queued_spps(spp_programs, fetcher, store, queue, workers=1, label=lambda spp: ''):
+    """
+    Scrape every SPP with outstanding jobs, skipping previously failed ones,
+    then requeue failed jobs that have attempts left and go over the SPPs
+    once more. Returns the number of projects scraped.
+    """
+    projects_count = {}
     for i, spp in enumerate(spp_programs, 1):
         spp_number = spp.get('spp_number', f"SPP_{i}")
+        state = queue.state('spp', spp_number, spp.get('url', ''))
 
-        # Skip if already completed
-        if spp_number in completed:
+        if not spp_needs_work(queue, spp):
             print(f"\n[{i}/{len(spp_programs)}] Skipping {spp_number} (already completed)")
             continue
 
-        # Skip if previously failed (will retry at end)
-        if spp_number in failed:
+        if state == 'failed':
             print(f"\n[{i}/{len(spp_programs)}] Skipping {spp_number} (previously failed, will retry)")
             continue
 
-        print(f"\n[{i}/{len(spp_programs)}] Processing {spp_number}")
-
-        result = scrape_spp_projects(
+        print(f"\n[{i}/{len(spp_programs)}] {label(spp)}Processing {spp_number}")
+        projects_count[spp_number] = report_spp(scrape_spp_projects(
             spp_number=spp_number,
             spp_title=spp.get('title', 'Unknown'),
-            spp_url=spp.get('url', '')
-        )
-
-        if result and result['projects_count'] > 0:
-            completed.add(spp_number)
-            total_projects += result['projects_count']
-            print(f"✓ {spp_number}: {result['projects_count']} projects")
-        elif result and result['projects_count'] == 0:
-            completed.add(spp_number)
-            print(f"⚠ {spp_number}: No projects found")
-        else:
-            failed.add(spp_number)
-            print(f"✗ {spp_number}: Failed")
-
-        # Save checkpoint after each SPP
-        checkpoint['completed_spps'] = list(completed)
-        checkpoint['failed_spps'] = list(failed)
-        save_checkpoint(checkpoint)
-
-    # Retry failed SPPs
-    if failed:
+            spp_url=spp.get('url', ''),
+            fetcher=fetcher,
+            workers=workers,
+            store=store,
+            queue=queue
+        ), spp_number)
+
+    # Retry failed SPP and project jobs
+    requeued = queue.retry_failed('spp') + queue.retry_failed('project')
+    retry = [spp for spp in spp_programs if spp_needs_work(queue, spp)] if requeued else []
+    if retry:
         print(f"\n{'='*70}")
-        print(f"Retrying {len(failed)} failed SPPs...")
+        print(f"Retrying {len(retry)} SPPs with failed jobs...")
         print(f"{'='*70}")
 
-        for spp_number in list(failed):
-            spp = next((s for s in spp_programs if s.get('spp_number') == spp_number), None)
-            if not spp:
-                continue
-
+        for spp in retry:
+            spp_number = spp.get('spp_number', '')
             print(f"\nRetrying {spp_number}")
-            result = scrape_spp_projects(
+            projects_count[spp_number] = report_spp(scrape_spp_projects(
                 spp_number=spp_number,
                 spp_title=spp.get('title', 'Unknown'),
-                spp_url=spp.get('url', '')
-            )
+                spp_url=spp.get('url', ''),
+                fetcher=fetcher,
+                workers=workers,
+                store=store,
+                queue=queue
+            ), spp_number)
+
+    return sum(projects_count.values())
+
+def report_spp(result, spp_number):
+    """Print the outcome of one SPP and return its project count"""
+    if result and result['projects_count'] > 0:
+        print(f"✓ {spp_number}: {result['projects_count']} projects")
+        return result['projects_count']
+    if result:
+        print(f"⚠ {spp_number}: No projects found")
+    else:
+        print(f"✗ {spp_number}: Failed")
+    return 0
+
+def open_queue(spp_programs):
+    """Open the job queue, importing the legacy checkpoint and requeueing interrupted jobs"""
+    queue = JobQueue()
+    imported = queue.import_checkpoint(CHECKPOINT_FILE, 'spp',
+                                       {spp.get('spp_number'): spp.get('url', '') for spp in spp_programs})
+    if imported:
+        print(f"✓ Imported {imported} completed SPPs from {CHECKPOINT_FILE.name}")
+    recovered = queue.recover()
+    counts = queue.counts('spp')
+    if counts:
+        print(f"✓ Resuming from job queue: {counts.get('done', 0)} SPPs completed, "
+              f"{counts.get('failed', 0)} failed, {recovered} interrupted job(s) requeued")
+    return queue
+
+def add_discovery_argument(parser):
+    parser.add_argument('--discover', action='store_true',
+                        help="Queue projects found via GEPRIS search first; SPPs with found "
+                             "projects skip their SPP page")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape projects for all DFG SPPs")
+    add_fetch_arguments(parser, workers=DEFAULT_WORKERS)
+    add_discovery_argument(parser)
+    return parser.parse_args()
+
+def main():
+    """Main scraping loop"""
+    args = parse_args()
+
+    print("="*70)
+    print("DFG SPP Projects Scraper - Working Version")
+    print("="*70)
 
-            if result:
-                failed.remove(spp_number)
-                completed.add(spp_number)
-                total_projects += result.get('projects_count', 0)
+    # Load SPP programs list
+    spp_file = DATA_DIR / "spp_programs.json"
+    if not spp_file.exists():
+        print(f"✗ SPP programs file not found: {spp_file}")
+        print("  Please run scrape_spp_programs.py first")
+        return
+
+    with open(spp_file, 'r', encoding='utf-8') as f:
+        spp_programs = json.load(f)
+
+    print(f"✓ Loaded {len(spp_programs)} SPP programs")
 
-                checkpoint['completed_spps'] = list(completed)
-                checkpoint['failed_spps'] = list(failed)
-                save_checkpoint(checkpoint)
+    # One fetcher (HTTP pool or shared browser) for the whole run
+    with open_fetcher_from_args(args) as fetcher, Datastore() as store, open_queue(spp_programs) as queue:
+        if args.discover:
+            discover_projects(fetcher, queue, spp_programs)
+        total_projects = scrape_queued_spps(spp_programs, fetcher, store, queue, args.workers)
+        completed = queue.counts('spp').get('done', 0)
+        failed = [spp.get('spp_number', '') for spp in spp_programs if spp_needs_work(queue, spp)]
 
     # Final summary
     print(f"\n{'='*70}")
     print("SCRAPING COMPLETE")
     print(f"{'='*70}")
-    print(f"✓ Completed: {len(completed)}/{len(spp_programs)} SPPs")
+    print(f"✓ Completed: {completed}/{len(spp_programs)} SPPs")
     print(f"✓ Total projects scraped: {total_projects}")
     if failed:
         print(f"✗ Failed: {len(failed)} SPPs - {', '.join(failed)}")
-    print(f"\nProject data saved to: {PROJECTS_DIR}")
+    print(f"\nProject data saved to: {PROJECTS_DIR} and {store.path.name}")
     print(f"{'='*70}")
 
 if __name__ == "__main__":
@@ -4,26 +4,142 @@ Full DFG Schwerpunktprogramme scraper — gets ALL SPPs from GEPRIS.
 
 The previous scraper only got 20 SPPs because Tabulator.js uses virtual DOM
 and scrolling didn't load all rows. This version:
-1. Accesses Tabulator's in-memory data via JS (bypasses virtual rendering)
-2. Falls back to paginated GEPRIS search if the table approach fails
+1. Captures the JSON the Tabulator table is loaded from (all rows of all
+   programme types, not only the rendered ones); with --direct that data
+   source is fetched again over plain HTTP, without a browser
+2. Falls back to Tabulator's in-memory data via JS, scrolling the table and
+   finally paginated GEPRIS search
 3. Scrapes detail pages for each program
 """
 
+import argparse
 import json
 import time
 import re
 from pathlib import Path
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+
+from gepris_extract import element_text, extract_page, extract_search_results, parse_page
+from gepris_fetch import AdaptiveRateLimiter, block_resources, open_fetcher
+from page_ready import wait_for_details, wait_for_render, wait_for_results, wait_for_table_rows
+from response_cache import ResponseCache, route_through_cache
 
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
 OUTPUT_FILE = DATA_DIR / "spp_programs_full.json"
+# Request the Tabulator table was populated from, captured on a browser run
+TABULATOR_SOURCE_FILE = DATA_DIR / "programmlisten_source.json"
+# Every row of the programme list, all programme types
+PROGRAMME_LIST_FILE = DATA_DIR / "programmlisten.json"
 
 BASE_URL = "https://gepris.dfg.de"
 LIST_URL = f"{BASE_URL}/gepris/programmlisten?language=de#PROGRAMM=Schwerpunktprogramme"
 
 
+# Request headers the data source may depend on (cookies are not replayed)
+SOURCE_HEADERS = ('accept', 'x-requested-with')
+
+
+def tabulator_rows(payload):
+    """Programme rows in a Tabulator data payload (plain list or {'data': [...]}), else None"""
+    if isinstance(payload, dict):
+        payload = payload.get('data')
+    if (isinstance(payload, list) and payload and isinstance(payload[0], dict)
+            and 'NUMMER' in payload[0] and 'TYP' in payload[0]):
+        return payload
+    return None
+
+
+def watch_json_responses(page):
+    """Start collecting the XHR/fetch responses of page; returns the (growing) list"""
+    responses = []
+
+    def collect(response):
+        if response.request.resource_type in ('xhr', 'fetch'):
+            responses.append(response)
+
+    page.on('response', collect)
+    return responses
+
+
+def find_tabulator_source(responses):
+    """
+    The captured response carrying the programme rows.
+
+    Returns:
+        tuple: (source dict to replay the request, rows), or (None, None)
+    """
+    for response in responses:
+        if not response.ok or 'json' not in response.headers.get('content-type', 'json'):
+            continue
+        try:
+            rows = tabulator_rows(response.json())
+        except Exception:
+            continue
+        if rows:
+            request = response.request
+            source = {
+                'url': request.url,
+                'method': request.method,
+                'headers': {k: v for k, v in request.headers.items() if k.lower() in SOURCE_HEADERS},
+                'captured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            return source, rows
+    return None, None
+
+
+def save_tabulator_source(source):
+    with open(TABULATOR_SOURCE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(source, f, ensure_ascii=False, indent=2)
+    print(f"  Saved data source {source['url']} → {TABULATOR_SOURCE_FILE.name}")
+
+
+def load_tabulator_source():
+    if not TABULATOR_SOURCE_FILE.exists():
+        return None
+    with open(TABULATOR_SOURCE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def fetch_programmlisten_direct(cache=True, offline=False):
+    """
+    Fetch the programme list from the captured Tabulator data source over
+    HTTP (one request, no browser). Returns [] if there is no usable source.
+    """
+    source = load_tabulator_source()
+    if not source:
+        print(f"⚠ No captured data source ({TABULATOR_SOURCE_FILE.name}) — run once without --direct")
+        return []
+    if source.get('method', 'GET') != 'GET':
+        print(f"⚠ Data source is a {source['method']} request, which cannot be replayed — using the browser")
+        return []
+
+    print(f"Fetching programme list from {source['url']}")
+    try:
+        with open_fetcher('http', cache=cache, offline=offline) as fetcher:
+            result = fetcher.fetch_result(source['url'], headers=source.get('headers') or None)
+        rows = tabulator_rows(json.loads(result.text))
+    except Exception as e:
+        print(f"  ✗ Direct fetch failed: {e}")
+        return []
+    if not rows:
+        print("  ✗ Data source returned no programme rows — using the browser")
+        return []
+
+    print(f"  Got {len(rows)} rows from the data source")
+    return save_programme_list(rows)
+
+
+def save_programme_list(rows):
+    """Write all programme types to PROGRAMME_LIST_FILE and return the SPPs"""
+    programmes = parse_programme_rows(rows)
+    with open(PROGRAMME_LIST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(programmes, f, ensure_ascii=False, indent=2)
+    types = sorted({p['typ'] for p in programmes})
+    print(f"  Saved {len(programmes)} programmes ({', '.join(types)}) to {PROGRAMME_LIST_FILE.name}")
+    return parse_tabulator_data(rows)
+
+
 def extract_tabulator_data(page):
     """Try to extract all data directly from the Tabulator instance in JS."""
     print("Attempting to extract Tabulator data via JS...")
@@ -80,118 +196,122 @@ def scrape_via_search(page):
 
     # GEPRIS search for coordinated programs (eintragsart=4 = koordinierte Programme)
     # bewilligungStatus: empty=all, 2=laufend (running), 3=abgeschlossen (completed)
+    hits_per_page = 100
     search_url = (
         f"{BASE_URL}/gepris/OCTOPUS?"
         "task=doSearchSimple&context=projekt"
         "&eintragsart=4"  # koordinierte Programme
-        "&hitsPerPage=100"
+        f"&hitsPerPage={hits_per_page}"
         "&index=0"
         "&nurProjekteMitAB=false"
         "&teilprojekte=false"
         "&phrase=true"
     )
 
-    programs = []
+    programs = {}  # keyed by spp_number to deduplicate
+    seen = set()
+    unnumbered = 0
     page_index = 0
 
     while True:
         url = search_url.replace("index=0", f"index={page_index}")
         print(f"  Fetching search results page (index={page_index})...")
-        page.goto(url, wait_until="networkidle", timeout=60000)
-        time.sleep(2)
-
-        content = page.content()
-        soup = BeautifulSoup(content, 'html.parser')
-
-        # Find result entries
-        results = soup.find_all('div', class_='result_entry')
-        if not results:
-            # Try alternative selectors
-            results = soup.find_all('div', class_='ergebnis_eintrag')
+        page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        wait_for_results(page, timeout=5000)
 
-        if not results:
-            print(f"  No results found on page index={page_index}, stopping.")
+        results = extract_search_results(page.content())
+        new = [entry for entry in results if entry['id'] not in seen]
+        if not new:
+            print(f"  No (new) results on page index={page_index}, stopping.")
             break
 
-        for entry in results:
-            link = entry.find('a', href=True)
-            if not link:
+        for entry in new:
+            seen.add(entry['id'])
+            # Only keep Schwerpunktprogramme, under the SPP number the entry mentions
+            if 'Schwerpunktprogramm' not in entry['title'] and not entry['spp_numbers']:
                 continue
-
-            title = link.get_text(strip=True)
-            href = link['href']
-            if not href.startswith('http'):
-                href = BASE_URL + (href if href.startswith('/') else f"/{href}")
-
-            # Only keep Schwerpunktprogramme
-            if 'Schwerpunktprogramm' in title or 'SPP' in entry.get_text():
-                programs.append({
-                    'title': title,
-                    'url': href,
-                })
-
-        # Check for next page
-        next_link = soup.find('a', text=re.compile(r'weiter|next|›', re.I))
-        if next_link:
-            page_index += len(results)
-        else:
+            if not entry['spp_numbers']:
+                unnumbered += 1
+                continue
+            programs.setdefault(entry['spp_numbers'][0], {
+                'spp_number': entry['spp_numbers'][0],
+                'title': entry['title'],
+                'url': entry['url'],
+            })
+
+        # A short page is the last one; offsets count every entry GEPRIS returned
+        if len(results) < hits_per_page:
             break
+        page_index += len(results)
 
+    programs = list(programs.values())
+    if unnumbered:
+        print(f"  ⚠ Skipped {unnumbered} Schwerpunktprogramme without an SPP number in their entry")
     print(f"  Found {len(programs)} programs via search")
     return programs
 
 
-def scrape_programmlisten(page):
+def scrape_programmlisten(page, debug=False):
     """
     Scrape the programmlisten page — improved approach.
-    Clicks the SPP tab, waits for table, then extracts via JS or DOM.
+    Captures the table's JSON data source while the page (and SPP tab) load;
+    if none is seen, extracts via the Tabulator JS API or the DOM.
     """
     print(f"Navigating to {LIST_URL}")
+    responses = watch_json_responses(page)
     page.goto(LIST_URL, wait_until="networkidle", timeout=60000)
-    time.sleep(3)
-
-    # Click the Schwerpunktprogramme tab if it exists
-    try:
-        spp_tab = page.locator('text=Schwerpunktprogramme').first
-        if spp_tab.is_visible():
-            spp_tab.click()
-            time.sleep(3)
-            print("Clicked Schwerpunktprogramme tab")
-    except Exception as e:
-        print(f"  No tab to click: {e}")
-
-    # Save debug screenshot
-    debug_dir = DATA_DIR / "debug"
-    debug_dir.mkdir(exist_ok=True)
-    page.screenshot(path=str(debug_dir / "programmlisten.png"), full_page=True)
 
-    # Approach 1: Try Tabulator JS API
+    # Approach 1: the JSON the table was populated from
+    source, rows = find_tabulator_source(responses)
+    if not rows:
+        wait_for_table_rows(page)
+
+        # Click the Schwerpunktprogramme tab if it exists
+        try:
+            spp_tab = page.locator('text=Schwerpunktprogramme').first
+            if spp_tab.is_visible():
+                spp_tab.click()
+                wait_for_table_rows(page)
+                print("Clicked Schwerpunktprogramme tab")
+        except Exception as e:
+            print(f"  No tab to click: {e}")
+        source, rows = find_tabulator_source(responses)
+
+    if rows:
+        print(f"Captured {len(rows)} rows from the Tabulator data source")
+        save_tabulator_source(source)
+        return save_programme_list(rows)
+    print("  No Tabulator data source captured")
+
+    if debug:
+        debug_dir = DATA_DIR / "debug"
+        debug_dir.mkdir(exist_ok=True)
+        page.screenshot(path=str(debug_dir / "programmlisten.png"), full_page=True)
+
+    # Approach 2: Try Tabulator JS API
     tabulator_data = extract_tabulator_data(page)
     if tabulator_data and len(tabulator_data) > 20:
         return parse_tabulator_data(tabulator_data)
 
-    # Approach 2: Aggressive scrolling + DOM extraction
+    # Approach 3: Aggressive scrolling + DOM extraction
     print("\nFalling back to aggressive scroll + DOM extraction...")
     return scrape_with_aggressive_scroll(page)
 
 
-def parse_tabulator_data(data):
-    """Parse raw Tabulator row data into our program format."""
-    programs = []
+def parse_programme_rows(data):
+    """Parse raw Tabulator rows of any programme type (SPP, SFB, GRK, ...)."""
+    programmes = []
     for row in data:
-        typ = row.get('TYP', '')
-        if typ != 'SPP':
-            continue
-
-        nummer = str(row.get('NUMMER', ''))
-        title = row.get('PRJ_TITEL', '')
+        typ = str(row.get('TYP', '') or '')
+        nummer = str(row.get('NUMMER', '') or '')
+        title = row.get('PRJ_TITEL', '') or ''
         # PRJ_TITEL might contain HTML — strip tags
         if '<' in title:
-            title = BeautifulSoup(title, 'html.parser').get_text(strip=True)
+            title = element_text(parse_page(title))
 
         # Extract URL from title HTML
         url = ''
-        raw_title = row.get('PRJ_TITEL', '')
+        raw_title = row.get('PRJ_TITEL', '') or ''
         if 'href=' in raw_title:
             match = re.search(r'href="([^"]+)"', raw_title)
             if match:
@@ -204,8 +324,9 @@ def parse_tabulator_data(data):
             if url and not url.startswith('http'):
                 url = BASE_URL + url
 
-        programs.append({
-            'spp_number': f'SPP {nummer}' if nummer and not nummer.startswith('SPP') else nummer,
+        programmes.append({
+            'typ': typ,
+            'nummer': nummer,
             'title': title,
             'url': url,
             'beginn': str(row.get('PRJ_BEGINN', '')),
@@ -214,6 +335,20 @@ def parse_tabulator_data(data):
             'variante': row.get('VARIANTE', ''),
             'wissenschaftsbereich': row.get('WSB', ''),
         })
+    return programmes
+
+
+def parse_tabulator_data(data):
+    """Parse raw Tabulator row data into our program format (SPPs only)."""
+    programs = []
+    for programme in parse_programme_rows(data):
+        if programme.pop('typ') != 'SPP':
+            continue
+        nummer = programme.pop('nummer')
+        programs.append({
+            'spp_number': f'SPP {nummer}' if nummer and not nummer.startswith('SPP') else nummer,
+            **programme,
+        })
 
     print(f"Parsed {len(programs)} SPP programs from Tabulator data")
     return programs
@@ -255,7 +390,7 @@ def scrape_with_aggressive_scroll(page):
             const holder = document.querySelector('.tabulator-tableholder');
             if (holder) holder.scrollTop = {current};
         """)
-        time.sleep(0.15)
+        wait_for_render(page)
 
         # Extract visible rows
         rows_data = page.evaluate("""
@@ -324,102 +459,10 @@ def scrape_program_detail(page, program):
     print(f"  [{spp}] Scraping detail page...")
 
     try:
-        page.goto(url, wait_until="networkidle", timeout=30000)
-        time.sleep(1.5)
-
-        # Use JS to extract structured data from GEPRIS detail page
-        details = page.evaluate("""
-        () => {
-            const result = {};
-
-            // Extract <span class="name"> + sibling value pairs
-            document.querySelectorAll('span.name').forEach(span => {
-                const label = span.textContent.trim().replace(/:$/, '');
-                const parent = span.parentElement;
-                if (parent) {
-                    // Value is all text in parent minus the label
-                    let value = '';
-                    const siblings = Array.from(parent.childNodes);
-                    const spanIndex = siblings.indexOf(span);
-                    for (let i = spanIndex + 1; i < siblings.length; i++) {
-                        value += siblings[i].textContent || '';
-                    }
-                    value = value.trim();
-                    if (value) result[label] = value;
-                }
-            });
-
-            // Extract description: look for #projekttext or similar
-            const projekttext = document.querySelector('#projekttext');
-            if (projekttext) {
-                result['_projekttext'] = projekttext.textContent.trim();
-            }
-
-            // Also try the main content area for description text
-            const detailContent = document.querySelector('.detail_content, .detailseite');
-            if (detailContent) {
-                // Find paragraphs that look like descriptions (not metadata)
-                const paras = detailContent.querySelectorAll('p');
-                const descParts = [];
-                for (const p of paras) {
-                    const text = p.textContent.trim();
-                    // Skip short metadata-like lines
-                    if (text.length > 100 && !text.startsWith('Projekt') && !text.includes('Förderung')) {
-                        descParts.push(text);
-                    }
-                }
-                if (descParts.length > 0) {
-                    result['_description_paras'] = descParts.join('\\n\\n');
-                }
-            }
-
-            // Extract project list link
-            const links = document.querySelectorAll('a[href*="ergebnisse"], a[href*="Ergebnisse"]');
-            if (links.length > 0) {
-                result['_projects_url'] = links[0].href;
-            }
-
-            // Extract website link — multiple strategies
-            // Strategy 1: Look for "Webseite" or "Homepage" label with sibling link
-            document.querySelectorAll('span.name').forEach(span => {
-                if (span.textContent.includes('Webseite') || span.textContent.includes('Homepage')) {
-                    const link = span.parentElement?.querySelector('a[href]');
-                    if (link && link.href && !link.href.includes('gepris.dfg.de')) {
-                        result['_website'] = link.href;
-                    }
-                }
-            });
-
-            // Strategy 2: Look for a.extern or a[target="_blank"] links outside GEPRIS
-            if (!result['_website']) {
-                const externLinks = document.querySelectorAll('a.extern, .detail_content a[target="_blank"], .detail__content a[target="_blank"]');
-                for (const link of externLinks) {
-                    const href = link.href;
-                    if (href && !href.includes('gepris.dfg.de') && !href.includes('dfg.de/gepris') && href.startsWith('http')) {
-                        result['_website'] = href;
-                        break;
-                    }
-                }
-            }
-
-            // Strategy 3: Any external link in the detail content area
-            if (!result['_website']) {
-                const contentArea = document.querySelector('.detail_content, .detail__content, .detailseite');
-                if (contentArea) {
-                    const links = contentArea.querySelectorAll('a[href^="http"]');
-                    for (const link of links) {
-                        const href = link.href;
-                        if (href && !href.includes('gepris.dfg.de') && !href.includes('dfg.de/gepris') && !href.includes('dfg.de/foerderung')) {
-                            result['_website'] = href;
-                            break;
-                        }
-                    }
-                }
-            }
+        page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        wait_for_details(page)
 
-            return result;
-        }
-        """)
+        details = extract_page(page.content(), page.url)
 
         # Map German field names
         field_map = {
@@ -436,17 +479,22 @@ def scrape_program_detail(page, program):
         }
 
         for german, english in field_map.items():
-            if german in details:
-                program[english] = details[german]
-
-        # Use best description source
-        description = details.get('_projekttext', '') or details.get('_description_paras', '')
+            if german in details.field_texts:
+                program[english] = details.field_texts[german]
+
+        # Use best description source: #projekttext, else the long paragraphs
+        # of the detail area that are not metadata lines
+        description = details.projekttext or '\n\n'.join(
+            text for text in details.paragraphs
+            if len(text) > 100 and not text.startswith('Projekt') and 'Förderung' not in text
+        )
         program['description'] = description[:500] if description else ''
         program['full_description'] = description
-        program['projects_url'] = details.get('_projects_url', '')
+        program['projects_url'] = details.projects_url()
         program['detail_page_url'] = url
-        if details.get('_website'):
-            program['website'] = details['_website']
+        website = details.website()
+        if website:
+            program['website'] = website
 
     except Exception as e:
         print(f"  [{spp}] Error: {e}")
@@ -455,23 +503,53 @@ def scrape_program_detail(page, program):
     return program
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape all DFG Schwerpunktprogramme from GEPRIS")
+    parser.add_argument('--offline', action='store_true',
+                        help="Replay pages only from the response cache, never the network")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Bypass the on-disk response cache")
+    parser.add_argument('--direct', action='store_true',
+                        help="Fetch the programme list from the captured Tabulator data source over "
+                             "HTTP instead of rendering the page (falls back to the browser)")
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help="Maximum detail pages per second; slower when GEPRIS responds slowly "
+                             "(default: 1.0)")
+    parser.add_argument('--debug', action='store_true',
+                        help="Show the browser, load all resources and save screenshots to data/raw/debug/")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     print("=" * 70)
     print("DFG Schwerpunktprogramme — Full Scraper")
     print("=" * 70)
 
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    programs = []
+    if args.direct:
+        programs = fetch_programmlisten_direct(cache=not args.no_cache, offline=args.offline)
+    cache = None if args.no_cache and not args.offline else ResponseCache()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)  # visible for debugging
+        browser = p.chromium.launch(headless=not args.debug)
         context = browser.new_context(
             viewport={'width': 1280, 'height': 900},
             locale='de-DE',
         )
+        if cache:
+            # Documents, scripts and XHR (incl. the Tabulator data) read through the cache
+            route_through_cache(context, cache, offline=args.offline)
+        if not args.debug:
+            # Registered last, so blocked requests never reach the cache route
+            block_resources(context)
         page = context.new_page()
 
         # Step 1: Get program list from programmlisten page
-        programs = scrape_programmlisten(page)
+        if not programs:
+            programs = scrape_programmlisten(page, debug=args.debug)
 
         if len(programs) < 25:
             print(f"\nOnly found {len(programs)} programs — trying GEPRIS search as fallback...")
@@ -481,10 +559,14 @@ def main():
 
         if not programs:
             print("ERROR: No programs found! Saving debug info.")
-            page.screenshot(path=str(DATA_DIR / "debug" / "error.png"), full_page=True)
+            (DATA_DIR / "debug").mkdir(exist_ok=True)
+            if args.debug:
+                page.screenshot(path=str(DATA_DIR / "debug" / "error.png"), full_page=True)
             with open(DATA_DIR / "debug" / "error.html", 'w') as f:
                 f.write(page.content())
             browser.close()
+            if cache:
+                cache.close()
             return
 
         print(f"\n{'=' * 70}")
@@ -515,11 +597,16 @@ def main():
         print(f"Dropped {len(programs) - len(filtered)} older/completed programs")
 
         # Step 2: Scrape details for each program
+        # Paced by server latency instead of a fixed sleep after every page
+        limiter = AdaptiveRateLimiter(args.rate)
         print(f"\nScraping detail pages for {len(filtered)} programs...")
         for i, prog in enumerate(filtered, 1):
             print(f"[{i}/{len(filtered)}]", end="")
+            limiter.acquire()
+            start = time.monotonic()
             scrape_program_detail(page, prog)
-            time.sleep(1)  # rate limiting
+            limiter.release(time.monotonic() - start, failed='_error' in prog)
+        print(f"Rate limiter: {limiter.stats()}")
 
         # Also save ALL programs (unfiltered) for reference
         all_output = DATA_DIR / "spp_programs_all.json"
@@ -549,6 +636,9 @@ def main():
 
         browser.close()
 
+    if cache:
+        cache.close()
+
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,8 @@ from pathlib import Path
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 
+from page_ready import scroll_to_end, wait_for_details, wait_for_render, wait_for_table_rows
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
@@ -29,21 +31,14 @@ def scrape_spp_list(page):
     page.goto(START_URL, wait_until="networkidle", timeout=60000)
 
     # Wait for the dynamic table to load
-    time.sleep(5)
+    wait_for_table_rows(page)
 
     # Scroll the table to load all virtual rows
     print("Scrolling table to load all rows...")
     table_holder = page.query_selector('.tabulator-tableholder')
     if table_holder:
-        # Scroll to bottom multiple times to load all virtual rows
-        for i in range(50):  # Adjust if needed
-            page.evaluate("""
-                const holder = document.querySelector('.tabulator-tableholder');
-                if (holder) {
-                    holder.scrollTop = holder.scrollHeight;
-                }
-            """)
-            time.sleep(0.3)  # Brief pause to let rows render
+        # Scroll to bottom until no more rows are loaded
+        scrolls = scroll_to_end(page)
 
         # Scroll back to top
         page.evaluate("""
@@ -52,8 +47,8 @@ def scrape_spp_list(page):
                 holder.scrollTop = 0;
             }
         """)
-        time.sleep(2)
-        print("Finished scrolling")
+        wait_for_render(page)
+        print(f"Finished scrolling ({scrolls} scrolls)")
 
     # Get the page content
     content = page.content()
@@ -143,8 +138,8 @@ def scrape_program_details(page, spp_program):
     print(f"Scraping details for {spp_program['spp_number']}")
 
     try:
-        page.goto(spp_program['url'], wait_until="networkidle", timeout=60000)
-        time.sleep(2)
+        page.goto(spp_program['url'], wait_until="domcontentloaded", timeout=60000)
+        wait_for_details(page)
 
         content = page.content()
         soup = BeautifulSoup(content, 'html.parser')
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Reader for the exported similar-projects links.
+
+similar_projects.py writes data/processed/similar_projects.json: for each SPP,
+its projects and their closest projects in other SPPs. Reading the export
+needs neither the index nor scipy, so the summary generator imports it from
+here.
+"""
+
+import json
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+EXPORT_FILE = BASE_DIR / "data" / "processed" / "similar_projects.json"
+
+
+def load_similar_projects(path=EXPORT_FILE):
+    """The exported neighbours by SPP number, or {} if not built yet"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Approximate nearest-neighbour index for "similar projects" lookups.
+
+Project vectors are the TF-IDF index (tfidf_index.py) reduced to dense
+128-dimensional embeddings with a truncated SVD. Neighbours are found with
+random-hyperplane LSH: every table hashes a vector to a 7-bit bucket code,
+a query collects the projects sharing its buckets (probing one-bit-off
+buckets when those are too few) and ranks only those candidates by exact
+cosine similarity. Everything is built offline on the CPU and saved under
+data/processed/similar/.
+
+For each project the closest projects in *other* SPPs are exported to
+data/processed/similar_projects.json, which generate_spp_summaries uses for
+the collaboration sections of the per-SPP summaries and proposal guide.
+
+    python3 scripts/similar_projects.py --build
+    python3 scripts/similar_projects.py --similar 425867974
+    python3 scripts/similar_projects.py --query "soft robotics exoskeleton"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse.linalg import svds
+
+sys.path.insert(0, str(Path(__file__).parent))
+from similar_links import EXPORT_FILE, load_similar_projects
+from tfidf_index import INDEX_DIR, TfidfIndex, build_index, print_results
+
+BASE_DIR = Path(__file__).parent.parent
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+SIMILAR_DIR = PROCESSED_DIR / "similar"
+
+DEFAULT_DIMS = 128
+DEFAULT_TABLES = 16
+DEFAULT_BITS = 7
+# Neighbours per project in similar_projects.json
+EXPORT_K = 5
+# Coordination funds carry the program description, not a research topic
+EXCLUDED_TITLES = {'Koordinationsfonds', 'Coordination Funds'}
+
+
+def documents_hash(documents):
+    """Fingerprint of the TF-IDF index rows the vectors were computed from"""
+    payload = json.dumps(documents, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SimilarityIndex:
+    """LSH tables over SVD-reduced TF-IDF vectors, with exact re-ranking of candidates"""
+
+    def __init__(self, tfidf, vectors, components, planes):
+        if vectors.shape[0] != len(tfidf.documents):
+            raise ValueError("Similarity index does not match the TF-IDF index; rebuild with --build")
+        self.tfidf = tfidf
+        self.documents = tfidf.documents
+        self.vectors = vectors
+        self.components = components  # terms × dims projection for text queries
+        self.planes = planes
+        self._spps = np.array([doc['spp_number'] for doc in self.documents], dtype=object)
+        self._powers = 1 << np.arange(planes.shape[1], dtype=np.int64)
+        self._linkable = np.array([doc['title'] not in EXCLUDED_TITLES for doc in self.documents])
+
+        # Buckets of all tables as one CSR layout: bucket b of table t holds
+        # rows[starts[t * 2**bits + b]:starts[t * 2**bits + b + 1]]
+        n_buckets = 1 << planes.shape[1]
+        self._offsets = np.arange(len(planes), dtype=np.int64) * n_buckets
+        buckets = (self._hash(vectors) + self._offsets[:, None]).ravel()
+        order = np.argsort(buckets, kind='stable')
+        self._rows = (order % len(vectors)).astype(np.intp)
+        self._starts = np.searchsorted(buckets[order], np.arange(len(planes) * n_buckets + 1))
+
+    @classmethod
+    def build(cls, tfidf, dims=DEFAULT_DIMS, tables=DEFAULT_TABLES, bits=DEFAULT_BITS, seed=0):
+        """Reduce a TfidfIndex with a truncated SVD and hash the result"""
+        dims = min(dims, min(tfidf.matrix.shape) - 1)
+        u, s, vt = svds(tfidf.matrix, k=dims, random_state=seed)
+        vectors = _normalize(u * s).astype(np.float32)
+        planes = np.random.default_rng(seed).standard_normal((tables, bits, dims)).astype(np.float32)
+        return cls(tfidf, vectors, np.ascontiguousarray(vt.T, dtype=np.float32), planes)
+
+    def save(self, index_dir=SIMILAR_DIR):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        for name, array in (('vectors', self.vectors), ('components', self.components), ('planes', self.planes)):
+            tmp = index_dir / f"{name}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, index_dir / f"{name}.npy")
+        tmp = index_dir / "documents.tmp.json"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'documents_hash': documents_hash(self.documents)}, f)
+        os.replace(tmp, index_dir / "documents.json")
+
+    @classmethod
+    def load(cls, index_dir=SIMILAR_DIR, tfidf_dir=INDEX_DIR):
+        """Load a saved index; fails if the TF-IDF index was rebuilt since"""
+        index_dir = Path(index_dir)
+        tfidf = TfidfIndex.load(tfidf_dir)
+        meta_file = index_dir / "documents.json"
+        saved = None
+        if meta_file.exists():
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f).get('documents_hash')
+        if saved != documents_hash(tfidf.documents):
+            raise ValueError("Similarity index does not match the TF-IDF index; rebuild with --build")
+        return cls(tfidf, np.load(index_dir / "vectors.npy"),
+                   np.load(index_dir / "components.npy"), np.load(index_dir / "planes.npy"))
+
+    def _hash(self, vectors):
+        """Bucket codes, tables × rows"""
+        bits = np.einsum('nd,tbd->tnb', vectors, self.planes) > 0
+        return bits.astype(np.int64) @ self._powers
+
+    def candidates(self, vector, min_candidates):
+        """Rows sharing a bucket with vector in any table (plus one-bit-off buckets if too few)"""
+        codes = self._hash(vector[None, :])[:, 0]
+        rows = self._lookup(codes[:, None])
+        if len(rows) < min_candidates:
+            rows = self._lookup(np.concatenate([codes[:, None], codes[:, None] ^ self._powers], axis=1))
+        return rows
+
+    def _lookup(self, probes):
+        """Distinct rows in the probed buckets (probes: tables × codes)"""
+        buckets = (probes + self._offsets[:, None]).ravel()
+        starts, ends = self._starts[buckets], self._starts[buckets + 1]
+        lengths = ends - starts
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        return np.unique(self._rows[positions])
+
+    def nearest(self, vector, k=10, exclude=None, other_than_spp=None):
+        """Top-k (row, cosine) pairs for a normalised vector, best first"""
+        rows = self.candidates(vector, min_candidates=4 * k)
+        if exclude is not None:
+            rows = rows[rows != exclude]
+        rows = rows[self._linkable[rows]]
+        if other_than_spp is not None:
+            rows = rows[self._spps[rows] != other_than_spp]
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ vector
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((rows[top], -scores[top]))]
+        return [(int(rows[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+    def _results(self, pairs):
+        return [{**self.documents[row], 'score': round(score, 4)} for row, score in pairs]
+
+    def similar(self, project_id, k=10, other_spps=False):
+        """Projects most similar to an indexed project, optionally only from other SPPs"""
+        row = self.tfidf._rows.get(str(project_id))
+        if row is None:
+            raise KeyError(f"Project not in similarity index: {project_id}")
+        spp = self._spps[row] if other_spps else None
+        return self._results(self.nearest(self.vectors[row], k, exclude=row, other_than_spp=spp))
+
+    def search(self, text, k=10):
+        """Projects closest to a free-text description"""
+        row = self.tfidf.vectorize(text)
+        # Only the rows of the query's terms are needed (sparse @ dense copies the whole matrix)
+        vector = row.data @ self.components[row.indices]
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return []
+        return self._results(self.nearest((vector / norm).astype(np.float32), k))
+
+    def recall(self, k=10, sample=200, seed=0):
+        """Mean recall@k of the LSH lookup against brute force over a sample of projects"""
+        rng = np.random.default_rng(seed)
+        rows = rng.choice(len(self.vectors), size=min(sample, len(self.vectors)), replace=False)
+        hits = total = 0
+        for row in rows:
+            scores = self.vectors @ self.vectors[row]
+            scores[row] = -1
+            scores[~self._linkable] = -1
+            exact = {int(r) for r in np.argsort(-scores)[:k] if scores[r] > 0}
+            found = {r for r, _ in self.nearest(self.vectors[row], k, exclude=row)}
+            hits += len(exact & found)
+            total += len(exact)
+        return hits / total if total else 1.0
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def export_similar(index, path=EXPORT_FILE, k=EXPORT_K):
+    """
+    Write the k most similar projects from other SPPs for every project,
+    grouped by SPP: {spp_number: [{project_id, title, url, similar: [...]}]}.
+    """
+    export = defaultdict(list)
+    for row, doc in enumerate(index.documents):
+        if not index._linkable[row]:
+            continue
+        pairs = index.nearest(index.vectors[row], k, exclude=row, other_than_spp=doc['spp_number'])
+        if not pairs:
+            continue
+        export[doc['spp_number']].append({
+            'project_id': doc['project_id'],
+            'title': doc['title'],
+            'url': doc['url'],
+            'similar': index._results(pairs),
+        })
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(dict(export), f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def build_similar_index(tfidf=None, index_dir=SIMILAR_DIR, export_path=EXPORT_FILE):
+    """Build, save and export the similarity index (from the saved TF-IDF index if not given)"""
+    if tfidf is None:
+        tfidf = TfidfIndex.load() if (INDEX_DIR / "matrix.npz").exists() else build_index()
+
+    start = time.perf_counter()
+    index = SimilarityIndex.build(tfidf)
+    index.save(index_dir)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    export_similar(index, export_path)
+    per_query = (time.perf_counter() - start) / max(len(index.documents), 1)
+
+    print(f"✓ Similarity index: {len(index.documents)} projects × {index.vectors.shape[1]} dims, "
+          f"{len(index.planes)} LSH tables ({built:.1f}s) → {index_dir}")
+    print(f"✓ Similar projects: {per_query * 1000:.2f} ms/project, recall@10 {index.recall():.2f} "
+          f"→ {export_path}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the similar-projects index")
+    parser.add_argument('--build', action='store_true',
+                        help="(Re)build the index and similar_projects.json from the TF-IDF index")
+    parser.add_argument('--similar', metavar='PROJECT_ID', help="Projects similar to a project")
+    parser.add_argument('--other-spps', action='store_true', help="Only return projects from other SPPs")
+    parser.add_argument('--query', help="Projects closest to a free-text description")
+    parser.add_argument('-k', type=int, default=10, help="Number of results (default: 10)")
+    args = parser.parse_args()
+
+    index = build_similar_index() if args.build else SimilarityIndex.load()
+
+    for label, run in (('similar', lambda: index.similar(args.similar, args.k, args.other_spps)),
+                       ('query', lambda: index.search(args.query, args.k))):
+        if getattr(args, label) is None:
+            continue
+        start = time.perf_counter()
+        results = run()
+        print(f"\nTop {len(results)} for {label} '{getattr(args, label)}' "
+              f"({(time.perf_counter() - start) * 1000:.2f} ms):")
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Sparse TF-IDF index over project titles, abstracts and descriptions.
+
+The index is a scipy CSR matrix (one L2-normalised row per project) saved
+under data/processed/tfidf/ together with the vocabulary, IDF weights and
+project metadata. Queries are a single sparse matrix-vector product, so any
+free-text topic can be ranked against the whole corpus in milliseconds
+without another keyword pass over the project files.
+
+    python3 scripts/tfidf_index.py --build
+    python3 scripts/tfidf_index.py --query "soft robotics exoskeleton" -k 10
+    python3 scripts/tfidf_index.py --similar 425867974
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+from prepare_programs import clean_description
+from project_stream import iter_projects
+
+BASE_DIR = Path(__file__).parent.parent
+INDEX_DIR = BASE_DIR / "data" / "processed" / "tfidf"
+
+TOKEN_RE = re.compile(r'\w\w+')
+
+# Frequent German/English function words; everything else is kept
+STOPWORDS = frozenset("""
+    aber alle als am an auch auf aus bei bis da das dass dem den der des die dies diese diesem
+    diesen dieser durch ein eine einem einen einer eines es für hat haben ist im in ins
+    kann können mit nach nicht noch nur oder sich sie sind so sowie über um und uns unter
+    vom von vor werden wird wie wir zu zum zur zwischen
+    an and are as at be been but by can for from has have in into is it its of on or
+    such that the their these this to was we were which will with
+""".split())
+
+# Terms in fewer documents than this are dropped (typos, ids)
+DEFAULT_MIN_DF = 2
+
+
+def tokenize(text):
+    """Lowercase word tokens (two or more word characters), without stopwords"""
+    return [token for token in TOKEN_RE.findall(text.lower())
+            if token not in STOPWORDS and not token.isdigit()]
+
+
+def project_text(project):
+    """Title, full title, abstract and cleaned description of a project"""
+    title = project.get('title', '')
+    parts = [
+        title,
+        project.get('full_title', ''),
+        project.get('abstract', ''),
+        clean_description(project.get('description', ''), title),
+    ]
+    return ' '.join(part for part in parts if part)
+
+
+class TfidfIndex:
+    """Row-normalised TF-IDF matrix with project metadata and a query API"""
+
+    def __init__(self, matrix, vocabulary, idf, documents):
+        self.matrix = matrix.tocsr()
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.documents = documents
+        self._rows = {}
+        for row, doc in enumerate(documents):
+            self._rows.setdefault(doc['project_id'], row)
+
+    @classmethod
+    def build(cls, projects, min_df=DEFAULT_MIN_DF):
+        """Build the index from an iterable of project records"""
+        documents = []
+        term_counts = []
+        df = Counter()
+        for project in projects:
+            counts = Counter(tokenize(project_text(project)))
+            term_counts.append(counts)
+            df.update(counts.keys())
+            documents.append({
+                'project_id': str(project.get('project_id', '')),
+                'spp_number': project.get('spp_number', ''),
+                'title': project.get('title', ''),
+                'url': project.get('url', ''),
+            })
+
+        terms = sorted(term for term, n in df.items() if n >= min_df)
+        vocabulary = {term: i for i, term in enumerate(terms)}
+        n_docs = len(documents)
+        idf = np.log((1 + n_docs) / (1 + np.array([df[t] for t in terms], dtype=np.float64))) + 1
+
+        indptr, indices, data = [0], [], []
+        for counts in term_counts:
+            for term, count in counts.items():
+                column = vocabulary.get(term)
+                if column is not None:
+                    indices.append(column)
+                    data.append(1 + np.log(count))  # sublinear tf
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr)),
+            shape=(n_docs, len(terms)),
+        )
+        matrix.sort_indices()
+        matrix = _normalize_rows(matrix.multiply(idf).tocsr())
+        return cls(matrix, vocabulary, idf, documents)
+
+    def save(self, index_dir=INDEX_DIR):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(index_dir / "matrix.npz", self.matrix)
+        np.save(index_dir / "idf.npy", self.idf)
+        for name, payload in (('vocabulary.json', self.vocabulary), ('documents.json', self.documents)):
+            tmp = index_dir / f"{name}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, index_dir / name)
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        index_dir = Path(index_dir)
+        with open(index_dir / "vocabulary.json", 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        with open(index_dir / "documents.json", 'r', encoding='utf-8') as f:
+            documents = json.load(f)
+        return cls(sparse.load_npz(index_dir / "matrix.npz"), vocabulary,
+                   np.load(index_dir / "idf.npy"), documents)
+
+    def vectorize(self, text):
+        """Normalised 1 × V TF-IDF row for free text (unknown terms are ignored)"""
+        counts = Counter(t for t in tokenize(text) if t in self.vocabulary)
+        columns = np.array([self.vocabulary[t] for t in counts], dtype=np.int32)
+        values = np.array([(1 + np.log(n)) for n in counts.values()], dtype=np.float64)
+        values = values * self.idf[columns] if len(columns) else values
+        vector = sparse.csr_matrix((values, columns, [0, len(columns)]), shape=(1, len(self.vocabulary)))
+        return _normalize_rows(vector)
+
+    def _top_k(self, scores, k, exclude=None):
+        if exclude is not None:
+            scores[exclude] = -1
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [{**self.documents[i], 'score': float(scores[i])} for i in top if scores[i] > 0]
+
+    def search(self, text, k=10):
+        """Top-k projects for a free-text topic, as document dicts with a cosine 'score'"""
+        scores = (self.matrix @ self.vectorize(text).T).toarray().ravel()
+        return self._top_k(scores, k)
+
+    def similar(self, project_id, k=10):
+        """Top-k projects most similar to an indexed project (excluding itself)"""
+        row = self._rows.get(str(project_id))
+        if row is None:
+            raise KeyError(f"Project not in TF-IDF index: {project_id}")
+        scores = (self.matrix @ self.matrix[row].T).toarray().ravel()
+        return self._top_k(scores, k, exclude=row)
+
+
+def _normalize_rows(matrix):
+    """L2-normalise the rows of a CSR matrix (empty rows stay zero)"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+
+def build_index(source=None, index_dir=INDEX_DIR):
+    """Build the index from a project source (see project_stream) and save it"""
+    start = time.perf_counter()
+    index = TfidfIndex.build(iter_projects(source))
+    index.save(index_dir)
+    n_docs, n_terms = index.matrix.shape
+    print(f"✓ TF-IDF index: {n_docs} projects × {n_terms} terms, "
+          f"{index.matrix.nnz} non-zeros ({time.perf_counter() - start:.1f}s) → {index_dir}")
+    return index
+
+
+def print_results(results):
+    for rank, doc in enumerate(results, 1):
+        print(f"  {rank:2d}. {doc['score']:.3f}  {doc['spp_number']:10s} {doc['project_id']:>10s}  {doc['title'][:70]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the TF-IDF project index")
+    parser.add_argument('--build', action='store_true', help="(Re)build the index")
+    parser.add_argument('--input', type=Path, default=None,
+                        help="Project source for --build (default: data/raw/projects)")
+    parser.add_argument('--query', help="Rank projects for a free-text topic")
+    parser.add_argument('--similar', metavar='PROJECT_ID', help="Projects similar to a project")
+    parser.add_argument('-k', type=int, default=10, help="Number of results (default: 10)")
+    args = parser.parse_args()
+
+    index = build_index(args.input) if args.build else TfidfIndex.load()
+
+    for label, run in (('query', lambda: index.search(args.query, args.k)),
+                       ('similar', lambda: index.similar(args.similar, args.k))):
+        if getattr(args, label) is None:
+            continue
+        start = time.perf_counter()
+        results = run()
+        print(f"\nTop {len(results)} for {label} '{getattr(args, label)}' "
+              f"({(time.perf_counter() - start) * 1000:.1f} ms):")
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Topic profiles for relevance scoring.
+
+Each topic is a JSON file in config/topics/ with its project keywords
+(word-bounded, per language), field weights, relevance thresholds and the
+regex patterns used for program-level estimates in prepare_programs.py.
+Wearables and AI ship as wearables.json and ai.json; adding a topic means
+adding a file.
+
+TopicScorer compiles the keywords of all topics into one Aho-Corasick
+automaton, so each text field is scanned once however many topics there
+are, and caches per-project scores on disk keyed by the profile hash and a
+fingerprint of the scored fields. Unchanged projects under an unchanged
+profile are served from the cache.
+"""
+
+import hashlib
+import json
+import pickle
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from keyword_matcher import KeywordMatcher
+
+BASE_DIR = Path(__file__).parent.parent
+TOPICS_DIR = BASE_DIR / "config" / "topics"
+CACHE_DIR = BASE_DIR / "data" / "cache" / "topics"
+
+DEFAULT_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'abstract': 1.5,
+    'keywords': 2.0,
+    'dfg_classification': 1.0,
+}
+
+
+class TopicProfile:
+    """One topic: keywords, field weights and thresholds loaded from JSON"""
+
+    def __init__(self, config):
+        self.config = config
+        self.name = config['name']
+        self.label = config.get('label', self.name)
+        self.order = config.get('order', 100)
+        keywords = config.get('keywords', [])
+        if isinstance(keywords, dict):
+            keywords = [kw for language in keywords.values() for kw in language]
+        self.keywords = keywords
+        # Keywords listed in several languages count once per listing
+        self.weights = Counter(keywords)
+        self.field_weights = config.get('field_weights', DEFAULT_FIELD_WEIGHTS)
+        self.threshold = config.get('threshold', 1.0)
+        self.report_threshold = config.get('report_threshold', 3.0)
+        self.combined = config.get('combined', False)
+        self.program_patterns = config.get('program_patterns', [])
+        payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+        self.hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def score_column(self):
+        return f"{self.name}_score"
+
+    @property
+    def keywords_column(self):
+        return f"matched_{self.name}_keywords"
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+
+def load_profiles(topics_dir=TOPICS_DIR):
+    """All topic profiles in topics_dir, ordered by their 'order' then name"""
+    profiles = [TopicProfile.from_file(path) for path in Path(topics_dir).glob("*.json")]
+    return sorted(profiles, key=lambda p: (p.order, p.name))
+
+
+def load_profile(name, topics_dir=TOPICS_DIR):
+    return TopicProfile.from_file(Path(topics_dir) / f"{name}.json")
+
+
+def profiles_hash(profiles):
+    """Hash over a set of profiles; changes when a topic is edited, added or removed"""
+    return hashlib.sha256(' '.join(p.hash for p in profiles).encode('utf-8')).hexdigest()[:16]
+
+
+def score_columns(profiles):
+    """Score columns of the scored projects: one per topic, then combined_score"""
+    return [p.score_column for p in profiles] + ['combined_score']
+
+
+def keyword_columns(profiles):
+    """Matched-keyword columns of the scored projects, one per topic"""
+    return [p.keywords_column for p in profiles]
+
+
+def compile_matcher(profiles, cache_dir=CACHE_DIR):
+    """
+    One KeywordMatcher over the keywords of all profiles, pickled in
+    cache_dir keyed by the profile hashes so it is built only once.
+    """
+    keywords = list(dict.fromkeys(kw for profile in profiles for kw in profile.weights))
+    key = hashlib.sha256('\n'.join(keywords).encode('utf-8')).hexdigest()[:16]
+    path = Path(cache_dir) / f"matcher-{key}.pkl"
+    if path.exists():
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass  # stale or partial pickle: rebuild
+
+    matcher = KeywordMatcher(keywords)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+    return matcher
+
+
+class ScoreCache:
+    """
+    SQLite cache of (unrounded) topic scores per project.
+
+    Rows are keyed by profile hash and project key and carry a fingerprint
+    of the scored text, so edited projects miss and are rescored.
+    """
+
+    def __init__(self, path=CACHE_DIR / "scores.sqlite"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                profile TEXT NOT NULL,
+                project TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                score REAL NOT NULL,
+                matched TEXT NOT NULL,
+                PRIMARY KEY (profile, project)
+            )
+        """)
+        self._db.commit()
+
+    def get_many(self, profile_hash, keys):
+        """{project key: (fingerprint, score, matched)} for the keys present"""
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT project, fingerprint, score, matched FROM scores "
+                f"WHERE profile = ? AND project IN ({','.join('?' * len(batch))})",
+                [profile_hash] + batch,
+            )
+            for project, fingerprint, score, matched in rows:
+                found[project] = (fingerprint, score, matched)
+        return found
+
+    def put_many(self, profile_hash, entries):
+        """Store (project key, fingerprint, score, matched) entries"""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                [(profile_hash, key, fp, float(score), matched) for key, fp, score, matched in entries],
+            )
+
+    def prune(self, profile_hashes):
+        """Drop scores of profiles that no longer exist or have changed"""
+        with self._db:
+            self._db.execute(
+                f"DELETE FROM scores WHERE profile NOT IN ({','.join('?' * len(profile_hashes))})",
+                list(profile_hashes),
+            )
+
+    def close(self):
+        self._db.close()
+
+
+def field_scores(hits, weights, field_weight):
+    """
+    Per-text keyword score from a hit matrix.
+
+    Base: 2 points per unique keyword matched (max 5), plus 0.5 points per
+    match weighted by how often the keyword is listed (max 5), times
+    field_weight.
+    """
+    unique_score = np.minimum((hits > 0).sum(axis=1) * 2, 5)
+    frequency_score = np.minimum((hits @ weights) * 0.5, 5)
+    return (unique_score + frequency_score) * field_weight
+
+
+class TopicScorer:
+    """Score project fields against all topic profiles with one scan per field"""
+
+    def __init__(self, profiles=None, cache=True):
+        self.profiles = load_profiles() if profiles is None else list(profiles)
+        self.matcher = compile_matcher(self.profiles)
+        self.fields = list(dict.fromkeys(f for p in self.profiles for f in p.field_weights))
+
+        column = {kw: i for i, kw in enumerate(self.matcher.weights)}
+        self._columns = {}
+        self._weights = {}
+        self._names = {}
+        for profile in self.profiles:
+            names = sorted(profile.weights)
+            self._names[profile.name] = np.array(names, dtype=object)
+            self._columns[profile.name] = np.array([column[kw] for kw in names], dtype=np.intp)
+            self._weights[profile.name] = np.array([profile.weights[kw] for kw in names], dtype=np.int32)
+
+        self.cache = ScoreCache() if cache is True else (cache or None)
+        if self.cache is not None:
+            self.cache.prune([p.hash for p in self.profiles])
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _hits(self, texts):
+        """Hit matrix over the combined keyword set: texts × distinct keywords"""
+        column = {kw: i for i, kw in enumerate(self.matcher.weights)}
+        hits = np.zeros((len(texts), len(column)), dtype=np.int32)
+        for row, text in enumerate(texts):
+            for keyword, count in self.matcher.counts(text).items():
+                hits[row, column[keyword]] = count
+        return hits
+
+    def _compute(self, fields, profiles):
+        """Uncached scores: {profile name: (scores array, matched strings)}"""
+        field_hits = {field: self._hits(texts) for field, texts in fields.items()
+                      if any(field in p.field_weights for p in profiles)}
+        results = {}
+        for profile in profiles:
+            columns = self._columns[profile.name]
+            total, matched = None, None
+            for field, field_weight in profile.field_weights.items():
+                hits = field_hits[field][:, columns]
+                score = field_scores(hits, self._weights[profile.name], field_weight)
+                total = score if total is None else total + score
+                matched = hits > 0 if matched is None else matched | (hits > 0)
+            names = self._names[profile.name]
+            results[profile.name] = (np.minimum(total / 3, 10.0),
+                                     [', '.join(names[row]) for row in matched])
+        return results
+
+    def score(self, fields, keys=None):
+        """
+        Score projects for every profile.
+
+        Args:
+            fields: {field name: list of texts}, one entry per project
+            keys: optional stable project keys enabling the on-disk cache
+
+        Returns:
+            dict: profile name -> (scores array on the 0-10 scale, matched
+            keywords per project as ', '-joined strings)
+        """
+        n = len(next(iter(fields.values()))) if fields else 0
+        if self.cache is None or keys is None:
+            return self._compute(fields, self.profiles)
+
+        fingerprints = [
+            hashlib.sha256('\x1f'.join(fields[f][i] for f in self.fields).encode('utf-8')).hexdigest()
+            for i in range(n)
+        ]
+        results = {p.name: (np.zeros(n), [''] * n) for p in self.profiles}
+        missing = set()
+        cached = {p.name: self.cache.get_many(p.hash, keys) for p in self.profiles}
+        for profile in self.profiles:
+            scores, matched = results[profile.name]
+            for i, key in enumerate(keys):
+                entry = cached[profile.name].get(key)
+                if entry and entry[0] == fingerprints[i]:
+                    scores[i], matched[i] = entry[1], entry[2]
+                else:
+                    missing.add(i)
+
+        missing = sorted(missing)
+        self.cache_hits += n - len(missing)
+        self.cache_misses += len(missing)
+        if missing:
+            subset = {field: [texts[i] for i in missing] for field, texts in fields.items()}
+            computed = self._compute(subset, self.profiles)
+            for profile in self.profiles:
+                scores, matched = results[profile.name]
+                new_scores, new_matched = computed[profile.name]
+                for j, i in enumerate(missing):
+                    scores[i], matched[i] = new_scores[j], new_matched[j]
+                self.cache.put_many(profile.hash, [
+                    (keys[i], fingerprints[i], new_scores[j], new_matched[j])
+                    for j, i in enumerate(missing)
+                ])
+        return results
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None